@@ -1,22 +1,85 @@
-from typing import Dict, Any, List
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
+import asyncio
+import inspect
+import time
+from datetime import date
+from typing import TYPE_CHECKING, Dict, Any, List, AsyncIterator, Awaitable, Callable, Optional, Tuple
+from utils.dedup import normalize_arxiv_id, youtube_video_id
+from utils.digest import DigestStore, join_sections, merge_update, split_sections
+from utils.llm_cache import LLMResponseCache, cache_key
+from utils.note_cache import PaperNoteCache
+from utils.ranking import count_tokens, fit, load_tokenizer, pack, rank
+from utils.resilience import retry
+from utils.tracing import tracer
 from utils.types import PaperInfo, VideoInfo
 
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.runnables import RunnableConfig
+
+# 缓存命中时回放的分块大小（字符）
+REPLAY_CHUNK_CHARS = 64
+
+# 分节生成模式的各节：(标题, 写作要求, 建议字数, 输出 token 上限)
+BLOG_SECTIONS = (
+    ("引言", "简介该领域的当前发展态势", 200, 400),
+    ("最新研究进展", "基于论文内容总结关键发现和创新点", 550, 1100),
+    ("深度解读", "选择1-2篇重要论文进行详细分析", 550, 1100),
+    ("视频推荐", "推荐相关的学习和研究视频，包含视频链接和简要说明", 250, 500),
+    ("未来展望", "基于当前研究趋势的发展预测", 250, 500),
+    ("总结", "概括要点和建议", 150, 300),
+)
+OUTLINE_MAX_TOKENS = 300
+# reduce 阶段：逐篇笔记装不进预算时，其余论文的笔记每组合并为一段综述
+REDUCE_GROUP_SIZE = 10
+# 需要合并时，论文预算中留给合并综述的比例
+REDUCE_SHARE = 0.25
+# 合并的最大轮数（每轮论文数约缩小 REDUCE_GROUP_SIZE 倍）
+REDUCE_MAX_ROUNDS = 3
+
 class ContentIntegrationAgent:
     """内容整合智能体"""
     
-    def __init__(self, openai_api_key: str):
+    def __init__(self, openai_api_key: str, max_concurrent_llm_calls: int = 4,
+                 map_reduce_threshold: int = 8, map_concurrency: int = 8,
+                 note_cache: Optional[PaperNoteCache] = None,
+                 llm_cache: Optional[LLMResponseCache] = None,
+                 paper_token_budget: int = 6000, video_token_budget: int = 1500,
+                 llm: Optional["BaseChatModel"] = None,
+                 digest_store: Optional[DigestStore] = None,
+                 sectioned: bool = False, section_attempts: int = 2):
         self.name = "Content Integration Agent"
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.7,
-            openai_api_key=openai_api_key,
-            streaming=True,  # 启用流式响应
-            timeout=30, 
-        )
+        # 限制同时进行的 LLM 调用数量（批量模式下多个工作流共享）；分节模式下各节同时生成，至少为节数
+        if sectioned:
+            max_concurrent_llm_calls = max(max_concurrent_llm_calls, len(BLOG_SECTIONS))
+        self.llm_semaphore = asyncio.Semaphore(max_concurrent_llm_calls)
+        # 论文数超过阈值时先并发浓缩每篇论文（map），再基于笔记撰写博客（reduce）
+        self.map_reduce_threshold = map_reduce_threshold
+        self.map_semaphore = asyncio.Semaphore(map_concurrency)
+        self.note_cache = note_cache
+        self._inflight_notes: Dict[str, asyncio.Future] = {}
+        # 相同模型、温度和完整提示的响应直接从缓存回放
+        self.llm_cache = llm_cache
+        # 论文/视频按相关度排序后装入的提示 token 预算（替代固定条数截断）
+        self.paper_token_budget = paper_token_budget
+        self.video_token_budget = video_token_budget
+        # 摘要模式：只为相对上次运行新增的论文调用 LLM，合并进保存的文章
+        self.digest_store = digest_store
+        # 分节模式：先规划大纲，再并发生成各节并按顺序拼接；失败的节单独重试
+        self.sectioned = sectioned
+        self.section_attempts = section_attempts
+        # LLM 客户端在首次使用时创建（见 llm 属性）
+        self.openai_api_key = openai_api_key
+        self._llm = llm
         
-        self.blog_prompt = ChatPromptTemplate.from_template("""
+        # 提示模板文本；ChatPromptTemplate 在首次使用时才创建（见 blog_prompt / map_prompt 属性）
+        self._blog_prompt: Optional["ChatPromptTemplate"] = None
+        self._map_prompt: Optional["ChatPromptTemplate"] = None
+        self._reduce_prompt: Optional["ChatPromptTemplate"] = None
+        self._digest_prompt: Optional["ChatPromptTemplate"] = None
+        self._outline_prompt: Optional["ChatPromptTemplate"] = None
+        self._section_prompt: Optional["ChatPromptTemplate"] = None
+        self.blog_template = """
 你是一位专业的科研博客作者。请根据提供的最新论文和视频资源，为"{domain}"领域撰写一篇引人入胜的博客文章。
 
 最新论文资料：
@@ -43,57 +106,177 @@ class ContentIntegrationAgent:
 - 使用Markdown格式
 
 请开始撰写：
-        """)
+        """
+        
+        self.map_template = """
+请将下面这篇论文浓缩为一条不超过80字的研究笔记，说明它要解决的问题、核心方法和主要结论。
+只输出笔记内容，不要添加标题或前缀。
+
+标题：{title}
+摘要：{summary}
+        """
+        
+        self.reduce_template = """
+下面是若干篇论文的研究笔记。请将它们合并为一段不超过150字的综述，保留各论文的关键方法和结论，
+并在提到的论文后用括号注明 ArXiv ID。只输出综述内容。
+
+{notes}
+        """
+        
+        self.digest_template = """
+你正在更新"{domain}"领域的每日研究博客。以下是自上次更新以来新出现的论文：
+
+{papers_content}
+
+请只为这些新论文撰写"最新研究进展"的增量内容：
+- 每篇论文一条 Markdown 列表项，说明它要解决的问题、核心方法和主要发现，并注明标题和 ArXiv ID
+- 论文之间有明显关联时，可以用一两句话指出
+- 每篇论文不超过100字
+- 不要添加标题，不要重复引言、总结等文章已有的部分
+
+请开始撰写：
+        """
+        
+        # 分节模式的大纲和各节提示共用同一段资料前缀
+        section_context = """
+你是一位专业的科研博客作者，正在为"{domain}"领域撰写一篇博客文章。
+
+最新论文资料：
+{papers_content}
+
+相关视频资源：
+{videos_content}
+
+文章包含以下部分：
+{sections}
+"""
+        self.outline_template = section_context + """
+请先规划文章大纲：第一行以"# "开头给出文章标题，然后为每个部分写一行"## 部分名"，
+其下列出1-2个简短要点（每个要点一行，注明涉及的论文标题或视频）。只输出大纲，不要撰写正文。
+        """
+        self.section_template = section_context + """
+全文大纲：
+{outline}
+
+请只撰写"{section}"部分的正文：{instruction}。
+要求：
+- 使用专业但易懂的语言，确保内容准确性和客观性，适当引用论文标题和作者
+- 按大纲展开，不要重复其他部分的内容
+- 不要输出部分标题，篇幅控制在{words}字以内
+- 使用Markdown格式
+
+请开始撰写：
+        """
     
-    async def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        """处理内容整合请求"""
+    @property
+    def llm(self) -> "BaseChatModel":
+        """LLM 客户端；首次使用时才导入 langchain_openai 并创建，缩短冷启动"""
+        if self._llm is None:
+            from langchain_openai import ChatOpenAI
+            self._llm = ChatOpenAI(
+                model="gpt-4o-mini",
+                temperature=0.7,
+                openai_api_key=self.openai_api_key,
+                streaming=True,  # 启用流式响应
+                stream_usage=True,  # 流式响应末尾返回 token 用量
+                timeout=30, 
+            )
+        return self._llm
+    
+    @llm.setter
+    def llm(self, llm: "BaseChatModel"):
+        self._llm = llm
+    
+    @property
+    def blog_prompt(self) -> "ChatPromptTemplate":
+        if self._blog_prompt is None:
+            from langchain_core.prompts import ChatPromptTemplate
+            self._blog_prompt = ChatPromptTemplate.from_template(self.blog_template)
+        return self._blog_prompt
+    
+    @property
+    def map_prompt(self) -> "ChatPromptTemplate":
+        if self._map_prompt is None:
+            from langchain_core.prompts import ChatPromptTemplate
+            self._map_prompt = ChatPromptTemplate.from_template(self.map_template)
+        return self._map_prompt
+    
+    @property
+    def reduce_prompt(self) -> "ChatPromptTemplate":
+        if self._reduce_prompt is None:
+            from langchain_core.prompts import ChatPromptTemplate
+            self._reduce_prompt = ChatPromptTemplate.from_template(self.reduce_template)
+        return self._reduce_prompt
+    
+    @property
+    def digest_prompt(self) -> "ChatPromptTemplate":
+        if self._digest_prompt is None:
+            from langchain_core.prompts import ChatPromptTemplate
+            self._digest_prompt = ChatPromptTemplate.from_template(self.digest_template)
+        return self._digest_prompt
+    
+    @property
+    def outline_prompt(self) -> "ChatPromptTemplate":
+        if self._outline_prompt is None:
+            from langchain_core.prompts import ChatPromptTemplate
+            self._outline_prompt = ChatPromptTemplate.from_template(self.outline_template)
+        return self._outline_prompt
+    
+    @property
+    def section_prompt(self) -> "ChatPromptTemplate":
+        if self._section_prompt is None:
+            from langchain_core.prompts import ChatPromptTemplate
+            self._section_prompt = ChatPromptTemplate.from_template(self.section_template)
+        return self._section_prompt
+    
+    async def process(self, state: Dict[str, Any], config: Optional["RunnableConfig"] = None) -> Dict[str, Any]:
+        """处理内容整合请求
+
+        config["configurable"]["on_token"] 可传入回调（同步或异步），在 token 到达时调用；
+        config["configurable"]["bypass_llm_cache"] 为 True 时跳过响应缓存；
+        config["configurable"]["raise_on_error"] 为 True 时生成失败直接抛出异常（检查点模式）。
+        """
+        configurable = (config or {}).get("configurable", {})
         try:
-            # 使用字典语法访问状态
+            # 使用字典语法访问状态；论文和视频已在检索阶段校验，直接使用
             domain = state.get("domain", "")
-            papers_data = state.get("papers", [])
-            videos_data = state.get("videos", [])
-            
-            # 将字典转换为 Pydantic 模型（如果需要）
-            papers = []
-            for paper_dict in papers_data:
-                if isinstance(paper_dict, dict):
-                    papers.append(PaperInfo(**paper_dict))
-                else:
-                    papers.append(paper_dict)
-            
-            videos = []
-            for video_dict in videos_data:
-                if isinstance(video_dict, dict):
-                    videos.append(VideoInfo(**video_dict))
-                else:
-                    videos.append(video_dict)
+            papers = state.get("papers", [])
+            videos = state.get("videos", [])
+            on_token = configurable.get("on_token")
+            use_cache = not configurable.get("bypass_llm_cache", False)
             
-            # 准备内容
-            papers_content = self._format_papers(papers)
-            videos_content = self._format_videos(videos)
+            async def emit(token: str):
+                if on_token:
+                    result = on_token(token)
+                    if inspect.isawaitable(result):
+                        await result
             
-            # 生成博客内容
-            blog_response = await self.llm.ainvoke(
-                self.blog_prompt.format(
-                    domain=domain,
-                    papers_content=papers_content,
-                    videos_content=videos_content
-                )
-            )
+            # 流式生成博客内容，结束后再拼接为完整文本
+            metrics: Dict[str, Any] = {}
+            if self.digest_store is not None:
+                blog_content = await self.generate_digest(domain, papers, videos, emit, metrics, use_cache)
+            else:
+                blog_content = await self.generate_blog(domain, papers, videos, emit, metrics, use_cache)
             
             # 返回状态更新
             return {
-                "blog_content": blog_response.content,
+                "blog_content": blog_content,
                 "messages": [{
                     "agent": self.name,
                     "action": "generated_blog",
                     "domain": domain,
                     "papers_count": len(papers),
-                    "videos_count": len(videos)
+                    "videos_count": len(videos),
+                    # 截止时间到达、熔断或出错时只拿到部分结果的数据源
+                    "partial_sources": [m["agent"] for m in state.get("messages", []) if m.get("partial")],
+                    "metrics": metrics
                 }]
             }
             
         except Exception as e:
+            if configurable.get("raise_on_error"):
+                # 检查点模式：让运行停在本节点，恢复时只重新生成博客
+                raise RuntimeError(f"Failed to generate blog: {str(e)}") from e
             return {
                 "blog_content": "",
                 "messages": [{
@@ -102,37 +285,472 @@ class ContentIntegrationAgent:
                 }]
             }
     
-    def _format_papers(self, papers: List[PaperInfo]) -> str:
-        """格式化论文信息"""
-        if not papers:
+    def build_prompt(self, domain: str, papers: List[PaperInfo], videos: List[VideoInfo],
+                     notes: Optional[Dict[str, str]] = None,
+                     metrics: Optional[Dict[str, Any]] = None,
+                     merged: Optional[List[str]] = None) -> str:
+        """渲染完整的博客生成提示
+
+        论文和视频先按与领域的相关度排序，再装入各自的 token 预算；
+        提供 notes 时使用 map 阶段的浓缩笔记代替摘要，merged 为 reduce 阶段合并的综述。
+        """
+        packing: Dict[str, Any] = {}
+        prompt = self.blog_prompt.format(
+            domain=domain,
+            papers_content=self._format_papers(domain, papers, notes, packing, merged),
+            videos_content=self._format_videos(domain, videos, packing)
+        )
+        if metrics is not None:
+            metrics["packing"] = packing
+        return prompt
+    
+    @property
+    def model_name(self) -> str:
+        return getattr(self.llm, "model_name", None) or type(self.llm).__name__
+    
+    async def load_tokenizer(self):
+        """在线程中加载 tiktoken 词表（首次可能需要下载），不阻塞事件循环；之后的调用直接命中缓存"""
+        await asyncio.to_thread(load_tokenizer, self.model_name)
+    
+    def use_map_reduce(self, papers: List[PaperInfo]) -> bool:
+        return bool(self.map_reduce_threshold) and len(papers) > self.map_reduce_threshold
+    
+    async def prepare_papers(self, domain: str, papers: List[PaperInfo],
+                             metrics: Optional[Dict[str, Any]] = None
+                             ) -> Tuple[List[PaperInfo], Optional[Dict[str, str]], List[str]]:
+        """返回 (逐篇列出的论文, 笔记, 合并综述)
+
+        map-reduce 模式下先浓缩全部论文，按相关度逐篇装入预算；装不下的论文不丢弃，
+        其笔记分组合并为综述（必要时多轮），放在预算中预留的部分。
+        """
+        await self.load_tokenizer()
+        if not self.use_map_reduce(papers):
+            return papers, None, []
+        ranked = self._rank_papers(domain, papers)
+        notes = await self.condense_papers(ranked, metrics)
+        render = lambda i, paper: self._format_paper_note(i, paper, notes.get(paper.arxiv_id, ""))
+        selected = fit(ranked, render, self.paper_token_budget, self.model_name)
+        if len(selected) == len(ranked):
+            return selected, notes, []
+        reserved = int(self.paper_token_budget * REDUCE_SHARE)
+        selected = fit(ranked, render, self.paper_token_budget - reserved, self.model_name)
+        listed = {id(paper) for paper in selected}
+        rest = [paper for paper in ranked if id(paper) not in listed]
+        merged = await self.reduce_notes(rest, notes, reserved, metrics)
+        return selected, notes, merged
+    
+    async def reduce_notes(self, papers: List[PaperInfo], notes: Dict[str, str], budget: int,
+                           metrics: Optional[Dict[str, Any]] = None) -> List[str]:
+        """reduce 阶段：把笔记分组合并为综述，直到总长度装入 budget（最多 REDUCE_MAX_ROUNDS 轮）"""
+        started = time.perf_counter()
+        texts = [f"{paper.title}（ArXiv ID：{paper.arxiv_id}）：{notes.get(paper.arxiv_id, '')}" for paper in papers]
+        rounds = calls = failures = 0
+        while len(texts) > 1 and rounds < REDUCE_MAX_ROUNDS and \
+                count_tokens("\n".join(texts), self.model_name) > budget:
+            groups = [texts[i:i + REDUCE_GROUP_SIZE] for i in range(0, len(texts), REDUCE_GROUP_SIZE)]
+            results = await asyncio.gather(*(self._reduce_group(group) for group in groups),
+                                           return_exceptions=True)
+            texts = []
+            for group, result in zip(groups, results):
+                if isinstance(result, BaseException):
+                    # 合并失败时退回截断的笔记，不影响整篇博客
+                    failures += 1
+                    texts.append("；".join(text[:80] for text in group))
+                else:
+                    texts.append(result)
+            rounds += 1
+            calls += len(groups)
+        if metrics is not None and "map" in metrics:
+            metrics["map"]["reduce"] = {
+                "papers": len(papers),
+                "rounds": rounds,
+                "llm_calls": calls,
+                "failures": failures,
+                "elapsed_s": round(time.perf_counter() - started, 3),
+            }
+        return texts
+    
+    async def _reduce_group(self, texts: List[str]) -> str:
+        with tracer.span("llm.invoke", model=self.model_name, purpose="reduce", notes=len(texts)) as span:
+            waited = time.perf_counter()
+            async with self.map_semaphore, self.llm_semaphore:
+                span.set_attribute("queue_wait_s", round(time.perf_counter() - waited, 6))
+                response = await self.llm.ainvoke(self.reduce_prompt.format(notes="\n".join(texts)))
+            record_usage(span, self.model_name, getattr(response, "usage_metadata", None))
+        return response.content.strip()
+    
+    async def condense_papers(self, papers: List[PaperInfo],
+                              metrics: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+        """map 阶段：并发把每篇论文浓缩为笔记，按 arxiv_id 缓存"""
+        started = time.perf_counter()
+        model = self.model_name
+        notes = self.note_cache.get_many([p.arxiv_id for p in papers], model) if self.note_cache else {}
+        cache_hits = len(notes)
+        
+        missing = list({p.arxiv_id: p for p in papers if p.arxiv_id not in notes}.values())
+        results = await asyncio.gather(*(self._condense_one(p) for p in missing), return_exceptions=True)
+        failures = 0
+        for paper, result in zip(missing, results):
+            if isinstance(result, BaseException):
+                # 浓缩失败时退回截断的摘要，不影响整篇博客
+                failures += 1
+                notes[paper.arxiv_id] = paper.summary[:200]
+            else:
+                notes[paper.arxiv_id] = result
+        
+        if metrics is not None:
+            metrics["map"] = {
+                "papers": len(papers),
+                "llm_calls": len(missing),
+                "cache_hits": cache_hits,
+                "failures": failures,
+                "elapsed_s": round(time.perf_counter() - started, 3),
+            }
+        return notes
+    
+    async def _condense_one(self, paper: PaperInfo) -> str:
+        """浓缩单篇论文；并发请求同一篇论文时只调用一次 LLM"""
+        inflight = self._inflight_notes.get(paper.arxiv_id)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        future = asyncio.ensure_future(self._run_condense(paper))
+        self._inflight_notes[paper.arxiv_id] = future
+        try:
+            return await future
+        finally:
+            self._inflight_notes.pop(paper.arxiv_id, None)
+    
+    async def _run_condense(self, paper: PaperInfo) -> str:
+        with tracer.span("llm.invoke", model=self.model_name, purpose="map", arxiv_id=paper.arxiv_id) as span:
+            waited = time.perf_counter()
+            async with self.map_semaphore, self.llm_semaphore:
+                span.set_attribute("queue_wait_s", round(time.perf_counter() - waited, 6))
+                response = await self.llm.ainvoke(
+                    self.map_prompt.format(title=paper.title, summary=paper.summary)
+                )
+            record_usage(span, self.model_name, getattr(response, "usage_metadata", None))
+        note = response.content.strip()
+        if self.note_cache:
+            self.note_cache.put(paper.arxiv_id, self.model_name, note)
+        return note
+    
+    async def astream_blog(self, domain: str, papers: List[PaperInfo], videos: List[VideoInfo],
+                           metrics: Optional[Dict[str, Any]] = None,
+                           use_cache: bool = True) -> AsyncIterator[str]:
+        """逐 token 生成博客内容
+
+        metrics 字典（如提供）在生成结束后写入首 token 延迟、总耗时、输出 token 数和生成速度。
+        """
+        started = time.perf_counter()
+        selected, notes, merged = await self.prepare_papers(domain, papers, metrics)
+        prompt = self.build_prompt(domain, selected, videos, notes, metrics, merged)
+        if metrics is not None:
+            metrics["packing"]["papers_in"] = len(papers)
+        async for token in self.astream_prompt(prompt, metrics, use_cache, started):
+            yield token
+    
+    async def generate_blog(self, domain: str, papers: List[PaperInfo], videos: List[VideoInfo],
+                            emit: Callable[[str], Awaitable[None]],
+                            metrics: Dict[str, Any], use_cache: bool = True) -> str:
+        """生成完整博客（分节模式或单次流式调用），token 通过 emit 输出"""
+        if self.sectioned:
+            return await self.generate_sectioned(domain, papers, videos, emit, metrics, use_cache)
+        parts = []
+        async for token in self.astream_blog(domain, papers, videos, metrics, use_cache):
+            parts.append(token)
+            await emit(token)
+        return "".join(parts)
+    
+    async def generate_sectioned(self, domain: str, papers: List[PaperInfo], videos: List[VideoInfo],
+                                 emit: Callable[[str], Awaitable[None]],
+                                 metrics: Dict[str, Any], use_cache: bool = True) -> str:
+        """分节模式：规划一次大纲，再并发生成各节，按顺序拼接为 Markdown
+
+        各节共享同一段资料和大纲，每节有自己的输出 token 上限，失败时只重试该节
+        （section_attempts 次）。各节按顺序在前面的节完成后通过 emit 输出，
+        墙钟时间约为大纲加最长的一节，而不是整篇文章的解码时间。
+        """
+        started = time.perf_counter()
+        selected, notes, merged = await self.prepare_papers(domain, papers, metrics)
+        packing: Dict[str, Any] = {}
+        context = {
+            "domain": domain,
+            "papers_content": self._format_papers(domain, selected, notes, packing, merged),
+            "videos_content": self._format_videos(domain, videos, packing),
+            "sections": "\n".join(f"{i}. **{name}**：{instruction}"
+                                  for i, (name, instruction, _, _) in enumerate(BLOG_SECTIONS, 1)),
+        }
+        metrics["packing"] = {**packing, "papers_in": len(papers)}
+        
+        outline_metrics: Dict[str, Any] = {}
+        outline = await self._generate(self.outline_prompt.format(**context), outline_metrics,
+                                       use_cache, OUTLINE_MAX_TOKENS)
+        title = next((line for line in outline.splitlines() if line.startswith("# ")), f"# {domain}：最新研究进展")
+        outline_done = time.perf_counter()
+        
+        section_metrics: List[Dict[str, Any]] = [{"section": name, "attempts": 0} for name, *_ in BLOG_SECTIONS]
+        
+        async def write_section(index: int) -> str:
+            name, instruction, words, max_tokens = BLOG_SECTIONS[index]
+            prompt = self.section_prompt.format(
+                **context, outline=outline.strip(), section=name, instruction=instruction, words=words
+            )
+            
+            async def attempt() -> str:
+                section_metrics[index]["attempts"] += 1
+                return await self._generate(prompt, section_metrics[index], use_cache, max_tokens)
+            
+            with tracer.span("blog.section", section=name):
+                return await retry(attempt, self.section_attempts)
+        
+        tasks = [asyncio.ensure_future(write_section(i)) for i in range(len(BLOG_SECTIONS))]
+        parts = [title.strip() + "\n\n"]
+        await emit(parts[0])
+        # 标题来自大纲，首 token 延迟按第一节正文输出的时间计算
+        first_token_at: Optional[float] = None
+        try:
+            for (name, *_), task in zip(BLOG_SECTIONS, tasks):
+                part = f"## {name}\n\n{(await task).strip()}\n\n"
+                parts.append(part)
+                await emit(part)
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+        finally:
+            # 某节最终失败时取消其余仍在生成的节
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        finished = time.perf_counter()
+        output_tokens = sum(m.get("output_tokens") or 0 for m in section_metrics)
+        metrics.update({
+            "ttft_s": round(first_token_at - started, 3) if first_token_at else None,
+            "total_s": round(finished - started, 3),
+            "prompt_tokens": sum(m.get("prompt_tokens") or 0 for m in [outline_metrics, *section_metrics]),
+            "output_tokens": output_tokens + (outline_metrics.get("output_tokens") or 0),
+            "tokens_per_s": round(output_tokens / (finished - outline_done), 1) if finished > outline_done else None,
+            "sections": {
+                "outline_s": outline_metrics.get("total_s"),
+                "parallel_s": round(finished - outline_done, 3),
+                "sections": [
+                    {key: m.get(key) for key in ("section", "attempts", "total_s", "output_tokens")}
+                    for m in section_metrics
+                ],
+            },
+        })
+        return "".join(parts)
+    
+    async def _generate(self, prompt: str, metrics: Dict[str, Any], use_cache: bool = True,
+                        max_tokens: Optional[int] = None) -> str:
+        """生成单个提示的完整响应（不逐 token 输出）"""
+        return "".join([token async for token in self.astream_prompt(prompt, metrics, use_cache,
+                                                                    max_tokens=max_tokens)])
+    
+    async def generate_digest(self, domain: str, papers: List[PaperInfo], videos: List[VideoInfo],
+                              emit: Callable[[str], Awaitable[None]],
+                              metrics: Dict[str, Any], use_cache: bool = True) -> str:
+        """摘要模式：与上次运行比较，只为新论文生成“最新研究进展”，合并进保存的文章
+
+        第一次运行某个领域时生成完整博客并保存；没有新论文时不调用 LLM
+        （新视频直接列入当天的更新）。只有 LLM 生成的内容通过 emit 流式输出。
+        """
+        paper_ids = [normalize_arxiv_id(paper.arxiv_id) for paper in papers]
+        video_ids = [youtube_video_id(video.url) or video.url for video in videos]
+        digest = self.digest_store.get(domain)
+        
+        if digest is None:
+            blog_content = await self.generate_blog(domain, papers, videos, emit, metrics, use_cache)
+            if blog_content:
+                self.digest_store.put(domain, paper_ids, video_ids, split_sections(blog_content))
+            metrics["digest"] = {"mode": "full", "new_papers": len(papers), "new_videos": len(videos)}
+            return blog_content
+        
+        seen_papers, seen_videos = set(digest["paper_ids"]), set(digest["video_ids"])
+        new_papers = [paper for paper, pid in zip(papers, paper_ids) if pid not in seen_papers]
+        new_videos = [video for video, vid in zip(videos, video_ids) if vid not in seen_videos]
+        metrics["digest"] = {"mode": "delta", "new_papers": len(new_papers), "new_videos": len(new_videos)}
+        if not new_papers and not new_videos:
+            metrics["digest"]["mode"] = "unchanged"
+            return join_sections(digest["sections"])
+        
+        progress = ""
+        if new_papers:
+            await self.load_tokenizer()
+            packing: Dict[str, Any] = {}
+            prompt = self.digest_prompt.format(
+                domain=domain,
+                papers_content=self._format_papers(domain, new_papers, None, packing),
+            )
+            metrics["packing"] = packing
+            parts = []
+            async for token in self.astream_prompt(prompt, metrics, use_cache):
+                parts.append(token)
+                await emit(token)
+            progress = "".join(parts)
+        videos_text = ""
+        if new_videos:
+            videos_text = "**新视频**\n" + "\n".join(
+                f"- [{video.title}]({video.url})" + (f"（{video.channel}）" if video.channel else "")
+                for video in new_videos
+            )
+        
+        sections = merge_update(digest["sections"], date.today().isoformat(), progress, videos_text)
+        # 新 id 在前，旧 id 在后（存储按数量上限截断最旧的）
+        self.digest_store.put(domain, paper_ids + digest["paper_ids"], video_ids + digest["video_ids"], sections)
+        return join_sections(sections)
+    
+    async def astream_prompt(self, prompt: str, metrics: Optional[Dict[str, Any]] = None,
+                             use_cache: bool = True, started: Optional[float] = None,
+                             max_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        """流式生成单个提示的响应；命中响应缓存时通过同一接口回放，不调用 LLM
+
+        max_tokens 限制本次调用的输出 token 数（分节模式的每节预算）。
+        """
+        started = started or time.perf_counter()
+        key = None
+        if self.llm_cache is not None and use_cache:
+            key = cache_key(self.model_name, getattr(self.llm, "temperature", None), prompt,
+                            max_tokens=max_tokens or getattr(self.llm, "max_tokens", None))
+            cached = self.llm_cache.get(key)
+            if cached is not None:
+                first_token_at = time.perf_counter()
+                for i in range(0, len(cached), REPLAY_CHUNK_CHARS):
+                    yield cached[i:i + REPLAY_CHUNK_CHARS]
+                if metrics is not None:
+                    metrics.update(stream_metrics(started, first_token_at, time.perf_counter(), 0,
+                                                  {"input_tokens": 0, "output_tokens": 0}))
+                    metrics["llm_cache"] = "hit"
+                return
+        
+        first_token_at = None
+        chunks = 0
+        usage = None
+        parts = []
+        with tracer.span("llm.stream", model=self.model_name) as span:
+            waited = time.perf_counter()
+            async with self.llm_semaphore:
+                span.set_attribute("queue_wait_s", round(time.perf_counter() - waited, 6))
+                llm = self.llm.bind(max_tokens=max_tokens) if max_tokens else self.llm
+                async for chunk in llm.astream(prompt):
+                    if chunk.usage_metadata:
+                        usage = chunk.usage_metadata
+                    if not chunk.content:
+                        continue
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        span.set_attribute("ttft_s", round(first_token_at - waited, 6))
+                    chunks += 1
+                    parts.append(chunk.content)
+                    yield chunk.content
+            record_usage(span, self.model_name, usage)
+        
+        # 只缓存完整生成的响应
+        if key is not None and parts:
+            self.llm_cache.put(key, self.model_name, "".join(parts))
+        if metrics is not None:
+            metrics.update(stream_metrics(started, first_token_at, time.perf_counter(), chunks, usage))
+            if self.llm_cache is not None:
+                metrics["llm_cache"] = "miss" if use_cache else "bypass"
+    
+    def _format_papers(self, domain: str, papers: List[PaperInfo],
+                       notes: Optional[Dict[str, str]] = None,
+                       packing: Optional[Dict[str, Any]] = None,
+                       merged: Optional[List[str]] = None) -> str:
+        """按相关度排序并在 token 预算内格式化论文信息；合并综述放在逐篇论文之后"""
+        if not papers and not merged:
             return "暂无最新论文数据"
         
-        formatted_papers = []
-        for i, paper in enumerate(papers[:8], 1):
-            formatted_paper = f"""
+        ranked = self._rank_papers(domain, papers)
+        if notes is not None:
+            render = lambda i, paper: self._format_paper_note(i, paper, notes.get(paper.arxiv_id, ""))
+        else:
+            render = self._format_paper
+        formatted_papers, used = pack(ranked, render, self.paper_token_budget, self.model_name)
+        if packing is not None:
+            packing.update(papers_in=len(papers), papers_used=len(formatted_papers))
+        if merged:
+            summaries, merged_tokens = pack(merged, lambda i, text: f"- {text}",
+                                            self.paper_token_budget - used, self.model_name)
+            if summaries:
+                formatted_papers.append("\n其他相关论文（合并笔记）：\n" + "\n".join(summaries))
+                used += merged_tokens
+            if packing is not None:
+                packing["summaries_used"] = len(summaries)
+        if packing is not None:
+            packing["paper_tokens"] = used
+        
+        return '\n'.join(formatted_papers)
+    
+    def _rank_papers(self, domain: str, papers: List[PaperInfo]) -> List[PaperInfo]:
+        """按与领域的相关度排序论文（标题重复一次以提高其权重）"""
+        return rank(domain, papers, lambda paper: f"{paper.title} {paper.title} {paper.summary}")
+    
+    def _format_paper(self, i: int, paper: PaperInfo) -> str:
+        """格式化单篇论文"""
+        return f"""
 {i}. **{paper.title}**
    - 作者：{', '.join(paper.authors[:3])}{'等' if len(paper.authors) > 3 else ''}
    - 发布时间：{paper.published}
    - 摘要：{paper.summary}
    - ArXiv ID：{paper.arxiv_id}
             """
-            formatted_papers.append(formatted_paper)
-        
-        return '\n'.join(formatted_papers)
     
-    def _format_videos(self, videos: List[VideoInfo]) -> str:
-        """格式化视频信息"""
+    def _format_paper_note(self, i: int, paper: PaperInfo, note: str) -> str:
+        """reduce 阶段：用浓缩笔记格式化单篇论文"""
+        return (
+            f"{i}. **{paper.title}**（{', '.join(paper.authors[:3])}{'等' if len(paper.authors) > 3 else ''}，"
+            f"{paper.published}，ArXiv ID：{paper.arxiv_id}）\n   - 笔记：{note}"
+        )
+    
+    def _format_videos(self, domain: str, videos: List[VideoInfo],
+                       packing: Optional[Dict[str, Any]] = None) -> str:
+        """按相关度排序并在 token 预算内格式化视频信息"""
         if not videos:
             return "暂无相关视频推荐"
         
-        formatted_videos = []
-        for i, video in enumerate(videos[:6], 1):
-            formatted_video = f"""
+        # 服务器端的学术关键词得分作为附加分
+        ranked = rank(
+            domain, videos,
+            lambda video: f"{video.title} {video.title} {video.description} {video.channel or ''}",
+            boost=lambda video: 0.1 * (video.score or 0.0),
+        )
+        formatted_videos, used = pack(ranked, self._format_video, self.video_token_budget, self.model_name)
+        if packing is not None:
+            packing.update(videos_in=len(videos), videos_used=len(formatted_videos), video_tokens=used)
+        
+        return '\n'.join(formatted_videos)
+    
+    def _format_video(self, i: int, video: VideoInfo) -> str:
+        """格式化单个视频"""
+        return f"""
 {i}. **{video.title}**
    - 链接：{video.url}
    - 频道：{video.channel or '未知'}
-   - 描述：{video.description[:150]}...
+   - 描述：{video.description}
             """
-            formatted_videos.append(formatted_video)
-        
-        return '\n'.join(formatted_videos)
+
+def record_usage(span: Any, model: str, usage: Optional[Dict[str, Any]]):
+    """把 token 用量写入 span 属性并累加到 token 计数器"""
+    if not usage or not tracer.enabled:
+        return
+    prompt_tokens = usage.get("input_tokens", 0)
+    completion_tokens = usage.get("output_tokens", 0)
+    span.set_attribute("prompt_tokens", prompt_tokens)
+    span.set_attribute("completion_tokens", completion_tokens)
+    tracer.add("research_llm_tokens_total", prompt_tokens, model=model, kind="prompt")
+    tracer.add("research_llm_tokens_total", completion_tokens, model=model, kind="completion")
+
+def stream_metrics(started: float, first_token_at: Optional[float], finished: float,
+                   chunks: int, usage: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """计算流式生成的延迟指标；没有用量信息时以分块数近似 token 数"""
+    output_tokens = (usage or {}).get("output_tokens")
+    if output_tokens is None:
+        output_tokens = chunks
+    decode_time = finished - (first_token_at or finished)
+    return {
+        "ttft_s": round(first_token_at - started, 3) if first_token_at else None,
+        "total_s": round(finished - started, 3),
+        "prompt_tokens": (usage or {}).get("input_tokens"),
+        "output_tokens": output_tokens,
+        "tokens_per_s": round(output_tokens / decode_time, 1) if decode_time > 0 else None,
+    }
@@ -1,53 +1,101 @@
-import json
-from typing import List, Dict, Any
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from utils.types import PaperInfo
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+from utils.dedup import dedupe_papers
+from utils.mcp_pool import MCPSessionPool, MCPToolError, ARXIV_SERVER
+from utils.resilience import CircuitBreaker, Deadline, deadline_from_config, failure_reason, retry
+from utils.tracing import tracer
+from utils.types import PAPER_FIELDS, PaperSearchResult, paper_search_adapter
+
+if TYPE_CHECKING:
+    from langchain_core.runnables import RunnableConfig
 
 class PaperRetrievalAgent:
     """论文检索智能体"""
     
-    def __init__(self):
+    def __init__(self, mcp_pool: Optional[MCPSessionPool] = None, max_papers: int = 50,
+                 categories: Optional[List[str]] = None, refresh: bool = False,
+                 attempts: int = 3, breaker: Optional[CircuitBreaker] = None):
         self.name = "Paper Retrieval Agent"
-        self.mcp_client = None
+        # 由 ResearchMultiAgentSystem 注入共享会话池；单独使用时按需创建
+        self.mcp_pool = mcp_pool
+        # 日期窗口由服务器端查询保证，max_papers 只是安全上限
+        self.max_papers = max_papers
+        self.categories = categories
+        # refresh=True 时服务器忽略缓存水位线，重新获取整个窗口
+        self.refresh = refresh
+        # 有界重试（带抖动的指数退避）；arXiv 持续失败时熔断，后续运行直接跳过
+        self.attempts = attempts
+        self.breaker = breaker or CircuitBreaker("arxiv")
+        # 为服务器留出返回部分结果的时间（秒）
+        self.deadline_margin = 1.0
     
     async def initialize_mcp(self):
-        """初始化 MCP 客户端"""
-        if not self.mcp_client:
-            self.mcp_client = MultiServerMCPClient({
-                "arxiv": {
-                    "command": "python",
-                    "args": ["mcp_servers/arxiv_server.py"],
-                    "transport": "stdio",
-                }
-            })
+        """初始化 MCP 会话池"""
+        if not self.mcp_pool:
+            self.mcp_pool = MCPSessionPool({"arxiv": ARXIV_SERVER})
+        await self.mcp_pool.start()
     
-    async def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        """处理论文检索请求"""
+    async def search(self, arguments: Dict[str, Any], deadline: Optional[Deadline] = None) -> PaperSearchResult:
+        """调用 search_recent_papers：有界重试、熔断，截止时间下推给服务器"""
+        deadline = deadline or Deadline()
+        
+        async def call() -> PaperSearchResult:
+            server_deadline = deadline.cap(margin=self.deadline_margin)
+            call_arguments = {"fields": PAPER_FIELDS, **arguments}
+            if server_deadline is not None:
+                call_arguments["deadline"] = server_deadline
+            papers_json = await self.mcp_pool.call_tool("arxiv", "search_recent_papers", call_arguments)
+            if papers_json.startswith("Error"):
+                raise MCPToolError(papers_json)
+            # 解析论文数据：在 MCP 边界一次完成解析和校验，之后不再重复校验
+            with tracer.span("mcp.decode", tool="search_recent_papers"):
+                return paper_search_adapter.validate_json(papers_json)
+        
+        return await retry(call, self.attempts, deadline=deadline, breaker=self.breaker)
+    
+    async def process(self, state: Dict[str, Any], config: Optional["RunnableConfig"] = None) -> Dict[str, Any]:
+        """处理论文检索请求
+
+        config["configurable"]["retrieval_deadline"]（monotonic 时间戳）为检索截止时间：
+        服务器在截止前返回已获取的部分，超时或熔断时返回空结果并在消息中标记 partial。
+        """
+        deadline = deadline_from_config(config)
         try:
             await self.initialize_mcp()
-            tools = await self.mcp_client.get_tools()
             
             # 使用字典语法访问状态
             domain = state.get("domain", "")
             days = state.get("days", 7)
             
-            # 搜索最近的论文
-            search_tool = None
-            for tool in tools:
-                if tool.name == "search_recent_papers":
-                    search_tool = tool
-                    break
+            # 论文已由调用方提供（watch 模式按订阅从共享的分类订阅中路由），不再单独检索
+            if state.get("papers"):
+                return {
+                    "papers": [],
+                    "messages": [{
+                        "agent": self.name,
+                        "action": "routed_papers",
+                        "count": len(state["papers"]),
+                        "domain": domain
+                    }]
+                }
             
-            if search_tool:
-                papers_json = await search_tool.ainvoke({
+            # 搜索最近的论文
+            if self.mcp_pool.has_tool("arxiv", "search_recent_papers"):
+                arguments = {
                     "domain": domain,
-                    "max_results": 10,
+                    "max_results": self.max_papers,
                     "days": days
-                })
+                }
+                if self.categories:
+                    arguments["categories"] = self.categories
+                if self.refresh:
+                    arguments["refresh"] = True
                 
-                # 解析论文数据
-                papers_data = json.loads(papers_json)
-                papers = [PaperInfo(**paper) for paper in papers_data]
+                papers_data = await self.search(arguments, deadline)
+                papers = papers_data["papers"]
+                meta = papers_data.get("meta", {})
+                # 同一论文的多个版本只保留最新版，并去掉标题和摘要近似重复的论文
+                retrieved = len(papers)
+                papers = dedupe_papers(papers)
                 
                 # 返回状态更新
                 return {
@@ -56,7 +104,10 @@ class PaperRetrievalAgent:
                         "agent": self.name,
                         "action": "retrieved_papers",
                         "count": len(papers),
-                        "domain": domain
+                        "domain": domain,
+                        "duplicates_removed": retrieved - len(papers),
+                        "partial": bool(meta.get("partial", False)),
+                        "search": meta
                     }]
                 }
             
@@ -67,6 +118,9 @@ class PaperRetrievalAgent:
                 "papers": [],
                 "messages": [{
                     "agent": self.name,
-                    "error": f"Failed to retrieve papers: {str(e)}"
+                    "error": f"Failed to retrieve papers: {str(e) or type(e).__name__}",
+                    "partial": True,
+                    "reason": failure_reason(e),
+                    "circuit": self.breaker.state
                 }]
             }
@@ -1,62 +1,82 @@
-import json
-from typing import List, Dict, Any
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from utils.types import VideoInfo
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+from utils.mcp_pool import MCPSessionPool, MCPToolError, YOUTUBE_SERVER
+from utils.resilience import CircuitBreaker, deadline_from_config, failure_reason, retry
+from utils.tracing import tracer
+from utils.types import VIDEO_FIELDS, VideoSearchResult, video_search_adapter
+
+if TYPE_CHECKING:
+    from langchain_core.runnables import RunnableConfig
 
 class ResearchVideoAgent:
     """研究视频智能体"""
     
-    def __init__(self):
+    def __init__(self, mcp_pool: Optional[MCPSessionPool] = None, num_queries: int = 3,
+                 per_query_results: int = 10, query_timeout: float = 10.0, deadline: float = 20.0,
+                 attempts: int = 2, breaker: Optional[CircuitBreaker] = None):
         self.name = "Research Video Agent"
-        self.mcp_client = None
+        # 由 ResearchMultiAgentSystem 注入共享会话池；单独使用时按需创建
+        self.mcp_pool = mcp_pool
+        # 子查询数量、每个子查询的深度与超时独立于最终的结果上限
+        self.num_queries = num_queries
+        self.per_query_results = per_query_results
+        self.query_timeout = query_timeout
+        self.deadline = deadline
+        # 有界重试（带抖动的指数退避）；YouTube 持续失败时熔断，后续运行直接跳过
+        self.attempts = attempts
+        self.breaker = breaker or CircuitBreaker("youtube")
+        # 为服务器留出返回部分结果的时间（秒）
+        self.deadline_margin = 1.0
     
     async def initialize_mcp(self):
-        """初始化 MCP 客户端"""
-        if not self.mcp_client:
-            self.mcp_client = MultiServerMCPClient({
-                "youtube": {
-                    "command": "python",
-                    "args": ["mcp_servers/youtube_server.py"],
-                    "transport": "stdio",
-                }
-            })
+        """初始化 MCP 会话池"""
+        if not self.mcp_pool:
+            self.mcp_pool = MCPSessionPool({"youtube": YOUTUBE_SERVER})
+        await self.mcp_pool.start()
     
-    async def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        """处理视频检索请求"""
+    async def process(self, state: Dict[str, Any], config: Optional["RunnableConfig"] = None) -> Dict[str, Any]:
+        """处理视频检索请求
+
+        服务器端 deadline 取自身上限与检索截止时间（config["configurable"]["retrieval_deadline"]）
+        中较早的一个；超时或熔断时返回空结果并在消息中标记 partial。
+        """
+        deadline = deadline_from_config(config)
         try:
             await self.initialize_mcp()
-            tools = await self.mcp_client.get_tools()
             
             # 使用字典语法访问状态
             domain = state.get("domain", "")
             
             # 搜索研究视频
-            search_tool = None
-            filter_tool = None
-            
-            for tool in tools:
-                if tool.name == "search_research_videos":
-                    search_tool = tool
-                elif tool.name == "filter_academic_videos":
-                    filter_tool = tool
-            
-            if search_tool:
-                videos_json = await search_tool.ainvoke({
-                    "domain": domain,
-                    "max_results": 15
-                })
-                
-                # 过滤学术视频
-                if filter_tool:
-                    filtered_videos_json = await filter_tool.ainvoke({
-                        "videos_json": videos_json,
-                        "keywords": domain
+            if self.mcp_pool.has_tool("youtube", "search_research_videos"):
+                async def search() -> VideoSearchResult:
+                    videos_json = await self.mcp_pool.call_tool("youtube", "search_research_videos", {
+                        "domain": domain,
+                        "max_results": 15,
+                        "num_queries": self.num_queries,
+                        "per_query_results": self.per_query_results,
+                        "query_timeout": self.query_timeout,
+                        "deadline": deadline.cap(self.deadline, margin=self.deadline_margin),
+                        # 服务器端完成学术过滤和打分，无需第二次往返
+                        "filter": True,
+                        "keywords": domain,
+                        "fields": VIDEO_FIELDS,
                     })
-                    videos_data = json.loads(filtered_videos_json)
-                else:
-                    videos_data = json.loads(videos_json)
+                    if videos_json.startswith("Error"):
+                        raise MCPToolError(videos_json)
+                    # 在 MCP 边界一次完成解析和校验，之后不再重复校验
+                    with tracer.span("mcp.decode", tool="search_research_videos"):
+                        result = video_search_adapter.validate_json(videos_json)
+                    queries = result["meta"].get("queries", [])
+                    if queries and all(q.get("error") and not q.get("timed_out") for q in queries):
+                        # 所有子查询都出错（而非被截止时间截断）：视为数据源故障（重试并计入熔断器）
+                        raise MCPToolError(f"all queries failed: {queries[0]['error']}")
+                    return result
+                
+                videos_data = await retry(search, self.attempts, deadline=deadline, breaker=self.breaker)
+                meta = videos_data["meta"]
                 
-                videos = [VideoInfo(**video) for video in videos_data[:10]]
+                # 条数上限由服务器端 max_results 控制，提示长度由内容整合阶段的 token 预算控制
+                videos = videos_data["videos"]
                 
                 # 返回状态更新
                 return {
@@ -65,7 +85,10 @@ class ResearchVideoAgent:
                         "agent": self.name,
                         "action": "retrieved_videos",
                         "count": len(videos),
-                        "domain": domain
+                        "domain": domain,
+                        "partial": meta.get("partial", False),
+                        "duplicates_removed": meta.get("duplicates", 0),
+                        "queries": meta.get("queries", [])
                     }]
                 }
             
@@ -76,6 +99,9 @@ class ResearchVideoAgent:
                 "videos": [],
                 "messages": [{
                     "agent": self.name,
-                    "error": f"Failed to retrieve videos: {str(e)}"
+                    "error": f"Failed to retrieve videos: {str(e) or type(e).__name__}",
+                    "partial": True,
+                    "reason": failure_reason(e),
+                    "circuit": self.breaker.state
                 }]
             }
@@ -0,0 +1,47 @@
+import itertools
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Union
+from mcp.server.fastmcp import FastMCP
+from mcp.types import CallToolResult
+from utils.wire import parse_fields, project, tool_result
+from benchmarks.fixtures import BENCH_PAPERS, sentence, simulate_latency
+
+mcp = FastMCP("Fake ArXiv Server", log_level="WARNING")
+
+# 每次调用（跨会话进程）返回新的论文 id，避免论文笔记缓存掩盖 map 阶段的开销
+_calls = itertools.count(1)
+
+
+@mcp.tool(structured_output=False)
+async def search_recent_papers(domain: str, max_results: Optional[int] = None, days: int = 7,
+                               categories: Optional[List[str]] = None, page_size: int = 100,
+                               refresh: bool = False, fields: Optional[List[str]] = None,
+                               structured: bool = False, deadline: Optional[float] = None) -> Union[str, CallToolResult]:
+    """与 arxiv_server 相同接口的替身：返回 BENCH_PAPERS 篇合成论文"""
+    completed = await simulate_latency(deadline)
+    call = next(_calls)
+    now = datetime.now(timezone.utc)
+    count = min(BENCH_PAPERS, max_results or BENCH_PAPERS) if completed else 0
+    papers = []
+    for i in range(count):
+        arxiv_id = f"bench-{os.getpid()}-{call}.{i:05d}v1"
+        papers.append({
+            "title": f"{domain} {sentence(8)}",
+            "authors": [f"Author {i}", f"Author {i + 1}"],
+            "summary": sentence(80),
+            "published": (now - timedelta(hours=i)).strftime("%Y-%m-%d"),
+            "arxiv_id": arxiv_id,
+            "url": f"http://arxiv.org/abs/{arxiv_id}",
+        })
+    return tool_result({
+        "papers": project(papers, parse_fields(fields)),
+        "meta": {"query": domain, "requests": 1, "fetched": count, "kept": count,
+                 "cached": 0, "incremental": False, "partial": not completed},
+    }, structured)
+
+
+if __name__ == "__main__":
+    print(f"Fake ArXiv server: {BENCH_PAPERS} papers per call", file=sys.stderr)
+    mcp.run()
@@ -0,0 +1,74 @@
+import asyncio
+import math
+from typing import Any, AsyncIterator, List, Optional
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from benchmarks.fixtures import sentence
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """按设定速率流式输出 token 的假聊天模型
+
+    首个 token 在 ttft_s 秒后到达，之后每秒输出 tokens_per_s 个 token；
+    最后一个分块携带 token 用量，与 ChatOpenAI(stream_usage=True) 的行为一致。
+    """
+
+    model_name: str = "fake-streaming"
+    temperature: float = 0.7
+    ttft_s: float = 0.3
+    tokens_per_s: float = 200.0
+    output_tokens: int = 600
+    # 非流式调用（map 阶段的论文浓缩）输出的 token 数
+    invoke_tokens: int = 40
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    def _tokens(self, n: int) -> List[str]:
+        return [f"{word} " for word in sentence(n).split()]
+
+    @staticmethod
+    def _input_tokens(messages: List[BaseMessage]) -> int:
+        return sum(math.ceil(len(str(m.content)) / 4) for m in messages)
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        tokens = self._tokens(self.invoke_tokens)
+        message = AIMessage(
+            content="".join(tokens).strip(),
+            usage_metadata={
+                "input_tokens": self._input_tokens(messages),
+                "output_tokens": len(tokens),
+                "total_tokens": self._input_tokens(messages) + len(tokens),
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        return self._result(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.ttft_s + self.invoke_tokens / self.tokens_per_s)
+        return self._result(messages)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.ttft_s)
+        # 与真实模型一样遵守调用时的 max_tokens 上限
+        tokens = self._tokens(min(self.output_tokens, kwargs.get("max_tokens") or self.output_tokens))
+        interval = 1 / self.tokens_per_s
+        for token in tokens:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+            await asyncio.sleep(interval)
+        input_tokens = self._input_tokens(messages)
+        yield ChatGenerationChunk(message=AIMessageChunk(
+            content="",
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": len(tokens),
+                "total_tokens": input_tokens + len(tokens),
+            },
+        ))
@@ -0,0 +1,38 @@
+import sys
+from typing import List, Optional, Union
+from mcp.server.fastmcp import FastMCP
+from mcp.types import CallToolResult
+from utils.wire import parse_fields, project, tool_result
+from benchmarks.fixtures import BENCH_VIDEOS, sentence, simulate_latency
+
+mcp = FastMCP("Fake YouTube Server", log_level="WARNING")
+
+
+@mcp.tool(structured_output=False)
+async def search_research_videos(domain: str, max_results: int = 10, num_queries: int = 3,
+                                 per_query_results: int = 10, query_timeout: float = 10,
+                                 deadline: float = 20, filter: bool = False, keywords: str = "",
+                                 min_score: float = 0.0, fields: Optional[List[str]] = None,
+                                 structured: bool = False) -> Union[str, CallToolResult]:
+    """与 youtube_server 相同接口的替身：返回 BENCH_VIDEOS 个合成视频"""
+    completed = await simulate_latency(deadline)
+    videos = [] if not completed else [
+        {
+            "title": f"{domain} lecture {i}: {sentence(6)}",
+            "url": f"https://www.youtube.com/watch?v=bench{i:06d}",
+            "description": sentence(40),
+            "published": "1 day ago",
+            "channel": f"Channel {i % 5}",
+            "score": float(BENCH_VIDEOS - i),
+        }
+        for i in range(min(BENCH_VIDEOS, max_results))
+    ]
+    return tool_result({
+        "videos": project(videos, parse_fields(fields)),
+        "meta": {"queries": [], "partial": not completed, "filtered": filter, "duplicates": 0},
+    }, structured)
+
+
+if __name__ == "__main__":
+    print(f"Fake YouTube server: {BENCH_VIDEOS} videos per call", file=sys.stderr)
+    mcp.run()
@@ -0,0 +1,33 @@
+import asyncio
+import os
+import random
+from typing import Optional
+
+# 假服务器的行为由环境变量控制（由 run_benchmark.py 传给子进程）
+BENCH_PAPERS = int(os.getenv("BENCH_PAPERS", "50"))
+BENCH_VIDEOS = int(os.getenv("BENCH_VIDEOS", "15"))
+BENCH_LATENCY_MS = float(os.getenv("BENCH_LATENCY_MS", "200"))
+BENCH_JITTER_MS = float(os.getenv("BENCH_JITTER_MS", "50"))
+
+WORDS = (
+    "learning model neural network graph diffusion transformer attention robust efficient "
+    "benchmark dataset training inference optimization language vision reinforcement policy "
+    "representation generalization scaling sparse federated causal contrastive generative"
+).split()
+
+_rng = random.Random(20240601)
+
+
+def sentence(n: int) -> str:
+    return " ".join(_rng.choice(WORDS) for _ in range(n))
+
+
+async def simulate_latency(deadline: Optional[float] = None) -> bool:
+    """模拟上游延迟：基础延迟 ± 均匀抖动；超过 deadline（秒）时只等到 deadline 并返回 False"""
+    jitter = _rng.uniform(-BENCH_JITTER_MS, BENCH_JITTER_MS)
+    delay = max(0.0, BENCH_LATENCY_MS + jitter) / 1000
+    if deadline is not None and delay > deadline:
+        await asyncio.sleep(max(0.0, deadline))
+        return False
+    await asyncio.sleep(delay)
+    return True
@@ -0,0 +1,116 @@
+"""冷启动导入时间检查
+
+在新的解释器中用 `python -X importtime` 导入各入口模块，取多次运行的中位数与预算比较，
+并检查不应在导入时加载的重量级模块（langgraph、langchain_openai、arxiv 等）。
+超出预算或提前加载了禁止的模块时以状态码 1 退出，可直接用于 CI。
+
+用法：
+    python -m benchmarks.import_budget --repeat 5
+    python -m benchmarks.import_budget --budget main=400 --output imports.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 入口模块 -> (预算毫秒, 导入时不得加载的模块)
+# 预算留有余量；服务器的下限是 mcp 本身的导入（约 0.7 秒）
+TARGETS: Dict[str, Tuple[float, Tuple[str, ...]]] = {
+    "main": (600, ("langgraph", "langchain_openai", "openai", "mcp", "langchain_core.prompts")),
+    "service": (1200, ("langgraph", "langchain_openai", "openai", "mcp")),
+    "mcp_servers.arxiv_server": (1200, ("arxiv", "feedparser", "langchain", "langchain_core")),
+    "mcp_servers.youtube_server": (1200, ("youtube_search", "langchain", "langchain_core")),
+}
+
+
+def import_profile(module: str) -> Tuple[float, Set[str]]:
+    """在新进程中导入模块，返回 (累计导入耗时毫秒, 加载的模块集合)"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败：{completed.stderr.strip().splitlines()[-1:]}")
+    cumulative = None
+    loaded = set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line.split("|", 2)
+        if not cumulative_us.strip().isdigit():
+            continue  # 表头
+        loaded.add(name.strip())
+        if name.strip() == module:
+            cumulative = int(cumulative_us) / 1000
+    if cumulative is None:
+        raise RuntimeError(f"未找到 {module} 的导入时间")
+    return cumulative, loaded
+
+
+def forbidden_loaded(loaded: Set[str], forbidden: Tuple[str, ...]) -> List[str]:
+    return sorted(
+        prefix for prefix in forbidden
+        if any(name == prefix or name.startswith(prefix + ".") for name in loaded)
+    )
+
+
+def check(targets: Dict[str, Tuple[float, Tuple[str, ...]]], repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    for module, (budget_ms, forbidden) in targets.items():
+        samples = []
+        loaded: Set[str] = set()
+        for _ in range(repeat):
+            elapsed, loaded = import_profile(module)
+            samples.append(elapsed)
+        median = statistics.median(samples)
+        violations = forbidden_loaded(loaded, forbidden)
+        row = {
+            "module": module,
+            "median_ms": round(median, 1),
+            "min_ms": round(min(samples), 1),
+            "budget_ms": budget_ms,
+            "modules_loaded": len(loaded),
+            "forbidden_loaded": violations,
+            "ok": median <= budget_ms and not violations,
+        }
+        results.append(row)
+        mark = "✅" if row["ok"] else "❌"
+        extra = f"，提前加载：{', '.join(violations)}" if violations else ""
+        print(f"{mark} {module}: {row['median_ms']} ms（预算 {budget_ms} ms，{len(loaded)} 个模块）{extra}")
+    return results
+
+
+def parse_budgets(values: Optional[List[str]]) -> Dict[str, Tuple[float, Tuple[str, ...]]]:
+    targets = dict(TARGETS)
+    for value in values or []:
+        module, _, budget = value.partition("=")
+        if not budget:
+            raise SystemExit(f"预算格式应为 模块=毫秒：{value}")
+        forbidden = targets.get(module, (0, ()))[1]
+        targets[module] = (float(budget), forbidden)
+    return targets
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="冷启动导入时间检查")
+    parser.add_argument("--repeat", type=int, default=5, help="每个模块导入的次数（取中位数）")
+    parser.add_argument("--budget", nargs="+", metavar="MODULE=MS", help="覆盖或新增预算，如 main=400")
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    args = parser.parse_args(argv)
+    results = check(parse_budgets(args.budget), args.repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已保存到：{args.output}")
+    return 0 if all(row["ok"] for row in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
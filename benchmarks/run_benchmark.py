@@ -0,0 +1,286 @@
+"""离线端到端基准测试
+
+用本地假 MCP 服务器（可配置结果数量、延迟和抖动）和按设定速率流式输出的假模型
+运行真实的 LangGraph 工作流，统计各节点和端到端延迟的 p50/p95、并发吞吐量、
+MCP 启动耗时和峰值内存，结果写入 JSON，便于跨提交比较。
+
+用法：
+    python -m benchmarks.run_benchmark --runs 10 --concurrency 1 4 --output bench.json
+    python -m benchmarks.run_benchmark --compare bench.json
+"""
+import argparse
+import asyncio
+import contextlib
+import inspect
+import io
+import json
+import math
+import os
+import resource
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+from langchain_core.runnables import RunnableConfig
+
+# 论文笔记缓存放在内存中，避免读写项目缓存目录
+os.environ.setdefault("PAPER_NOTES_CACHE_PATH", ":memory:")
+# 基准测试完全离线：token 数用估算，不下载 tiktoken 词表
+os.environ.setdefault("RESEARCH_TIKTOKEN", "0")
+
+from main import ResearchMultiAgentSystem
+from utils.mcp_pool import PROJECT_ROOT
+from benchmarks.fake_llm import FakeStreamingChatModel
+
+NODES = ("paper_retrieval", "video_retrieval", "content_integration")
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """最近秩百分位数"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+    return round(ordered[index], 4)
+
+
+def summarize(values: Sequence[float]) -> Dict[str, Any]:
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "mean": round(sum(values) / len(values), 4) if values else None,
+        "max": round(max(values), 4) if values else None,
+    }
+
+
+def fake_servers(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """假服务器配置；子进程默认不继承环境变量，需要显式传入"""
+    env = dict(os.environ)
+    env.update({
+        "BENCH_PAPERS": str(args.papers),
+        "BENCH_VIDEOS": str(args.videos),
+        "BENCH_LATENCY_MS": str(args.latency_ms),
+        "BENCH_JITTER_MS": str(args.jitter_ms),
+    })
+    return {
+        name: {"command": sys.executable, "args": ["-m", f"benchmarks.{module}"], "env": env}
+        for name, module in (("arxiv", "fake_arxiv_server"), ("youtube", "fake_youtube_server"))
+    }
+
+
+def instrument(system: ResearchMultiAgentSystem, timings: Dict[str, List[float]]):
+    """给每个节点套上计时包装并重建工作流"""
+    def timed(name: str, func):
+        takes_config = "config" in inspect.signature(func).parameters
+
+        async def node(state: Dict[str, Any], config: Optional[RunnableConfig] = None):
+            started = time.perf_counter()
+            try:
+                return await (func(state, config) if takes_config else func(state))
+            finally:
+                timings[name].append(time.perf_counter() - started)
+        return node
+
+    system.paper_agent.process = timed("paper_retrieval", system.paper_agent.process)
+    system.video_agent.process = timed("video_retrieval", system.video_agent.process)
+    system.blog_agent.process = timed("content_integration", system.blog_agent.process)
+    system.workflow = system._build_workflow()
+
+
+async def run_level(system: ResearchMultiAgentSystem, runs: int, concurrency: int,
+                    days: int) -> Dict[str, Any]:
+    """以给定并发数运行 runs 次工作流"""
+    timings: Dict[str, List[float]] = defaultdict(list)
+    instrument(system, timings)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    ttfts: List[float] = []
+    errors = 0
+
+    async def run_one(i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            results = await system.run_research(f"benchmark domain {i}", days)
+            latencies.append(time.perf_counter() - started)
+        messages = results.get("messages", [])
+        if "error" in results or any("error" in m for m in messages) or not results.get("blog_content"):
+            errors += 1
+        for message in messages:
+            ttft = message.get("metrics", {}).get("ttft_s")
+            if ttft is not None:
+                ttfts.append(ttft)
+
+    started = time.perf_counter()
+    # 工作流本身的打印输出不计入基准结果
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(*(run_one(i) for i in range(runs)))
+    wall = time.perf_counter() - started
+    # 恢复原始节点，避免下一轮重复包装
+    for agent in (system.paper_agent, system.video_agent, system.blog_agent):
+        del agent.process
+    return {
+        "concurrency": concurrency,
+        "runs": runs,
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(runs / wall, 3),
+        "end_to_end": summarize(latencies),
+        "ttft": summarize(ttfts),
+        "nodes": {name: summarize(timings[name]) for name in NODES},
+    }
+
+
+def peak_rss_mb() -> float:
+    """本进程的峰值常驻内存；ru_maxrss 在 Linux 上是 KB，macOS 上是字节"""
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor, 1)
+
+
+def server_peak_rss_mb() -> Optional[Dict[str, float]]:
+    """存活的 MCP 服务器子进程的峰值常驻内存（读取 /proc，仅 Linux）
+
+    fork 出的子进程会继承父进程的 ru_maxrss，RUSAGE_CHILDREN 因而不可靠。
+    """
+    task_dir = f"/proc/{os.getpid()}/task"
+    if not os.path.isdir(task_dir):
+        return None
+    peaks = {}
+    for tid in os.listdir(task_dir):
+        try:
+            with open(f"{task_dir}/{tid}/children") as f:
+                children = f.read().split()
+        except OSError:
+            continue
+        for pid in children:
+            try:
+                with open(f"/proc/{pid}/status") as f:
+                    for line in f:
+                        if line.startswith("VmHWM:"):
+                            peaks[pid] = round(int(line.split()[1]) / 1024, 1)
+            except OSError:
+                continue
+    return peaks
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    llm = FakeStreamingChatModel(
+        ttft_s=args.ttft_ms / 1000,
+        tokens_per_s=args.tokens_per_s,
+        output_tokens=args.output_tokens,
+    )
+    system = ResearchMultiAgentSystem(
+        sessions_per_server=args.sessions,
+        health_check_interval=None,
+        llm_concurrency=args.llm_concurrency,
+        map_reduce_threshold=args.map_reduce_threshold,
+        llm_cache=False,
+        servers=fake_servers(args),
+        llm=llm,
+        sectioned=args.sectioned,
+    )
+    started = time.perf_counter()
+    await system.start()
+    startup = time.perf_counter() - started
+
+    try:
+        # 预热一次（导入、连接、编码器初始化等一次性开销）
+        with contextlib.redirect_stdout(io.StringIO()):
+            await system.run_research("warmup", args.days)
+        levels = []
+        for concurrency in args.concurrency:
+            level = await run_level(system, args.runs, concurrency, args.days)
+            levels.append(level)
+            print(
+                f"并发 {concurrency}：端到端 p50 {level['end_to_end']['p50']} 秒，"
+                f"p95 {level['end_to_end']['p95']} 秒，吞吐 {level['throughput_rps']} 次/秒，"
+                f"失败 {level['errors']}"
+            )
+        servers_rss = server_peak_rss_mb()
+    finally:
+        await system.aclose()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "mcp_startup_s": round(startup, 3),
+        "levels": levels,
+        "peak_rss_mb": {
+            "self": peak_rss_mb(),
+            "servers": servers_rss,
+            "servers_total": round(sum(servers_rss.values()), 1) if servers_rss else None,
+        },
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]):
+    """打印与基线结果相比的 p50/p95 变化"""
+    print(f"\n与基线 {baseline.get('commit')} 比较（正数表示变慢）：")
+    base_levels = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    for level in current["levels"]:
+        base = base_levels.get(level["concurrency"])
+        if base is None:
+            continue
+        for name, stats in [("end_to_end", level["end_to_end"]), *level["nodes"].items()]:
+            base_stats = base["end_to_end"] if name == "end_to_end" else base["nodes"].get(name, {})
+            deltas = []
+            for q in ("p50", "p95"):
+                if stats.get(q) and base_stats.get(q):
+                    deltas.append(f"{q} {(stats[q] / base_stats[q] - 1) * 100:+.1f}%")
+            print(f"  并发 {level['concurrency']} {name}：{', '.join(deltas) or '无数据'}")
+    startup, base_startup = current["mcp_startup_s"], baseline.get("mcp_startup_s")
+    if base_startup:
+        print(f"  MCP 启动：{(startup / base_startup - 1) * 100:+.1f}%")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="离线端到端基准测试")
+    parser.add_argument("--runs", type=int, default=10, help="每个并发级别运行的次数")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4], help="并发级别")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--papers", type=int, default=50, help="假 arXiv 服务器每次返回的论文数")
+    parser.add_argument("--videos", type=int, default=15, help="假 YouTube 服务器每次返回的视频数")
+    parser.add_argument("--latency-ms", type=float, default=200, help="假服务器的基础延迟")
+    parser.add_argument("--jitter-ms", type=float, default=50, help="假服务器的延迟抖动（±）")
+    parser.add_argument("--ttft-ms", type=float, default=100, help="假模型的首 token 延迟")
+    parser.add_argument("--tokens-per-s", type=float, default=500, help="假模型的输出速率")
+    parser.add_argument("--output-tokens", type=int, default=400, help="假模型每次流式输出的 token 数")
+    parser.add_argument("--sessions", type=int, default=2, help="每个 MCP 服务器的会话数")
+    parser.add_argument("--llm-concurrency", type=int, default=4)
+    parser.add_argument("--map-reduce-threshold", type=int, default=8)
+    parser.add_argument("--sectioned", action="store_true", help="分节模式：大纲 + 并发生成各节")
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    parser.add_argument("--compare", help="用于比较的基线结果 JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    results = asyncio.run(run_benchmark(args))
+    print(f"MCP 启动：{results['mcp_startup_s']} 秒，峰值内存：{results['peak_rss_mb']} MB")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已保存到：{args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
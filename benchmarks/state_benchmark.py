@@ -0,0 +1,162 @@
+"""状态路径基准测试：校验、状态合并的 CPU 时间和峰值内存
+
+比较旧的数据路径（json.loads + 逐条构造模型 + 内容整合阶段再次检查/重建 + operator.add 合并）
+与当前路径（在 MCP 边界直接从 JSON 文本一次校验 + 不复制的合并），并在真实的
+LangGraph 状态图中测量包含数千条记录的状态的合并开销。
+
+用法：
+    python -m benchmarks.state_benchmark --sizes 1000 5000 20000 --output state.json
+"""
+import argparse
+import asyncio
+import json
+import operator
+import time
+import tracemalloc
+from typing import Annotated, Any, Callable, Dict, List, Optional
+
+from langgraph.graph import END, START, StateGraph
+from pydantic import BaseModel
+from typing_extensions import TypedDict
+
+from benchmarks.fixtures import sentence
+from utils.types import PaperInfo, ResearchState, VideoInfo, paper_search_adapter
+
+
+class LegacyPaperInfo(BaseModel):
+    """旧版（未冻结）论文模型"""
+    title: str
+    authors: List[str]
+    summary: str
+    published: str
+    arxiv_id: str
+    url: str
+
+
+class LegacyState(TypedDict):
+    """旧版状态：operator.add 合并"""
+    domain: str
+    days: int
+    papers: Annotated[List[Any], operator.add]
+    videos: Annotated[List[Any], operator.add]
+    blog_content: str
+    messages: Annotated[List[Dict[str, Any]], operator.add]
+
+
+def wire_payload(n: int) -> str:
+    papers = [
+        {
+            "title": sentence(10),
+            "authors": [f"Author {i}", f"Author {i + 1}", f"Author {i + 2}"],
+            "summary": sentence(80)[:500],
+            "published": "2024-06-01",
+            "arxiv_id": f"2406.{i:05d}v1",
+            "url": f"http://arxiv.org/abs/2406.{i:05d}v1",
+        }
+        for i in range(n)
+    ]
+    return json.dumps({"papers": papers, "meta": {}}, ensure_ascii=False, indent=2)
+
+
+def legacy_path(payload: str) -> List[Any]:
+    papers = [LegacyPaperInfo(**paper) for paper in json.loads(payload)["papers"]]
+    state_papers = operator.add([], papers)
+    # 内容整合阶段逐条检查并按需重建
+    rebuilt = []
+    for paper in state_papers:
+        rebuilt.append(LegacyPaperInfo(**paper) if isinstance(paper, dict) else paper)
+    return rebuilt
+
+
+def current_path(payload: str) -> List[Any]:
+    return paper_search_adapter.validate_json(payload)["papers"]
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """最小 CPU 时间（process_time）和一次运行的 tracemalloc 峰值内存"""
+    cpu = []
+    for _ in range(repeat):
+        started = time.process_time()
+        func()
+        cpu.append(time.process_time() - started)
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {"cpu_ms": round(min(cpu) * 1000, 2), "peak_mb": round(peak / 1024 / 1024, 2)}
+
+
+def build_graph(state_type: type, papers: List[Any], videos: List[Any]):
+    """与主工作流相同形状的图：两个检索节点并行，再汇合到整合节点"""
+    async def paper_node(state):
+        return {"papers": papers, "messages": [{"agent": "paper"}]}
+
+    async def video_node(state):
+        return {"videos": videos, "messages": [{"agent": "video"}]}
+
+    async def integrate_node(state):
+        return {"blog_content": f"{len(state['papers'])} papers", "messages": [{"agent": "blog"}]}
+
+    graph = StateGraph(state_type)
+    graph.add_node("paper_retrieval", paper_node)
+    graph.add_node("video_retrieval", video_node)
+    graph.add_node("content_integration", integrate_node)
+    graph.add_edge(START, "paper_retrieval")
+    graph.add_edge(START, "video_retrieval")
+    graph.add_edge("paper_retrieval", "content_integration")
+    graph.add_edge("video_retrieval", "content_integration")
+    graph.add_edge("content_integration", END)
+    return graph.compile()
+
+
+def graph_run(graph) -> Dict[str, Any]:
+    initial = {"domain": "bench", "days": 7, "papers": [], "videos": [], "blog_content": "", "messages": []}
+    return asyncio.run(graph.ainvoke(initial))
+
+
+def run(sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    for n in sizes:
+        payload = wire_payload(n)
+        papers = current_path(payload)
+        videos = [VideoInfo(title=sentence(6), url=f"https://youtu.be/v{i:010d}", description=sentence(30))
+                  for i in range(min(n, 200))]
+        legacy_graph = build_graph(LegacyState, legacy_path(payload), videos)
+        current_graph = build_graph(ResearchState, papers, videos)
+        row = {
+            "items": n,
+            "payload_kb": round(len(payload.encode("utf-8")) / 1024, 1),
+            "validate": {
+                "legacy": measure(lambda: legacy_path(payload), repeat),
+                "current": measure(lambda: current_path(payload), repeat),
+            },
+            "graph": {
+                "legacy": measure(lambda: graph_run(legacy_graph), repeat),
+                "current": measure(lambda: graph_run(current_graph), repeat),
+            },
+        }
+        results.append(row)
+        print(
+            f"{n} 条：校验 {row['validate']['legacy']['cpu_ms']} → {row['validate']['current']['cpu_ms']} ms，"
+            f"峰值 {row['validate']['legacy']['peak_mb']} → {row['validate']['current']['peak_mb']} MB；"
+            f"状态图 {row['graph']['legacy']['cpu_ms']} → {row['graph']['current']['cpu_ms']} ms"
+        )
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="状态路径基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    args = parser.parse_args(argv)
+    results = run(args.sizes, args.repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已保存到：{args.output}")
+
+
+if __name__ == "__main__":
+    main()
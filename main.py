@@ -1,41 +1,116 @@
+import argparse
 import asyncio
+import json
 import os
-from typing import Dict, Any
+import time
+import uuid
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Callable
 from dotenv import load_dotenv
-from langgraph.graph import StateGraph, END, START
-from utils.types import ResearchState  # 这现在是 TypedDict
+from utils.types import PaperInfo, ResearchState  # 这现在是 TypedDict
+from utils.mcp_pool import MCPSessionPool, ARXIV_SERVER, YOUTUBE_SERVER
+from utils.digest import DigestStore
+from utils.llm_cache import SQLiteLLMCache
+from utils.note_cache import PaperNoteCache
+from utils.ranking import load_tokenizer
+from utils.streaming import TokenStream
+from utils.tracing import configure_tracing, trace_node, tracer
 from agents.paper_agent import PaperRetrievalAgent
 from agents.video_agent import ResearchVideoAgent
 from agents.blog_agent import ContentIntegrationAgent
 
+if TYPE_CHECKING:
+    from langgraph.graph.state import CompiledStateGraph
+
 # 加载环境变量
 load_dotenv()
 
 class ResearchMultiAgentSystem:
     """研究多智能体系统"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        sessions_per_server: int = 2,
+        health_check_interval: float = 60.0,
+        llm_concurrency: int = 4,
+        paper_cache: bool = True,
+        refresh_papers: bool = False,
+        map_reduce_threshold: int = 8,
+        map_concurrency: int = 8,
+        llm_cache: bool = True,
+        servers: Optional[Dict[str, Dict[str, Any]]] = None,
+        llm: Optional[Any] = None,
+        checkpoint: bool = False,
+        checkpoint_path: Optional[str] = None,
+        digest: bool = False,
+        retrieval_timeout: Optional[float] = 45.0,
+        sectioned: bool = False,
+        max_papers: int = 50,
+    ):
+        # servers / llm 可替换为替身（基准测试使用本地假服务器和假模型）
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
-        if not self.openai_api_key:
+        if not self.openai_api_key and llm is None:
             raise ValueError("请设置 OPENAI_API_KEY 环境变量")
         
+        # 长连接 MCP 会话池：服务器只启动一次，所有运行共享
+        if servers is None:
+            arxiv_server = dict(ARXIV_SERVER)
+            if not paper_cache:
+                arxiv_server["args"] = ARXIV_SERVER["args"] + ["--no-cache"]
+            servers = {"arxiv": arxiv_server, "youtube": YOUTUBE_SERVER}
+        self.mcp_pool = MCPSessionPool(
+            servers,
+            sessions_per_server=sessions_per_server,
+            health_check_interval=health_check_interval,
+        )
+        
         # 初始化智能体
-        self.paper_agent = PaperRetrievalAgent()
-        self.video_agent = ResearchVideoAgent()
-        self.blog_agent = ContentIntegrationAgent(self.openai_api_key)
+        self.paper_agent = PaperRetrievalAgent(self.mcp_pool, max_papers=max_papers, refresh=refresh_papers)
+        self.video_agent = ResearchVideoAgent(self.mcp_pool)
+        self.blog_agent = ContentIntegrationAgent(
+            self.openai_api_key,
+            max_concurrent_llm_calls=llm_concurrency,
+            map_reduce_threshold=map_reduce_threshold,
+            map_concurrency=map_concurrency,
+            note_cache=PaperNoteCache(),
+            llm_cache=SQLiteLLMCache() if llm_cache else None,
+            llm=llm,
+            digest_store=DigestStore() if digest else None,
+            sectioned=sectioned,
+        )
+        
+        # 检索截止时间（秒）：到时内容整合用已完成的部分结果继续，None 表示不限时
+        self.retrieval_timeout = retrieval_timeout
         
-        # 构建工作流
-        self.workflow = self._build_workflow()
+        # 检查点：开启后每个节点结束时把状态写入本地 SQLite，失败的运行可按 run_id 恢复
+        self.checkpoint_enabled = checkpoint
+        self.checkpoint_path = checkpoint_path
+        self.checkpointer = None
+        
+        # 工作流在首次使用时构建（start() 会在服务器启动期间提前构建）
+        self._workflow = None
+    
+    @property
+    def workflow(self) -> "CompiledStateGraph":
+        if self._workflow is None:
+            self._workflow = self._build_workflow()
+        return self._workflow
+    
+    @workflow.setter
+    def workflow(self, workflow: "CompiledStateGraph"):
+        self._workflow = workflow
     
-    def _build_workflow(self) -> StateGraph:
+    def _build_workflow(self) -> "CompiledStateGraph":
         """构建 LangGraph 工作流"""
+        # langgraph 导入较慢（约 1 秒），延迟到构建工作流时
+        from langgraph.graph import StateGraph, END, START
+        
         # 使用 ResearchState (TypedDict) 作为状态类型
         workflow = StateGraph(ResearchState)
         
-        # 添加节点
-        workflow.add_node("paper_retrieval", self.paper_agent.process)
-        workflow.add_node("video_retrieval", self.video_agent.process)
-        workflow.add_node("content_integration", self.blog_agent.process)
+        # 添加节点（开启追踪时记录每个节点的耗时）
+        workflow.add_node("paper_retrieval", trace_node("paper_retrieval", self.paper_agent.process))
+        workflow.add_node("video_retrieval", trace_node("video_retrieval", self.video_agent.process))
+        workflow.add_node("content_integration", trace_node("content_integration", self.blog_agent.process))
         
         # 添加边：从开始到论文和视频检索（并行）
         workflow.add_edge(START, "paper_retrieval")
@@ -48,10 +123,52 @@ class ResearchMultiAgentSystem:
         # 添加边：内容整合完成后结束
         workflow.add_edge("content_integration", END)
         
-        return workflow.compile()
+        if self.checkpoint_enabled and self.checkpointer is None:
+            from utils.checkpoint import SQLiteCheckpointSaver
+            self.checkpointer = SQLiteCheckpointSaver(self.checkpoint_path)
+        return workflow.compile(checkpointer=self.checkpointer)
+    
+    async def start(self):
+        """预热：启动 MCP 服务器并缓存工具，同时在线程中构建工作流和 LLM 客户端"""
+        await asyncio.gather(self.mcp_pool.start(), asyncio.to_thread(self._warm_up))
+    
+    def _warm_up(self):
+        """导入并构建 langgraph 工作流、LLM 客户端、tiktoken 词表和提示模板，与服务器启动重叠"""
+        self.workflow
+        self.blog_agent.llm
+        load_tokenizer(self.blog_agent.model_name)
+        self.blog_agent.blog_prompt
+        self.blog_agent.map_prompt
+        self.blog_agent.reduce_prompt
+        if self.blog_agent.sectioned:
+            self.blog_agent.outline_prompt
+            self.blog_agent.section_prompt
+    
+    async def aclose(self):
+        """关闭 MCP 会话池和检查点存储"""
+        await self.mcp_pool.close()
+        if self.checkpointer is not None:
+            self.checkpointer.close()
+    
+    async def __aenter__(self):
+        await self.start()
+        return self
+    
+    async def __aexit__(self, *exc):
+        await self.aclose()
     
-    async def run_research(self, domain: str, days: int = 7) -> Dict[str, Any]:
-        """运行研究流程"""
+    async def run_research(self, domain: str, days: int = 7,
+                           on_token: Optional[Callable[[str], Any]] = None,
+                           bypass_llm_cache: bool = False,
+                           run_id: Optional[str] = None,
+                           papers: Optional[List[PaperInfo]] = None) -> Dict[str, Any]:
+        """运行研究流程
+
+        on_token 在博客 token 到达时被调用（同步或异步回调）；
+        bypass_llm_cache=True 时忽略 LLM 响应缓存重新生成。
+        开启检查点时结果（包括失败结果）带有 run_id，可用 resume_research(run_id) 恢复。
+        提供 papers 时跳过论文检索，直接用这些论文生成博客（watch 模式）。
+        """
         print(f"🔍 开始研究领域：{domain}")
         print(f"📅 时间范围：最近 {days} 天")
         
@@ -59,27 +176,137 @@ class ResearchMultiAgentSystem:
         initial_state = {
             "domain": domain,
             "days": days,
-            "papers": [],
+            "papers": list(papers or []),
             "videos": [],
             "blog_content": "",
             "messages": []
         }
-        
+        if self.checkpoint_enabled:
+            run_id = run_id or uuid.uuid4().hex[:12]
+            print(f"🧷 运行 ID：{run_id}")
+        return await self._invoke(initial_state, domain, days, on_token, bypass_llm_cache, run_id)
+    
+    async def resume_research(self, run_id: str,
+                              on_token: Optional[Callable[[str], Any]] = None,
+                              bypass_llm_cache: bool = False) -> Dict[str, Any]:
+        """从最后完成的节点继续一次检查点运行；已完成的节点（如检索）不会重新执行"""
+        if not self.checkpoint_enabled:
+            return {"error": "未开启检查点，无法恢复运行", "run_id": run_id}
+        snapshot = await self.workflow.aget_state({"configurable": {"thread_id": run_id}})
+        if not snapshot.values:
+            return {"error": f"找不到运行：{run_id}", "run_id": run_id}
+        domain, days = snapshot.values.get("domain", ""), snapshot.values.get("days", 7)
+        if not snapshot.next:
+            print(f"✅ 运行 {run_id} 已经完成")
+            return {**snapshot.values, "run_id": run_id}
+        print(f"🔁 恢复运行 {run_id}（{domain}，最近 {days} 天），待执行：{', '.join(snapshot.next)}")
+        return await self._invoke(None, domain, days, on_token, bypass_llm_cache, run_id)
+    
+    async def _invoke(self, state: Optional[Dict[str, Any]], domain: str, days: int,
+                      on_token: Optional[Callable[[str], Any]], bypass_llm_cache: bool,
+                      run_id: Optional[str]) -> Dict[str, Any]:
+        """执行（state 为 None 时从检查点继续）工作流并打印摘要"""
         try:
+            await self.start()
+            
             # 运行工作流 - 直接传递字典
-            final_state = await self.workflow.ainvoke(initial_state)
+            config = {"configurable": {"on_token": on_token, "bypass_llm_cache": bypass_llm_cache}}
+            if self.retrieval_timeout is not None:
+                # 截止时间沿 config 传给检索节点，再下推到 MCP 工具调用
+                config["configurable"]["retrieval_deadline"] = time.monotonic() + self.retrieval_timeout
+            if run_id is not None:
+                # 检查点模式下博客生成失败时抛出异常，运行停在该节点，恢复时只重跑它
+                config["configurable"].update(thread_id=run_id, raise_on_error=True)
+            with tracer.span("research_run", domain=domain, days=days, run_id=run_id):
+                final_state = await self.workflow.ainvoke(state, config)
+            if run_id is not None:
+                # 已完成的运行只保留最终状态
+                await self.checkpointer.aprune([run_id])
+                final_state["run_id"] = run_id
             
-            print(f"✅ 研究完成！")
+            print(f"\n✅ 研究完成！" if on_token else "✅ 研究完成！")
             print(f"📄 找到论文：{len(final_state.get('papers', []))} 篇")
             print(f"🎥 找到视频：{len(final_state.get('videos', []))} 个")
             print(f"📝 博客字数：{len(final_state.get('blog_content', ''))} 字符")
+            metrics = generation_metrics(final_state)
+            if metrics.get("ttft_s") is not None:
+                print(f"⏱️ 首个 token：{metrics['ttft_s']} 秒，生成速度：{metrics['tokens_per_s']} tokens/秒")
             
             return final_state
             
         except Exception as e:
             print(f"❌ 研究过程中出现错误：{str(e)}")
+            if run_id is not None:
+                print(f"   可使用 --resume {run_id} 从失败的步骤继续")
+                return {"error": str(e), "run_id": run_id}
             return {"error": str(e)}
     
+    def stream_research(self, domain: str, days: int = 7) -> TokenStream:
+        """以异步迭代器形式流式返回博客 token；迭代结束后 stream.result 为最终状态
+
+        用法：
+            stream = system.stream_research("machine learning")
+            async for token in stream:
+                ...
+            results = stream.result
+        """
+        return TokenStream().start(
+            lambda stream: self.run_research(domain, days, on_token=stream.push)
+        )
+    
+    async def run_research_batch(
+        self,
+        domains: List[str],
+        days: int = 7,
+        max_concurrency: int = 4,
+        output_dir: Optional[str] = None,
+        papers: Optional[Dict[str, List[PaperInfo]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """批量运行多个领域的研究流程
+
+        共享智能体、MCP 会话和 LLM 客户端；同时运行的工作流数量受 max_concurrency 限制，
+        LLM 调用数量由 ContentIntegrationAgent 单独限制。每个领域完成后立即写入磁盘，
+        单个领域失败不会影响其他领域。papers 为 {领域: 论文}，提供的领域跳过论文检索。
+        """
+        await self.start()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        status_path = None
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+            status_path = os.path.join(output_dir, "batch_status.jsonl")
+        
+        async def run_one(domain: str) -> Dict[str, Any]:
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    results = await self.run_research(domain, days, papers=(papers or {}).get(domain))
+                except Exception as e:
+                    results = {"error": str(e)}
+                status = _batch_status(domain, results, time.perf_counter() - started)
+            
+            # 完成即落盘；写入失败（磁盘满、权限等）只记入该领域的状态，不中断整个批次
+            if output_dir:
+                try:
+                    if results.get("blog_content"):
+                        status["file"] = os.path.join(output_dir, blog_filename(domain))
+                        with open(status["file"], "w", encoding="utf-8") as f:
+                            f.write(results["blog_content"])
+                except OSError as e:
+                    status.pop("file", None)
+                    status["status"] = "failed"
+                    status["errors"].append(f"写入博客失败：{e}")
+                try:
+                    with open(status_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(status, ensure_ascii=False) + "\n")
+                except OSError as e:
+                    status["errors"].append(f"写入状态失败：{e}")
+            
+            icon = "✅" if status["status"] == "ok" else "❌"
+            print(f"{icon} [{domain}] {status['status']}（{status['elapsed_s']} 秒）")
+            return status
+        
+        return await asyncio.gather(*(run_one(domain) for domain in domains))
+    
     def print_results(self, results: Dict[str, Any]):
         """打印结果摘要"""
         if "error" in results:
@@ -95,21 +322,10 @@ class ResearchMultiAgentSystem:
         if papers:
             print(f"\n📄 最新论文 ({len(papers)} 篇)：")
             for i, paper in enumerate(papers[:5], 1):
-                # 处理论文对象（可能是字典或 Pydantic 模型）
-                if isinstance(paper, dict):
-                    title = paper.get("title", "未知标题")
-                    authors = paper.get("authors", [])
-                    published = paper.get("published", "未知日期")
-                else:
-                    title = getattr(paper, 'title', "未知标题")
-                    authors = getattr(paper, 'authors', [])
-                    published = getattr(paper, 'published', "未知日期")
-                
-                print(f"{i}. {title}")
-                if authors:
-                    author_list = authors[:2] if isinstance(authors, list) else [authors]
-                    print(f"   作者：{', '.join(author_list)}{'等' if len(authors) > 2 else ''}")
-                print(f"   发布：{published}")
+                print(f"{i}. {paper.title}")
+                if paper.authors:
+                    print(f"   作者：{', '.join(paper.authors[:2])}{'等' if len(paper.authors) > 2 else ''}")
+                print(f"   发布：{paper.published}")
                 print()
         
         # 打印视频信息
@@ -117,20 +333,10 @@ class ResearchMultiAgentSystem:
         if videos:
             print(f"\n🎥 相关视频 ({len(videos)} 个)：")
             for i, video in enumerate(videos[:5], 1):
-                # 处理视频对象（可能是字典或 Pydantic 模型）
-                if isinstance(video, dict):
-                    title = video.get("title", "未知标题")
-                    channel = video.get("channel")
-                    url = video.get("url", "")
-                else:
-                    title = getattr(video, 'title', "未知标题")
-                    channel = getattr(video, 'channel', None)
-                    url = getattr(video, 'url', "")
-                
-                print(f"{i}. {title}")
-                if channel:
-                    print(f"   频道：{channel}")
-                print(f"   链接：{url}")
+                print(f"{i}. {video.title}")
+                if video.channel:
+                    print(f"   频道：{video.channel}")
+                print(f"   链接：{video.url}")
                 print()
         
         # 打印博客内容预览
@@ -143,33 +349,182 @@ class ResearchMultiAgentSystem:
         
         print("\n✨ 研究完成！")
 
+def generation_metrics(results: Dict[str, Any]) -> Dict[str, Any]:
+    """从消息中取出博客生成的延迟指标（首 token 延迟、tokens/秒等）"""
+    for message in results.get("messages", []):
+        if "metrics" in message:
+            return message["metrics"]
+    return {}
+
+def blog_filename(domain: str) -> str:
+    """博客输出文件名"""
+    safe_domain = domain.replace(' ', '_').replace(os.sep, '_')
+    return f"research_blog_{safe_domain}.md"
+
+def _batch_status(domain: str, results: Dict[str, Any], elapsed: float) -> Dict[str, Any]:
+    """根据工作流结果生成单个领域的状态记录"""
+    errors = [m["error"] for m in results.get("messages", []) if "error" in m]
+    if "error" in results:
+        errors.insert(0, results["error"])
+    status = {
+        "domain": domain,
+        "status": "ok" if results.get("blog_content") else "failed",
+        "papers": len(results.get("papers", [])),
+        "videos": len(results.get("videos", [])),
+        "blog_chars": len(results.get("blog_content", "")),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 2),
+    }
+    if results.get("run_id"):
+        status["run_id"] = results["run_id"]
+    return status
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数；不提供领域时进入交互模式"""
+    parser = argparse.ArgumentParser(description="Research Multi-Agent System")
+    parser.add_argument("--domains", nargs="+", default=[], help="要研究的领域（批量模式）")
+    parser.add_argument("--domains-file", help="每行一个领域的文本文件（批量模式）")
+    parser.add_argument("--days", type=int, default=7, help="时间范围（天数）")
+    parser.add_argument("--max-concurrency", type=int, default=4, help="同时运行的工作流数量")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="同时进行的 LLM 调用数量")
+    parser.add_argument("--output-dir", default=".", help="批量模式的输出目录")
+    parser.add_argument("--map-concurrency", type=int, default=8, help="map-reduce 模式下并发浓缩论文的数量")
+    parser.add_argument("--max-papers", type=int, default=50, help="每个领域检索的论文上限（超过预算的论文合并为综述）")
+    parser.add_argument("--no-cache", action="store_true", help="关闭本地 arXiv 论文缓存")
+    parser.add_argument("--refresh", action="store_true", help="忽略缓存水位线，重新获取整个时间窗口")
+    parser.add_argument("--no-llm-cache", action="store_true", help="关闭 LLM 响应缓存")
+    parser.add_argument("--trace-file", help="开启追踪，并把 span 以 JSON Lines 追加写入该文件")
+    parser.add_argument("--metrics-file", help="开启追踪，结束时把指标以 Prometheus 文本格式写入该文件")
+    parser.add_argument("--retrieval-timeout", type=float, default=45.0,
+                        help="检索截止时间（秒），到时用已完成的部分结果生成博客")
+    parser.add_argument("--digest", action="store_true", help="每日摘要模式：只为新增论文生成内容并合并进上次的文章")
+    parser.add_argument("--sectioned", action="store_true",
+                        help="分节模式：先规划大纲，再并发生成各节（建议同时调大 --llm-concurrency）")
+    parser.add_argument("--checkpoint", action="store_true", help="每个步骤结束后保存检查点，失败后可恢复")
+    parser.add_argument("--checkpoint-path", help="检查点 SQLite 文件路径（默认 .cache/checkpoints.sqlite3）")
+    parser.add_argument("--resume", metavar="RUN_ID", help="从检查点恢复失败的运行（只重跑失败的步骤）")
+    return parser.parse_args(argv)
+
+def write_metrics(path: str):
+    """把追踪指标以 Prometheus 文本格式写入文件"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(tracer.prometheus_text())
+    print(f"📈 追踪指标已保存到：{path}")
+
+def load_domains(args: argparse.Namespace) -> List[str]:
+    """从参数和文件中收集领域列表（去重并保持顺序）"""
+    domains = list(args.domains)
+    if args.domains_file:
+        with open(args.domains_file, encoding="utf-8") as f:
+            domains.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    return list(dict.fromkeys(d.strip() for d in domains if d.strip()))
+
+async def run_batch(args: argparse.Namespace, domains: List[str]):
+    """非交互批量模式"""
+    # MCP 会话数随工作流并发数增长（每个服务器最多 4 个子进程）
+    research_system = ResearchMultiAgentSystem(
+        sessions_per_server=max(1, min(args.max_concurrency, 4)),
+        llm_concurrency=args.llm_concurrency,
+        paper_cache=not args.no_cache,
+        refresh_papers=args.refresh,
+        map_concurrency=args.map_concurrency,
+        max_papers=args.max_papers,
+        llm_cache=not args.no_llm_cache,
+        checkpoint=args.checkpoint,
+        checkpoint_path=args.checkpoint_path,
+        digest=args.digest,
+        retrieval_timeout=args.retrieval_timeout,
+        sectioned=args.sectioned,
+    )
+    async with research_system:
+        statuses = await research_system.run_research_batch(
+            domains, args.days, max_concurrency=args.max_concurrency, output_dir=args.output_dir
+        )
+    
+    ok = sum(1 for s in statuses if s["status"] == "ok")
+    print(f"\n📦 批量完成：{ok}/{len(statuses)} 个领域成功")
+    for status in statuses:
+        if status["status"] != "ok":
+            print(f"   ❌ {status['domain']}：{'; '.join(status['errors']) or '未生成博客'}")
+
 async def main():
     """主函数"""
+    args = parse_args()
+    if args.trace_file or args.metrics_file:
+        configure_tracing(True, args.trace_file)
     try:
-        # 创建研究系统
-        research_system = ResearchMultiAgentSystem()
-        
-        # 示例：研究机器学习领域
-        domain = input("请输入研究领域（默认：machine learning）：").strip() or "machine learning"
-        days = int(input("请输入时间范围（天数，默认：7）：").strip() or "7")
-        
-        # 运行研究
-        results = await research_system.run_research(domain, days)
+        domains = load_domains(args)
+        if domains:
+            await run_batch(args, domains)
+            return
         
-        # 显示结果
-        research_system.print_results(results)
+        # 创建研究系统
+        research_system = ResearchMultiAgentSystem(
+            llm_concurrency=args.llm_concurrency,
+            paper_cache=not args.no_cache,
+            refresh_papers=args.refresh,
+            map_concurrency=args.map_concurrency,
+            max_papers=args.max_papers,
+            llm_cache=not args.no_llm_cache,
+            checkpoint=args.checkpoint or bool(args.resume),
+            checkpoint_path=args.checkpoint_path,
+            digest=args.digest,
+            retrieval_timeout=args.retrieval_timeout,
+            sectioned=args.sectioned,
+        )
         
-        # 保存博客到文件
-        if "blog_content" in results and results["blog_content"]:
-            filename = f"research_blog_{domain.replace(' ', '_')}.md"
+        async with research_system:
+            if args.resume:
+                results = await research_system.resume_research(
+                    args.resume, on_token=lambda token: print(token, end="", flush=True)
+                )
+                research_system.print_results(results)
+                if results.get("blog_content"):
+                    filename = blog_filename(results.get("domain", args.resume))
+                    with open(filename, "w", encoding="utf-8") as f:
+                        f.write(results["blog_content"])
+                    print(f"\n💾 博客内容已保存到：{filename}")
+                return
+            
+            # 示例：研究机器学习领域
+            domain = input("请输入研究领域（默认：machine learning）：").strip() or "machine learning"
+            days = int(input("请输入时间范围（天数，默认：7）：").strip() or "7")
+            
+            # 运行研究：token 到达即输出到控制台并追加写入博客文件
+            filename = blog_filename(domain)
             with open(filename, "w", encoding="utf-8") as f:
-                f.write(results["blog_content"])
-            print(f"\n💾 博客内容已保存到：{filename}")
+                def on_token(token: str):
+                    print(token, end="", flush=True)
+                    f.write(token)
+                    f.flush()
+                
+                results = await research_system.run_research(domain, days, on_token=on_token)
+            
+            # 显示结果
+            research_system.print_results(results)
+            
+            # 保存博客到文件（摘要模式下流式输出的只是新增部分，改写为合并后的完整文章）
+            if "blog_content" in results and results["blog_content"]:
+                if args.digest:
+                    with open(filename, "w", encoding="utf-8") as f:
+                        f.write(results["blog_content"])
+                print(f"\n💾 博客内容已保存到：{filename}")
+            elif os.path.exists(filename):
+                # 生成失败：不把不完整的输出留在正式文件名下
+                if os.path.getsize(filename) == 0:
+                    os.remove(filename)
+                else:
+                    partial = filename.removesuffix(".md") + ".partial.md"
+                    os.replace(filename, partial)
+                    print(f"\n⚠️ 博客未生成完整，已输出的部分保存到：{partial}")
     
     except KeyboardInterrupt:
         print("\n👋 用户中断，程序退出")
     except Exception as e:
         print(f"❌ 程序运行错误：{str(e)}")
+    finally:
+        if args.metrics_file:
+            write_metrics(args.metrics_file)
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,67 +1,378 @@
+import argparse
 import asyncio
-import json
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
-from mcp.server.fastmcp import FastMCP
-from langchain_community.utilities import ArxivAPIWrapper
-import arxiv
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Union
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.types import CallToolResult
+from utils.dedup import clean_arxiv_id, is_arxiv_id, normalize_arxiv_id
+from utils.paper_store import PaperStore, query_key
+from utils.rate_limit import AsyncRateLimiter
+from utils.wire import parse_fields, project, tool_result
+
+if TYPE_CHECKING:
+    # arxiv（及 feedparser/requests）在第一次真正请求 arXiv 时才导入，缓存命中的调用不需要它
+    import arxiv
 
 mcp = FastMCP("ArXiv Research Server")
 
-@mcp.tool()
-def search_recent_papers(domain: str, max_results: int = 10, days: int = 7) -> str:
-    """搜索指定领域最近几天的论文"""
-    try:
-        # 创建 ArXiv 客户端
-        client = arxiv.Client()
-        
-        # 构建搜索查询
-        search_query = f"all:{domain}"
+# arXiv 建议请求间隔 3 秒；所有工具调用共享同一个限速器，按到达顺序排队
+ARXIV_MIN_INTERVAL = float(os.getenv("ARXIV_MIN_INTERVAL", "3.0"))
+ARXIV_MAX_WORKERS = int(os.getenv("ARXIV_MAX_WORKERS", "8"))
+
+# 本地论文缓存：--no-cache 或 ARXIV_NO_CACHE=1 时每次获取整个窗口（论文仍写入全文索引）
+CACHE_ENABLED = os.getenv("ARXIV_NO_CACHE", "") not in ("1", "true", "yes")
+CACHE_OVERLAP_HOURS = float(os.getenv("ARXIV_CACHE_OVERLAP_HOURS", "48"))
+CACHE_TTL_DAYS = float(os.getenv("ARXIV_CACHE_TTL_DAYS", "30"))
+CACHE_MAX_PAPERS = int(os.getenv("ARXIV_CACHE_MAX_PAPERS", "50000"))
+# 论文索引按最后获取时间淘汰（与发布日期无关，详情查询写入的旧论文也会保留）
+INDEX_TTL_DAYS = float(os.getenv("ARXIV_INDEX_TTL_DAYS", "180"))
+
+# 按 id_list 批量查找时每次请求的 id 上限
+ID_PAGE_SIZE = 200
+
+_rate_limiter = AsyncRateLimiter(ARXIV_MIN_INTERVAL)
+_store: Optional[PaperStore] = None
+# 阻塞的 HTTP 请求在有界线程池中执行，不阻塞事件循环
+_executor = ThreadPoolExecutor(max_workers=ARXIV_MAX_WORKERS, thread_name_prefix="arxiv")
+_clients = threading.local()
+
+def get_client(page_size: int) -> "arxiv.Client":
+    """当前线程按页大小复用的 arXiv 客户端（内部 requests.Session 保持连接）
+
+    requests.Session 不保证线程安全，线程池中的每个线程使用自己的客户端；只应在工作线程中调用。
+    """
+    clients = getattr(_clients, "by_page_size", None)
+    if clients is None:
+        clients = _clients.by_page_size = {}
+    client = clients.get(page_size)
+    if client is None:
+        # 限速由 _rate_limiter 统一负责，关闭客户端自带的休眠
+        import arxiv
+        client = clients[page_size] = arxiv.Client(page_size=page_size, delay_seconds=0)
+    return client
+
+def get_store() -> PaperStore:
+    """打开（并按需淘汰）本地论文库
+
+    论文库同时是全文索引：即使关闭窗口缓存，见过的论文也会写入索引。
+    """
+    global _store
+    if _store is None:
+        _store = PaperStore(ttl_days=CACHE_TTL_DAYS, max_papers=CACHE_MAX_PAPERS, index_ttl_days=INDEX_TTL_DAYS)
+        _store.evict()
+    return _store
+
+async def run_blocking(func, *args):
+    """限速后在线程池中执行一次阻塞的 arXiv 请求"""
+    await _rate_limiter.acquire()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, func, *args)
+
+def build_search_query(domain: str, start_date: datetime, end_date: datetime,
+                       categories: Optional[List[str]] = None) -> str:
+    """构建带提交日期范围的 arXiv 查询语句"""
+    clauses = []
+    if domain:
+        clauses.append(f"(all:{domain})")
+    if categories:
+        cats = [c if c.startswith("cat:") else f"cat:{c}" for c in categories]
+        clauses.append(cats[0] if len(cats) == 1 else "(" + " OR ".join(cats) + ")")
+    clauses.append(
+        f"submittedDate:[{start_date.strftime('%Y%m%d%H%M')} TO {end_date.strftime('%Y%m%d%H%M')}]"
+    )
+    return " AND ".join(clauses)
+
+def fetch_page(query: str, offset: int, page_size: int) -> List["arxiv.Result"]:
+    """按提交时间倒序获取一页结果（恰好一次 API 请求）"""
+    import arxiv
+    search = arxiv.Search(
+        query=query,
+        max_results=offset + page_size,
+        sort_by=arxiv.SortCriterion.SubmittedDate,
+        sort_order=arxiv.SortOrder.Descending
+    )
+    return list(get_client(page_size).results(search, offset=offset))
+
+def to_record(result: "arxiv.Result") -> Dict[str, Any]:
+    """将 arXiv 结果转换为缓存记录（保留完整摘要和精确时间）"""
+    return {
+        "title": result.title,
+        "authors": [author.name for author in result.authors],
+        "summary": result.summary,
+        "published": result.published.strftime("%Y-%m-%d"),
+        "published_at": result.published.isoformat(),
+        "updated_at": result.updated.isoformat(),
+        "arxiv_id": result.entry_id.split('/')[-1],
+        "url": result.entry_id
+    }
+
+def to_paper_info(record: Dict[str, Any]) -> Dict[str, Any]:
+    """将缓存记录转换为 PaperInfo 字典"""
+    summary = record["summary"]
+    return {
+        "title": record["title"],
+        "authors": record["authors"],
+        "summary": summary[:500] + "..." if len(summary) > 500 else summary,
+        "published": record["published"],
+        "arxiv_id": record["arxiv_id"],
+        "url": record["url"]
+    }
+
+async def fetch_window(search_query: str, window_start: datetime, fetch_from: datetime,
+                       max_results: Optional[int], page_size: int,
+                       deadline: Optional[float] = None) -> Dict[str, Any]:
+    """分页获取 fetch_from 之后提交、且首次发布不早于 window_start 的论文
+
+    deadline（秒）用完时停止翻页，返回已获取的部分并标记 partial。
+    """
+    if max_results:
+        page_size = min(page_size, max_results)
+    expires = time.monotonic() + deadline if deadline is not None else None
+    
+    records = []
+    requests = fetched = 0
+    offset = 0
+    exhausted = truncated = partial = False
+    while not exhausted:
+        try:
+            fetch = run_blocking(fetch_page, search_query, offset, page_size)
+            if expires is None:
+                page = await fetch
+            else:
+                page = await asyncio.wait_for(fetch, max(0.0, expires - time.monotonic()))
+        except asyncio.TimeoutError:
+            # 限速排队或上游过慢：交出已有结果，不再等待
+            truncated = partial = True
+            break
+        requests += 1
+        fetched += len(page)
+        offset += len(page)
+        # 返回不足一页说明窗口内已无更多结果
+        exhausted = len(page) < page_size
         
-        # 计算日期范围
-        end_date = datetime.now()
+        for result in page:
+            # 结果按最新版本提交时间倒序：超出窗口即停止翻页
+            if result.updated < fetch_from:
+                exhausted = True
+                break
+            # 只保留首次发布在窗口内的论文（排除旧论文的新版本）
+            if result.published >= window_start:
+                records.append(to_record(result))
+                if max_results and len(records) >= max_results:
+                    exhausted = truncated = True
+                    break
+    
+    return {"records": records, "requests": requests, "fetched": fetched, "truncated": truncated,
+            "partial": partial}
+
+# 工具返回值不声明结构化输出，避免 FastMCP 把同一文本再包装进 structuredContent 传两遍
+@mcp.tool(structured_output=False)
+async def search_recent_papers(domain: str, max_results: Optional[int] = None, days: int = 7,
+                               categories: Optional[List[str]] = None, page_size: int = 100,
+                               refresh: bool = False, fields: Optional[List[str]] = None,
+                               structured: bool = False, deadline: Optional[float] = None) -> Union[str, CallToolResult]:
+    """搜索指定领域最近几天的论文
+
+    日期窗口通过 submittedDate 范围下推到 arXiv 查询中，按页获取直到窗口结束；
+    可选 categories（如 ["cs.LG", "cs.AI"]）限定分类，max_results 为可选上限。
+    启用本地缓存时只获取水位线之后的新论文，窗口内容从缓存返回；refresh=True 强制重新获取整个窗口。
+    返回 {"papers": [...], "meta": {...}}，meta 中包含请求数与获取/保留数量。
+    fields 只返回指定的论文字段（如 ["arxiv_id", "title"]）；structured=True 时同时通过 MCP 结构化内容返回。
+    deadline（秒）到达时停止访问 arXiv，返回缓存中的窗口内容和已获取的部分，meta.partial 为 true。
+    """
+    try:
+        # 计算日期范围（arXiv 使用 UTC）
+        end_date = datetime.now(timezone.utc)
         start_date = end_date - timedelta(days=days)
         
-        # 创建搜索对象
-        search = arxiv.Search(
-            query=search_query,
-            max_results=max_results,
-            sort_by=arxiv.SortCriterion.SubmittedDate,
-            sort_order=arxiv.SortOrder.Descending
-        )
+        store = get_store()
+        key = query_key(domain, categories)
+        fetch_from = start_date
+        covered_from = start_date
+        if CACHE_ENABLED and not refresh:
+            watermark = store.get_watermark(key)
+            # 水位线覆盖窗口起点时只做增量获取；回看一段时间以接住延迟公布的论文
+            if watermark and watermark[0] <= start_date <= watermark[1]:
+                covered_from = watermark[0]
+                fetch_from = max(start_date, watermark[1] - timedelta(hours=CACHE_OVERLAP_HOURS))
         
-        papers = []
-        for result in client.results(search):
-            # 检查论文是否在指定日期范围内
-            if result.published.replace(tzinfo=None) >= start_date:
-                paper_info = {
-                    "title": result.title,
-                    "authors": [author.name for author in result.authors],
-                    "summary": result.summary[:500] + "..." if len(result.summary) > 500 else result.summary,
-                    "published": result.published.strftime("%Y-%m-%d"),
-                    "arxiv_id": result.entry_id.split('/')[-1],
-                    "url": result.entry_id
-                }
-                print("paper info:"+"="*10)
-                print(paper_info)
-                papers.append(paper_info)
+        search_query = build_search_query(domain, fetch_from, end_date, categories)
+        result = await fetch_window(search_query, start_date, fetch_from, max_results, page_size, deadline)
         
-        return json.dumps(papers, ensure_ascii=False, indent=2)
+        store.upsert(key, result["records"])
+        if CACHE_ENABLED:
+            # 只有完整获取（未被 max_results 截断）时才推进水位线
+            if not result["truncated"]:
+                store.set_watermark(key, covered_from, end_date)
+            records = store.window(key, start_date, max_results)
+        else:
+            records = result["records"]
+        papers = project((to_paper_info(record) for record in records), parse_fields(fields))
+        
+        return tool_result({
+            "papers": papers,
+            "meta": {
+                "query": search_query,
+                "requests": result["requests"],
+                "fetched": result["fetched"],
+                "kept": len(papers),
+                "cached": max(0, len(papers) - len(result["records"])) if CACHE_ENABLED else 0,
+                "incremental": fetch_from > start_date,
+                "partial": result["partial"],
+                "start": start_date.strftime("%Y-%m-%d"),
+                "end": end_date.strftime("%Y-%m-%d"),
+            }
+        }, structured)
     
     except Exception as e:
         return f"Error searching papers: {str(e)}"
 
-@mcp.tool()
-def get_paper_details(arxiv_id: str) -> str:
-    """获取特定论文的详细信息"""
+def fetch_by_ids(arxiv_ids: List[str]) -> List["arxiv.Result"]:
+    """按 id_list 获取论文（一次 API 请求）"""
+    import arxiv
+    search = arxiv.Search(id_list=arxiv_ids, max_results=len(arxiv_ids))
+    # 固定页大小的客户端：不同分块长度共用一个客户端（最多 ID_PAGE_SIZE 个 id，一次请求）
+    return list(get_client(ID_PAGE_SIZE).results(search))
+
+def format_details(record: Dict[str, Any], max_chars: int = 1000) -> str:
+    """论文详情文本（与 ArxivAPIWrapper 的输出格式一致）"""
+    details = (
+        f"Published: {record['published']}\n"
+        f"Title: {record['title']}\n"
+        f"Authors: {', '.join(record['authors'])}\n"
+        f"Summary: {record['summary']}"
+    )
+    return details[:max_chars]
+
+@mcp.tool(structured_output=False)
+async def get_paper_details(arxiv_id: str) -> str:
+    """获取特定论文的详细信息（优先从本地索引返回，未命中时访问 arXiv）"""
     try:
-        # 使用 ArXiv API 获取论文详情
-        wrapper = ArxivAPIWrapper(top_k_results=1, doc_content_chars_max=1000)
-        result = wrapper.run(arxiv_id)
-        return result
+        store = get_store()
+        record = store.get(arxiv_id)
+        if record is None:
+            results = await run_blocking(fetch_by_ids, [arxiv_id])
+            if not results:
+                return f"No paper found for arXiv id {arxiv_id}"
+            record = to_record(results[0])
+            store.upsert(None, [record])
+        return format_details(record)
     except Exception as e:
         return f"Error getting paper details: {str(e)}"
 
+@mcp.tool(structured_output=False)
+async def get_papers_details(arxiv_ids: List[str], fields: Optional[List[str]] = None, chunk_size: int = 100,
+                             structured: bool = False, ctx: Optional[Context] = None) -> Union[str, CallToolResult]:
+    """批量获取论文详情（本地索引优先，未命中的按 id_list 分块请求 arXiv）
+
+    每个分块只占一次 API 请求（每块最多 chunk_size 个 id，上限 200），200 篇论文通常只需 1～2 次请求；
+    格式不合法的 id 直接报错不发送，分块请求失败时二分重试以隔离出错的 id。
+    返回 {"papers": [...], "meta": {...}}，papers 与输入顺序一致，每项带 arxiv_id（请求的 id），
+    失败的 id 带 error 字段；fields 选择返回的字段（默认全部，摘要不截断）。
+    每完成一个分块发送一次进度通知（客户端提供 progressToken 时）。
+    """
+    try:
+        ids = [clean_arxiv_id(arxiv_id) for arxiv_id in arxiv_ids]
+        unique = list(dict.fromkeys(ids))
+        # 格式不合法的 id 不发给 arXiv（否则整个 id_list 请求返回 400）
+        errors: Dict[str, str] = {
+            arxiv_id: f"Invalid arXiv id: {arxiv_id!r}" for arxiv_id in unique if not is_arxiv_id(arxiv_id)
+        }
+        valid = [arxiv_id for arxiv_id in unique if arxiv_id not in errors]
+        store = get_store()
+        found: Dict[str, Dict[str, Any]] = store.get_many(valid)
+        cached = len(found)
+        misses = [arxiv_id for arxiv_id in valid if arxiv_id not in found]
+        chunk_size = max(1, min(chunk_size, ID_PAGE_SIZE))
+        chunks = [misses[i:i + chunk_size] for i in range(0, len(misses), chunk_size)]
+        requests = 0
+        
+        async def fetch_chunk(chunk: List[str]):
+            """请求一个分块；失败时二分重试，单个坏 id 不会连累同一分块的其他 id"""
+            nonlocal requests
+            requests += 1
+            try:
+                records = [to_record(result) for result in await run_blocking(fetch_by_ids, chunk)]
+            except Exception as e:
+                if len(chunk) == 1:
+                    errors[chunk[0]] = f"Error fetching paper: {str(e)}"
+                    return
+                middle = len(chunk) // 2
+                await fetch_chunk(chunk[:middle])
+                await fetch_chunk(chunk[middle:])
+                return
+            store.upsert(None, records)
+            by_id = {}
+            for record in records:
+                by_id[record["arxiv_id"]] = record
+                by_id.setdefault(normalize_arxiv_id(record["arxiv_id"]), record)
+            for arxiv_id in chunk:
+                if arxiv_id in by_id:
+                    found[arxiv_id] = by_id[arxiv_id]
+                else:
+                    errors[arxiv_id] = f"No paper found for arXiv id {arxiv_id}"
+        
+        if ctx is not None:
+            await ctx.report_progress(cached, len(unique), f"{cached} cached, {len(misses)} to fetch")
+        for chunk in chunks:
+            await fetch_chunk(chunk)
+            if ctx is not None:
+                await ctx.report_progress(len(found) + len(errors), len(unique))
+
+        selected = parse_fields(fields)
+        papers = []
+        for arxiv_id in ids:
+            if arxiv_id in found:
+                record = {key: value for key, value in found[arxiv_id].items() if key != "arxiv_id"}
+                paper = project([record], selected)[0]
+                papers.append({"arxiv_id": arxiv_id, **paper})
+            else:
+                papers.append({"arxiv_id": arxiv_id, "error": errors[arxiv_id]})
+        meta = {
+            "count": len(papers),
+            "cached": cached,
+            "fetched": len(found) - cached,
+            "failed": len(unique) - len(found),
+            "requests": requests,
+        }
+        return tool_result({"papers": papers, "meta": meta}, structured)
+    except Exception as e:
+        return f"Error getting papers details: {str(e)}"
+
+@mcp.tool(structured_output=False)
+def search_paper_index(query: str = "", start_date: Optional[str] = None, end_date: Optional[str] = None,
+                       author: Optional[str] = None, limit: int = 20, fields: Optional[List[str]] = None,
+                       structured: bool = False) -> Union[str, CallToolResult]:
+    """在本地论文索引中检索所有见过的论文（不访问网络）
+
+    query 中的每个词都必须出现，按相关度排序；start_date/end_date 为 YYYY-MM-DD；
+    author 按子串匹配。返回 {"papers": [...], "meta": {"count": n}}，每篇论文带 score。
+    fields 和 structured 的含义同 search_recent_papers。
+    """
+    try:
+        records = get_store().search(query, start_date, end_date, author, limit)
+        papers = project(
+            ({**to_paper_info(record), "score": record["score"]} for record in records), parse_fields(fields)
+        )
+        return tool_result({"papers": papers, "meta": {"count": len(papers)}}, structured)
+    except Exception as e:
+        return f"Error searching paper index: {str(e)}"
+
 if __name__ == "__main__":
-    print("Starting ArXiv MCP Server...")
+    parser = argparse.ArgumentParser(description="ArXiv MCP Server")
+    parser.add_argument("--no-cache", action="store_true", help="关闭本地论文缓存")
+    parser.add_argument("--refresh-cache", action="store_true", help="启动时清空本地论文缓存")
+    args = parser.parse_args()
+    if args.no_cache:
+        CACHE_ENABLED = False
+    elif args.refresh_cache:
+        get_store().clear()
+    
+    # stdout 用于 MCP stdio 协议，日志输出到 stderr
+    print("Starting ArXiv MCP Server...", file=sys.stderr)
     mcp.run(transport="stdio")
@@ -1,84 +1,164 @@
+import asyncio
 import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Union
 from mcp.server.fastmcp import FastMCP
-from youtube_search import YoutubeSearch
+from mcp.types import CallToolResult
+from utils.dedup import canonical_youtube_url, dedupe_videos
+from utils.rate_limit import AsyncRateLimiter
+from utils.text_match import academic_matcher, parse_keywords
+from utils.wire import dumps, parse_fields, project, tool_result
 
 mcp = FastMCP("YouTube Research Server")
 
-@mcp.tool()
-def search_research_videos(domain: str, max_results: int = 10) -> str:
-    """搜索指定领域的研究视频"""
+YOUTUBE_MAX_WORKERS = int(os.getenv("YOUTUBE_MAX_WORKERS", "4"))
+YOUTUBE_MIN_INTERVAL = float(os.getenv("YOUTUBE_MIN_INTERVAL", "0.2"))
+
+# 抓取在有界线程池中并发执行，全局限速器控制请求节奏
+_executor = ThreadPoolExecutor(max_workers=YOUTUBE_MAX_WORKERS, thread_name_prefix="youtube")
+_rate_limiter = AsyncRateLimiter(YOUTUBE_MIN_INTERVAL)
+
+def scrape_query(query: str, max_results: int) -> List[Dict[str, Any]]:
+    """执行一次 YouTube 搜索抓取（阻塞）"""
+    # youtube_search（及 requests）在第一次抓取时才导入，缩短服务器冷启动
+    from youtube_search import YoutubeSearch
+    results = YoutubeSearch(query, max_results=max_results).to_dict()
+    videos = []
+    for video in results:
+        videos.append({
+            "title": video.get("title", ""),
+            "url": f"https://www.youtube.com{video.get('url_suffix', '')}",
+            "description": video.get("long_desc", video.get("description", ""))[:300],
+            "published": video.get("publish_time", ""),
+            "channel": video.get("channel", ""),
+            "duration": video.get("duration", ""),
+            "views": video.get("views", "")
+        })
+    return videos
+
+async def run_query(query: str, max_results: int, timeout: float) -> Dict[str, Any]:
+    """限速后在线程池中执行单个查询，记录耗时和错误"""
+    started = time.perf_counter()
+    outcome: Dict[str, Any] = {"query": query, "videos": [], "error": None}
+    try:
+        await _rate_limiter.acquire()
+        loop = asyncio.get_running_loop()
+        outcome["videos"] = await asyncio.wait_for(
+            loop.run_in_executor(_executor, scrape_query, query, max_results), timeout
+        )
+    except asyncio.TimeoutError:
+        outcome["error"] = f"timeout after {timeout}s"
+    except Exception as e:
+        outcome["error"] = str(e)
+    outcome["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return outcome
+
+# 工具返回值不声明结构化输出，避免 FastMCP 把同一文本再包装进 structuredContent 传两遍
+@mcp.tool(structured_output=False)
+async def search_research_videos(domain: str, max_results: int = 10, num_queries: int = 3,
+                                 per_query_results: int = 10, query_timeout: float = 10.0,
+                                 deadline: float = 20.0, filter: bool = False, keywords: str = "",
+                                 min_score: float = 0.0, fields: Optional[List[str]] = None,
+                                 structured: bool = False) -> Union[str, CallToolResult]:
+    """搜索指定领域的研究视频
+
+    num_queries 个 "{domain} {keyword}" 子查询并发执行，每个子查询获取 per_query_results 条，
+    合并去重后截取 max_results 条。到达 deadline 时返回已完成的部分结果。
+    filter=True 时在服务器端按学术关键词与 keywords（逗号分隔）打分过滤并按得分排序，
+    省去 filter_academic_videos 的第二次往返。
+    返回 {"videos": [...], "meta": {"queries": [...], "partial": bool}}；
+    每个子查询的统计中 timed_out 表示它被 deadline 截断（而不是数据源出错）。
+    fields 只返回指定的视频字段（如 ["title", "url"]）；structured=True 时同时通过 MCP 结构化内容返回。
+    """
     try:
         # 构建搜索查询，添加学术相关关键词
         academic_keywords = ["research", "paper", "study", "academic", "conference", "lecture"]
-        search_queries = [f"{domain} {keyword}" for keyword in academic_keywords[:3]]
+        search_queries = [f"{domain} {keyword}" for keyword in academic_keywords[:max(1, num_queries)]]
         
-        all_videos = []
-        
-        for query in search_queries:
-            try:
-                # 使用 youtube_search 库搜索视频
-                results = YoutubeSearch(query, max_results=max_results//len(search_queries)).to_dict()
-                
-                for video in results:
-                    video_info = {
-                        "title": video.get("title", ""),
-                        "url": f"https://www.youtube.com{video.get('url_suffix', '')}",
-                        "description": video.get("long_desc", video.get("description", ""))[:300],
-                        "published": video.get("publish_time", ""),
-                        "channel": video.get("channel", ""),
-                        "duration": video.get("duration", ""),
-                        "views": video.get("views", "")
-                    }
-                    all_videos.append(video_info)
-                    
-            except Exception as e:
-                print(f"Error with query '{query}': {str(e)}")
-                continue
+        tasks = [asyncio.create_task(run_query(query, per_query_results, query_timeout))
+                 for query in search_queries]
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
         
-        # 去重和排序
-        unique_videos = []
-        seen_urls = set()
+        query_stats = []
+        all_videos = []
+        # 按查询顺序合并，保证结果稳定
+        for query, task in zip(search_queries, tasks):
+            timed_out = task not in done
+            if timed_out:
+                outcome = {"query": query, "videos": [], "error": f"deadline {deadline}s exceeded",
+                           "elapsed_s": deadline}
+            else:
+                outcome = task.result()
+            all_videos.extend(outcome["videos"])
+            query_stats.append({
+                "query": query,
+                "count": len(outcome["videos"]),
+                "elapsed_s": outcome["elapsed_s"],
+                "error": outcome["error"],
+                "timed_out": timed_out,
+            })
         
+        # 按规范化的视频 id 去重（同一视频的不同链接形式），再去掉标题近似的重新上传
         for video in all_videos:
-            if video["url"] not in seen_urls:
-                seen_urls.add(video["url"])
-                unique_videos.append(video)
+            video["url"] = canonical_youtube_url(video["url"])
+        unique_videos = dedupe_videos(all_videos)
+        duplicates = len(all_videos) - len(unique_videos)
+        
+        # 先过滤排序再截取，避免低分视频占用名额
+        if filter:
+            unique_videos = score_videos(unique_videos, keywords, min_score)
         
         # 限制结果数量
         unique_videos = unique_videos[:max_results]
         
-        return json.dumps(unique_videos, ensure_ascii=False, indent=2)
+        return tool_result({
+            "videos": project(unique_videos, parse_fields(fields)),
+            "meta": {
+                "queries": query_stats,
+                "partial": any(stat["error"] for stat in query_stats),
+                "filtered": filter,
+                "duplicates": duplicates,
+            }
+        }, structured)
     
     except Exception as e:
         return f"Error searching videos: {str(e)}"
 
-@mcp.tool()
-def filter_academic_videos(videos_json: str, keywords: str = "") -> str:
-    """过滤学术相关的视频"""
+def score_videos(videos: List[Dict[str, Any]], keywords: str = "", min_score: float = 0.0) -> List[Dict[str, Any]]:
+    """按学术关键词和领域关键词为视频打分，保留得分高于 min_score 的视频并按得分降序排列"""
+    # 匹配器按关键词缓存，只编译一次；标题命中的权重是描述的两倍
+    matcher = academic_matcher(parse_keywords(keywords))
+    scored = []
+    for video in videos:
+        score = matcher.score([(video.get("title", ""), 2.0), (video.get("description", ""), 1.0)])
+        if score > min_score:
+            scored.append({**video, "score": score})
+    scored.sort(key=lambda video: video["score"], reverse=True)
+    return scored
+
+@mcp.tool(structured_output=False)
+def filter_academic_videos(videos_json: str, keywords: str = "", min_score: float = 0.0) -> str:
+    """过滤学术相关的视频（返回带 score 的结果，按得分降序）"""
     try:
-        videos = json.loads(videos_json)
-        academic_keywords = ["research", "paper", "study", "academic", "conference", "lecture", "university", "phd", "science"]
-        
-        if keywords:
-            academic_keywords.extend(keywords.split(","))
-        
-        filtered_videos = []
-        for video in videos:
-            title_lower = video.get("title", "").lower()
-            desc_lower = video.get("description", "").lower()
-            
-            # 检查标题和描述中是否包含学术关键词
-            is_academic = any(keyword in title_lower or keyword in desc_lower for keyword in academic_keywords)
-            
-            if is_academic:
-                filtered_videos.append(video)
+        payload = json.loads(videos_json)
+        # 兼容 search_research_videos 的 {"videos": [...], "meta": {...}} 结构
+        videos = payload["videos"] if isinstance(payload, dict) else payload
+        filtered_videos = score_videos(videos, keywords, min_score)
         
-        return json.dumps(filtered_videos, ensure_ascii=False, indent=2)
+        if isinstance(payload, dict):
+            return dumps({**payload, "videos": filtered_videos})
+        return dumps(filtered_videos)
     
     except Exception as e:
         return f"Error filtering videos: {str(e)}"
 
 if __name__ == "__main__":
-    print("Starting YouTube MCP Server...")
+    # stdout 用于 MCP stdio 协议，日志输出到 stderr
+    print("Starting YouTube MCP Server...", file=sys.stderr)
     mcp.run(transport="stdio")
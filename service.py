@@ -0,0 +1,145 @@
+"""HTTP 服务模式
+
+一个长期运行的 ResearchMultiAgentSystem 处理所有请求：相同的进行中请求合并为一次执行，
+成功的结果在短时间内直接复用，同时运行的工作流数量受准入控制限制。
+
+    uv run python service.py --port 8000 --max-concurrency 4 --result-ttl 600
+
+接口：
+    POST /research                 提交任务（stream=true 时直接以 SSE 返回博客 token）
+    GET  /research/{job_id}        任务状态和结果
+    GET  /research/{job_id}/stream 以 SSE 流式返回博客 token（从头回放）
+    GET  /health                   服务和调度状态
+    GET  /metrics                  Prometheus 文本格式的指标
+"""
+import argparse
+import json
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from main import ResearchMultiAgentSystem
+from utils.jobs import ResearchJob, ResearchJobManager
+from utils.tracing import tracer
+
+
+class ResearchRequest(BaseModel):
+    domain: str = Field(..., min_length=1, max_length=200)
+    days: int = Field(7, ge=1, le=365)
+    stream: bool = False
+    # 忽略结果缓存（仍会与进行中的相同请求合并）
+    fresh: bool = False
+
+
+def job_result(job: ResearchJob) -> Optional[Dict[str, Any]]:
+    """可序列化的任务结果"""
+    if job.result is None:
+        return None
+    result = job.result
+    return {
+        "blog_content": result.get("blog_content", ""),
+        "papers": [paper.model_dump() for paper in result.get("papers", [])],
+        "videos": [video.model_dump() for video in result.get("videos", [])],
+        "messages": result.get("messages", []),
+    }
+
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def sse_response(job: ResearchJob, disposition: Optional[str] = None) -> StreamingResponse:
+    async def events():
+        yield sse_event("job", {**job.info(), "disposition": disposition})
+        async for token in job.stream():
+            yield sse_event("token", token)
+        yield sse_event("done", job.info())
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def create_app(system: Optional[ResearchMultiAgentSystem] = None, max_concurrent_runs: int = 4,
+               result_ttl: float = 600.0) -> FastAPI:
+    """创建 FastAPI 应用；system 为空时使用默认配置创建"""
+    system = system or ResearchMultiAgentSystem(sessions_per_server=max(1, min(max_concurrent_runs, 4)))
+    manager = ResearchJobManager(
+        lambda domain, days, on_token: system.run_research(domain, days, on_token=on_token),
+        max_concurrent_runs=max_concurrent_runs,
+        result_ttl=result_ttl,
+    )
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await system.start()
+        try:
+            yield
+        finally:
+            await manager.aclose()
+            await system.aclose()
+
+    app = FastAPI(title="Research Multi-Agent Service", lifespan=lifespan)
+    app.state.system = system
+    app.state.jobs = manager
+
+    @app.post("/research", status_code=202)
+    async def submit(request: ResearchRequest):
+        job, disposition = manager.submit(request.domain, request.days, request.fresh)
+        if request.stream:
+            return sse_response(job, disposition)
+        return {**job.info(), "disposition": disposition}
+
+    @app.get("/research/{job_id}")
+    async def status(job_id: str):
+        job = manager.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"任务不存在：{job_id}")
+        return {**job.info(), "result": job_result(job)}
+
+    @app.get("/research/{job_id}/stream")
+    async def stream(job_id: str):
+        job = manager.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"任务不存在：{job_id}")
+        return sse_response(job)
+
+    @app.get("/health")
+    async def health():
+        return {
+            "status": "ok" if system.mcp_pool.started else "starting",
+            "jobs": manager.snapshot(),
+            "circuits": [system.paper_agent.breaker.snapshot(), system.video_agent.breaker.snapshot()],
+            "llm_cache": system.blog_agent.llm_cache.stats() if system.blog_agent.llm_cache else None,
+        }
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        lines = [f"research_jobs_{name} {value}" for name, value in manager.snapshot().items()]
+        return tracer.prometheus_text() + "\n".join(lines) + "\n"
+
+    return app
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Research Multi-Agent HTTP Service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-concurrency", type=int, default=4, help="同时运行的工作流数量，其余排队")
+    parser.add_argument("--result-ttl", type=float, default=600, help="结果缓存时间（秒），0 表示不缓存")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    uvicorn.run(
+        create_app(max_concurrent_runs=args.max_concurrency, result_ttl=args.result_ttl),
+        host=args.host,
+        port=args.port,
+    )
@@ -0,0 +1,19 @@
+from typing import Callable
+
+import pytest
+
+from utils.types import PaperInfo
+
+SUMMARY = (
+    "We propose a graph neural network that learns message passing schedules "
+    "from data and improves accuracy on molecular property prediction benchmarks."
+)
+
+
+@pytest.fixture
+def make_paper() -> Callable[..., PaperInfo]:
+    """构造测试用的 PaperInfo"""
+    def make(arxiv_id: str, title: str, summary: str = SUMMARY, published: str = "2024-01-02") -> PaperInfo:
+        return PaperInfo(title=title, authors=["A. Author"], summary=summary, published=published,
+                         arxiv_id=arxiv_id, url=f"http://arxiv.org/abs/{arxiv_id}")
+    return make
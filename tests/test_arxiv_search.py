@@ -0,0 +1,143 @@
+import asyncio
+import json
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+
+from mcp_servers import arxiv_server
+from utils.paper_store import PaperStore
+from utils.rate_limit import AsyncRateLimiter
+
+NOW = datetime.now(timezone.utc)
+
+
+def fake_result(i: int, published: datetime, updated: datetime = None) -> SimpleNamespace:
+    return SimpleNamespace(
+        entry_id=f"http://arxiv.org/abs/2401.{i:05d}v1", title=f"Paper {i}", authors=[],
+        summary=f"Summary {i}", published=published, updated=updated or published,
+    )
+
+
+@pytest.fixture
+def feed(monkeypatch):
+    """离线的 arXiv 结果流：按提交时间倒序，遵守查询中的 submittedDate 起点，fetch_page 记录每次请求"""
+    state = SimpleNamespace(results=[], requests=[], delay=0.0)
+
+    def fetch_page(query: str, offset: int, page_size: int) -> List[SimpleNamespace]:
+        state.requests.append((query, offset, page_size))
+        time.sleep(state.delay)
+        results = state.results
+        match = re.search(r"submittedDate:\[(\d{12}) TO", query)
+        if match:
+            since = datetime.strptime(match.group(1), "%Y%m%d%H%M").replace(tzinfo=timezone.utc)
+            results = [result for result in results if result.updated >= since]
+        return results[offset:offset + page_size]
+
+    monkeypatch.setattr(arxiv_server, "fetch_page", fetch_page)
+    monkeypatch.setattr(arxiv_server, "_store", PaperStore(":memory:"))
+    monkeypatch.setattr(arxiv_server, "_rate_limiter", AsyncRateLimiter(0))
+    monkeypatch.setattr(arxiv_server, "CACHE_ENABLED", True)
+    return state
+
+
+def hourly(count: int, start: int = 0) -> List[SimpleNamespace]:
+    return [fake_result(i, NOW - timedelta(hours=i + 1)) for i in range(start, start + count)]
+
+
+def fetch(*args, **kwargs) -> dict:
+    return asyncio.run(arxiv_server.fetch_window(*args, **kwargs))
+
+
+def search(**kwargs) -> dict:
+    return json.loads(asyncio.run(arxiv_server.search_recent_papers(**kwargs)))
+
+
+def test_build_search_query_pushes_the_window_into_the_query():
+    start, end = datetime(2024, 1, 1, 8, 30), datetime(2024, 1, 8, 9, 0)
+    assert arxiv_server.build_search_query("graph learning", start, end, ["cs.LG", "cat:cs.AI"]) == (
+        "(all:graph learning) AND (cat:cs.LG OR cat:cs.AI) AND submittedDate:[202401010830 TO 202401080900]"
+    )
+    assert arxiv_server.build_search_query("", start, end, ["cs.LG"]) == (
+        "cat:cs.LG AND submittedDate:[202401010830 TO 202401080900]"
+    )
+
+
+def test_pages_until_the_window_is_exhausted(feed):
+    feed.results = hourly(250)
+    result = fetch("q", NOW - timedelta(days=30), NOW - timedelta(days=30), None, 100)
+    assert [offset for _, offset, _ in feed.requests] == [0, 100, 200]
+    assert result["requests"] == 3 and result["fetched"] == 250 and len(result["records"]) == 250
+    assert not result["truncated"] and not result["partial"]
+
+
+def test_stops_paging_at_the_first_result_before_fetch_from(feed):
+    feed.results = hourly(150)
+    result = fetch("q", NOW - timedelta(days=30), NOW - timedelta(hours=50), None, 100)
+    assert len(feed.requests) == 1
+    assert len(result["records"]) == 50
+
+
+def test_new_versions_of_old_papers_are_skipped(feed):
+    feed.results = [
+        fake_result(0, NOW - timedelta(hours=1)),
+        fake_result(1, NOW - timedelta(days=400), updated=NOW - timedelta(hours=2)),
+    ]
+    result = fetch("q", NOW - timedelta(days=7), NOW - timedelta(days=7), None, 100)
+    assert [record["arxiv_id"] for record in result["records"]] == ["2401.00000v1"]
+
+
+def test_max_results_caps_the_page_size_and_truncates(feed):
+    feed.results = hourly(50)
+    result = fetch("q", NOW - timedelta(days=30), NOW - timedelta(days=30), 10, 100)
+    assert feed.requests[0][2] == 10
+    assert len(result["records"]) == 10 and result["truncated"]
+
+
+def test_deadline_returns_the_pages_fetched_so_far(feed):
+    feed.results = hourly(300)
+    feed.delay = 0.05
+    result = fetch("q", NOW - timedelta(days=30), NOW - timedelta(days=30), None, 100, deadline=0.08)
+    assert result["partial"] and result["truncated"]
+    assert result["requests"] == len(result["records"]) // 100 < 3
+
+
+def test_second_search_is_incremental_from_the_watermark(feed):
+    older = [fake_result(i, NOW - timedelta(days=i)) for i in (3, 4, 5)]
+    feed.results = older
+    first = search(domain="gnn", days=7)
+    assert first["meta"]["incremental"] is False
+    assert first["meta"]["kept"] == 3
+
+    # 新论文出现后只从水位线（减去回看时间）开始获取，更早的论文从缓存返回
+    feed.results = [fake_result(99, NOW - timedelta(minutes=5))] + older
+    second = search(domain="gnn", days=7)
+    assert second["meta"]["incremental"] is True
+    assert second["meta"]["fetched"] == 1
+    assert second["meta"]["kept"] == 4 and second["meta"]["cached"] == 3
+    assert second["papers"][0]["arxiv_id"] == "2401.00099v1"
+    since = (NOW - timedelta(hours=arxiv_server.CACHE_OVERLAP_HOURS)).strftime("%Y%m%d")
+    assert f"submittedDate:[{since}" in feed.requests[-1][0]
+
+
+def test_watermark_is_not_advanced_by_truncated_fetches(feed):
+    feed.results = hourly(20)
+    search(domain="gnn", days=7, max_results=5)
+    assert search(domain="gnn", days=7)["meta"]["incremental"] is False
+
+
+def test_refresh_refetches_the_whole_window(feed):
+    feed.results = hourly(5)
+    search(domain="gnn", days=7)
+    assert search(domain="gnn", days=7, refresh=True)["meta"]["incremental"] is False
+
+
+def test_categories_get_their_own_watermark(feed):
+    feed.results = hourly(3)
+    search(domain="gnn", days=7)
+    meta = search(domain="gnn", days=7, categories=["cs.LG"])["meta"]
+    assert meta["incremental"] is False
+    assert "cat:cs.LG" in meta["query"]
@@ -0,0 +1,165 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+
+from mcp_servers import arxiv_server
+from utils.paper_store import PaperStore
+from utils.rate_limit import AsyncRateLimiter
+
+PUBLISHED = datetime(2024, 1, 2, tzinfo=timezone.utc)
+
+
+def fake_result(arxiv_id: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        entry_id=f"http://arxiv.org/abs/{arxiv_id}v1", title=f"Title {arxiv_id}", authors=[],
+        summary=f"Summary {arxiv_id}", published=PUBLISHED, updated=PUBLISHED,
+    )
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """离线的 arXiv 服务器：内存论文库，fetch_by_ids 记录每次请求的 id"""
+    requests: List[List[str]] = []
+    state = SimpleNamespace(requests=requests, bad=set(), missing=set(), delay=0.0)
+
+    def fetch_by_ids(arxiv_ids: List[str]):
+        requests.append(list(arxiv_ids))
+        time.sleep(state.delay)
+        if state.bad & set(arxiv_ids):
+            raise RuntimeError("HTTP 400")
+        return [fake_result(arxiv_id) for arxiv_id in arxiv_ids if arxiv_id not in state.missing]
+
+    monkeypatch.setattr(arxiv_server, "fetch_by_ids", fetch_by_ids)
+    monkeypatch.setattr(arxiv_server, "_store", PaperStore(":memory:"))
+    monkeypatch.setattr(arxiv_server, "_rate_limiter", AsyncRateLimiter(0))
+    return state
+
+
+def details(*args, **kwargs) -> dict:
+    return json.loads(asyncio.run(arxiv_server.get_papers_details(*args, **kwargs)))
+
+
+def test_results_follow_input_order_and_keep_requested_ids(server):
+    ids = ["2401.00003", "arXiv:2401.00001", "2401.00002", "2401.00003"]
+    result = details(ids, fields=["title"])
+    assert result["papers"] == [
+        {"arxiv_id": "2401.00003", "title": "Title 2401.00003"},
+        {"arxiv_id": "2401.00001", "title": "Title 2401.00001"},
+        {"arxiv_id": "2401.00002", "title": "Title 2401.00002"},
+        {"arxiv_id": "2401.00003", "title": "Title 2401.00003"},
+    ]
+    assert result["meta"] == {"count": 4, "cached": 0, "fetched": 3, "failed": 0, "requests": 1}
+    assert server.requests == [["2401.00003", "2401.00001", "2401.00002"]]
+
+
+def test_second_call_is_served_from_the_store(server):
+    details(["2401.00001", "2401.00002"])
+    result = details(["2401.00002", "2401.00001v1"])
+    assert [paper["arxiv_id"] for paper in result["papers"]] == ["2401.00002", "2401.00001v1"]
+    assert result["meta"]["cached"] == 2
+    assert result["meta"]["requests"] == 0
+    assert len(server.requests) == 1
+
+
+def test_ids_are_fetched_in_chunks(server):
+    ids = [f"2401.{i:05d}" for i in range(25)]
+    result = details(ids, chunk_size=10)
+    assert [len(chunk) for chunk in server.requests] == [10, 10, 5]
+    assert result["meta"]["fetched"] == 25
+
+
+def test_invalid_ids_are_reported_without_a_request(server):
+    result = details(["not an id", "2401.00001"])
+    assert result["papers"][0] == {"arxiv_id": "not an id", "error": "Invalid arXiv id: 'not an id'"}
+    assert "error" not in result["papers"][1]
+    assert server.requests == [["2401.00001"]]
+
+
+def test_failed_chunk_is_bisected_to_the_bad_id(server):
+    server.bad.add("2401.00005")
+    ids = [f"2401.{i:05d}" for i in range(8)]
+    result = details(ids)
+    errors = {paper["arxiv_id"]: paper["error"] for paper in result["papers"] if "error" in paper}
+    assert errors == {"2401.00005": "Error fetching paper: HTTP 400"}
+    assert result["meta"]["fetched"] == 7
+    assert result["meta"]["failed"] == 1
+    assert result["meta"]["requests"] == len(server.requests) == 7
+
+
+def test_unknown_ids_are_marked_not_found(server):
+    server.missing.add("2401.99999")
+    result = details(["2401.99999"])
+    assert result["papers"] == [{"arxiv_id": "2401.99999", "error": "No paper found for arXiv id 2401.99999"}]
+
+
+def test_concurrent_calls_do_not_block_the_event_loop(server):
+    server.delay = 0.2
+
+    async def scenario():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        beat = asyncio.create_task(heartbeat())
+        started = time.perf_counter()
+        await asyncio.gather(*(arxiv_server.get_papers_details([f"2401.0000{i}"]) for i in range(4)))
+        elapsed = time.perf_counter() - started
+        beat.cancel()
+        return elapsed, ticks
+
+    elapsed, ticks = asyncio.run(scenario())
+    # 四个请求在线程池中并发执行，事件循环同时保持响应
+    assert elapsed < 0.6
+    assert ticks >= 10
+
+
+def test_requests_share_the_rate_limit(server, monkeypatch):
+    monkeypatch.setattr(arxiv_server, "_rate_limiter", AsyncRateLimiter(0.05))
+
+    async def scenario():
+        started = time.perf_counter()
+        await asyncio.gather(*(arxiv_server.get_papers_details([f"2401.0000{i}"]) for i in range(3)))
+        return time.perf_counter() - started
+
+    assert asyncio.run(scenario()) >= 0.1
+
+
+def test_clients_are_reused_per_thread_and_page_size():
+    clients = []
+    worker = threading.Thread(target=lambda: clients.append(arxiv_server.get_client(100)))
+    worker.start()
+    worker.join()
+    assert arxiv_server.get_client(100) is arxiv_server.get_client(100)
+    assert arxiv_server.get_client(100) is not arxiv_server.get_client(50)
+    assert arxiv_server.get_client(100) is not clients[0]
+    assert clients[0].delay_seconds == 0
+
+
+def test_paper_details_are_served_from_the_index(server):
+    first = asyncio.run(arxiv_server.get_paper_details("2401.00001"))
+    assert first.startswith("Published: 2024-01-02\nTitle: Title 2401.00001")
+    assert asyncio.run(arxiv_server.get_paper_details("2401.00001v1")) == first
+    assert server.requests == [["2401.00001"]]
+
+    server.missing.add("2401.99999")
+    assert asyncio.run(arxiv_server.get_paper_details("2401.99999")) == "No paper found for arXiv id 2401.99999"
+
+
+def test_search_paper_index_finds_papers_seen_by_any_tool(server):
+    details(["2401.00001", "2401.00002"])
+    result = json.loads(arxiv_server.search_paper_index("Summary 2401.00002", fields=["arxiv_id", "score"]))
+    assert [paper["arxiv_id"] for paper in result["papers"]] == ["2401.00002v1"]
+    assert result["papers"][0]["score"] > 0
+    assert json.loads(arxiv_server.search_paper_index(start_date="2024-02-01"))["meta"] == {"count": 0}
+    # 索引查询不访问网络
+    assert len(server.requests) == 1
@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+import pytest
+
+from benchmarks.fake_llm import FakeStreamingChatModel
+from main import ResearchMultiAgentSystem, blog_filename, load_domains, parse_args
+
+
+@pytest.fixture
+def system(monkeypatch):
+    """不启动 MCP 服务器的系统；run_research 由各测试替换"""
+    monkeypatch.setenv("PAPER_NOTES_CACHE_PATH", ":memory:")
+    system = ResearchMultiAgentSystem(llm=FakeStreamingChatModel(), llm_cache=False)
+
+    async def start():
+        pass
+
+    monkeypatch.setattr(system, "start", start)
+    return system
+
+
+def test_batch_bounds_concurrency_and_isolates_failures(system, monkeypatch, tmp_path):
+    state = {"running": 0, "peak": 0}
+
+    async def run_research(domain, days, papers=None):
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        await asyncio.sleep(0.01)
+        state["running"] -= 1
+        if domain == "broken":
+            raise RuntimeError("boom")
+        if domain == "empty":
+            return {"messages": [{"error": "LLM unavailable"}]}
+        return {"blog_content": f"# {domain}", "papers": [], "videos": []}
+
+    monkeypatch.setattr(system, "run_research", run_research)
+    domains = ["graph learning", "broken", "empty", "robotics", "vision"]
+    statuses = asyncio.run(system.run_research_batch(domains, max_concurrency=2, output_dir=str(tmp_path)))
+
+    assert state["peak"] == 2
+    assert [s["domain"] for s in statuses] == domains
+    assert [s["status"] for s in statuses] == ["ok", "failed", "failed", "ok", "ok"]
+    assert statuses[1]["errors"] == ["boom"] and statuses[2]["errors"] == ["LLM unavailable"]
+    assert (tmp_path / blog_filename("graph learning")).read_text(encoding="utf-8") == "# graph learning"
+    assert not (tmp_path / blog_filename("broken")).exists()
+    lines = (tmp_path / "batch_status.jsonl").read_text(encoding="utf-8").splitlines()
+    assert sorted(json.loads(line)["domain"] for line in lines) == sorted(domains)
+
+
+def test_batch_reports_write_failures_per_domain(system, monkeypatch, tmp_path):
+    async def run_research(domain, days, papers=None):
+        return {"blog_content": "# blog"}
+
+    monkeypatch.setattr(system, "run_research", run_research)
+    # 目标文件名已被目录占用，写入失败
+    (tmp_path / blog_filename("a")).mkdir()
+    statuses = asyncio.run(system.run_research_batch(["a", "b"], output_dir=str(tmp_path)))
+    assert statuses[0]["status"] == "failed" and "file" not in statuses[0]
+    assert statuses[0]["errors"][0].startswith("写入博客失败")
+    assert statuses[1]["status"] == "ok"
+
+
+def test_load_domains_merges_arguments_and_file(tmp_path):
+    path = tmp_path / "domains.txt"
+    path.write_text("# 注释\nrobotics\n\n graph learning \n", encoding="utf-8")
+    args = parse_args(["--domains", "graph learning", "vision", "--domains-file", str(path)])
+    assert load_domains(args) == ["graph learning", "vision", "robotics"]
@@ -0,0 +1,80 @@
+import asyncio
+import inspect
+import json
+import time
+
+import pytest
+
+from benchmarks import fake_arxiv_server, fake_youtube_server, fixtures
+from benchmarks.fake_llm import FakeStreamingChatModel
+from benchmarks.run_benchmark import compare, percentile, summarize
+from mcp_servers import arxiv_server, youtube_server
+
+
+def test_percentile_uses_nearest_rank():
+    values = [0.5, 0.1, 0.4, 0.2, 0.3]
+    assert percentile(values, 50) == 0.3
+    assert percentile(values, 95) == 0.5
+    assert percentile(values, 0) == 0.1
+    assert percentile([], 50) is None
+    assert summarize(values) == {"count": 5, "p50": 0.3, "p95": 0.5, "mean": 0.3, "max": 0.5}
+    assert summarize([])["mean"] is None
+
+
+@pytest.mark.parametrize("fake, real", [
+    (fake_arxiv_server.search_recent_papers, arxiv_server.search_recent_papers),
+    (fake_youtube_server.search_research_videos, youtube_server.search_research_videos),
+])
+def test_fake_servers_accept_the_real_arguments(fake, real):
+    assert set(inspect.signature(real).parameters) <= set(inspect.signature(fake).parameters)
+
+
+def test_fake_servers_return_the_wire_format(monkeypatch):
+    monkeypatch.setattr(fixtures, "BENCH_LATENCY_MS", 0)
+    monkeypatch.setattr(fixtures, "BENCH_JITTER_MS", 0)
+    papers = json.loads(asyncio.run(fake_arxiv_server.search_recent_papers("gnn", max_results=3, fields=["arxiv_id"])))
+    assert len(papers["papers"]) == 3 and set(papers["papers"][0]) == {"arxiv_id"}
+    assert papers["meta"]["partial"] is False
+    videos = json.loads(asyncio.run(fake_youtube_server.search_research_videos("gnn", max_results=2)))
+    assert [video["url"] for video in videos["videos"]] == [
+        "https://www.youtube.com/watch?v=bench000000", "https://www.youtube.com/watch?v=bench000001",
+    ]
+
+
+def test_simulated_latency_stops_at_the_deadline(monkeypatch):
+    monkeypatch.setattr(fixtures, "BENCH_LATENCY_MS", 1000)
+    monkeypatch.setattr(fixtures, "BENCH_JITTER_MS", 0)
+    assert asyncio.run(fixtures.simulate_latency(deadline=0.01)) is False
+    result = json.loads(asyncio.run(fake_arxiv_server.search_recent_papers("gnn", deadline=0.01)))
+    assert result["papers"] == [] and result["meta"]["partial"] is True
+
+
+def test_fake_llm_streams_at_the_configured_rate():
+    llm = FakeStreamingChatModel(ttft_s=0.05, tokens_per_s=1000, output_tokens=50)
+
+    async def stream(**kwargs):
+        chunks = [chunk async for chunk in llm.astream("prompt " * 40, **kwargs)]
+        usage = next(chunk.usage_metadata for chunk in chunks if chunk.usage_metadata)
+        return [chunk for chunk in chunks if chunk.content], usage
+
+    started = time.perf_counter()
+    tokens, usage = asyncio.run(stream())
+    # 首 token 延迟 0.05 秒 + 50 个 token 以每秒 1000 个输出
+    assert time.perf_counter() - started >= 0.1
+    assert len(tokens) == usage["output_tokens"] == 50
+    assert usage["input_tokens"] == 70
+    tokens, usage = asyncio.run(stream(max_tokens=10))
+    assert len(tokens) == usage["output_tokens"] == 10
+    assert asyncio.run(llm.ainvoke("prompt")).usage_metadata["output_tokens"] == llm.invoke_tokens
+
+
+def test_compare_reports_relative_changes(capsys):
+    def result(p50, startup):
+        stats = {"p50": p50, "p95": p50 * 2}
+        return {"commit": "abc", "mcp_startup_s": startup,
+                "levels": [{"concurrency": 1, "end_to_end": stats, "nodes": {"paper_retrieval": stats}}]}
+
+    compare(result(1.1, 2.0), result(1.0, 4.0))
+    output = capsys.readouterr().out
+    assert "并发 1 end_to_end：p50 +10.0%, p95 +10.0%" in output
+    assert "MCP 启动：-50.0%" in output
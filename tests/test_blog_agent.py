@@ -0,0 +1,135 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, List
+
+import pytest
+from langchain_core.outputs import ChatGenerationChunk
+
+from agents.blog_agent import BLOG_SECTIONS, ContentIntegrationAgent
+from benchmarks.fake_llm import FakeStreamingChatModel
+from utils.note_cache import PaperNoteCache
+from utils.types import PaperInfo
+
+
+def graph_papers(make_paper, n: int) -> List[PaperInfo]:
+    return [
+        make_paper(f"2401.{i:05d}", f"Graph learning method {i}",
+                   f"We study graph learning with message passing variant {i} and report results on benchmarks.")
+        for i in range(n)
+    ]
+
+
+def make_agent(**kwargs) -> ContentIntegrationAgent:
+    llm = FakeStreamingChatModel(ttft_s=0, tokens_per_s=1e6, output_tokens=20, invoke_tokens=20)
+    return ContentIntegrationAgent("test-key", llm=llm, **kwargs)
+
+
+def test_small_paper_sets_skip_map_reduce(make_paper):
+    agent = make_agent()
+    papers = graph_papers(make_paper, 3)
+    metrics = {}
+    assert asyncio.run(agent.prepare_papers("graph learning", papers, metrics)) == (papers, None, [])
+    assert "map" not in metrics
+
+
+def test_papers_over_budget_are_merged_not_dropped(make_paper):
+    agent = make_agent(paper_token_budget=800, note_cache=PaperNoteCache(":memory:"))
+    papers = graph_papers(make_paper, 40)
+    metrics = {}
+    selected, notes, merged = asyncio.run(agent.prepare_papers("graph learning", papers, metrics))
+
+    # 每篇论文都被浓缩，逐篇列出之外的论文全部进入 reduce
+    assert len(notes) == 40
+    assert metrics["map"]["papers"] == 40 and metrics["map"]["llm_calls"] == 40
+    assert 0 < len(selected) < 40
+    reduce = metrics["map"]["reduce"]
+    assert reduce["papers"] == 40 - len(selected)
+    assert reduce["rounds"] >= 1 and reduce["llm_calls"] >= 1 and reduce["failures"] == 0
+    assert merged
+
+    prompt = agent.build_prompt("graph learning", selected, [], notes, metrics, merged)
+    assert "其他相关论文（合并笔记）" in prompt
+    assert metrics["packing"]["papers_used"] == len(selected)
+    assert metrics["packing"]["summaries_used"] >= 1
+    assert metrics["packing"]["paper_tokens"] <= 800
+
+
+def test_notes_are_reused_from_the_cache(make_paper):
+    cache = PaperNoteCache(":memory:")
+    papers = graph_papers(make_paper, 12)
+    metrics = {}
+    asyncio.run(make_agent(note_cache=cache).prepare_papers("graph learning", papers, metrics))
+    assert metrics["map"]["llm_calls"] == 12
+
+    asyncio.run(make_agent(note_cache=cache).prepare_papers("graph learning", papers, metrics))
+    assert metrics["map"]["llm_calls"] == 0
+    assert metrics["map"]["cache_hits"] == 12
+
+
+def test_failed_reduce_falls_back_to_truncated_notes(make_paper):
+    agent = make_agent(paper_token_budget=800)
+
+    async def fail(texts):
+        raise RuntimeError("boom")
+
+    agent._reduce_group = fail
+    papers = graph_papers(make_paper, 40)
+    metrics = {}
+    selected, notes, merged = asyncio.run(agent.prepare_papers("graph learning", papers, metrics))
+    assert metrics["map"]["reduce"]["failures"] >= 1
+    assert merged and all(merged)
+
+
+class FlakySectionModel(FakeStreamingChatModel):
+    """指定的节第一次生成时失败，记录每个节收到的调用次数"""
+
+    fail_section: str = "深度解读"
+    calls: Dict[str, int] = {}
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        prompt = str(messages[-1].content)
+        section = next((name for name, *_ in BLOG_SECTIONS if f'撰写"{name}"部分' in prompt), "outline")
+        self.calls[section] = self.calls.get(section, 0) + 1
+        if section == self.fail_section and self.calls[section] == 1:
+            raise RuntimeError("stream reset")
+        async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+            yield chunk
+
+
+def sectioned_agent(**kwargs) -> ContentIntegrationAgent:
+    llm = FlakySectionModel(ttft_s=0, tokens_per_s=1e6, output_tokens=20, calls={})
+    return ContentIntegrationAgent("test-key", llm=llm, sectioned=True, **kwargs)
+
+
+def test_sectioned_mode_raises_llm_concurrency_to_the_section_count():
+    assert sectioned_agent(max_concurrent_llm_calls=2).llm_semaphore._value == len(BLOG_SECTIONS)
+    assert make_agent(max_concurrent_llm_calls=2).llm_semaphore._value == 2
+
+
+def test_failed_section_is_retried_on_its_own(make_paper):
+    agent = sectioned_agent()
+    emitted: List[str] = []
+
+    async def emit(text: str):
+        emitted.append(text)
+
+    metrics: Dict[str, Any] = {}
+    blog = asyncio.run(agent.generate_sectioned("graph learning", graph_papers(make_paper, 1), [], emit, metrics))
+
+    calls = agent.llm.calls
+    assert calls.pop("深度解读") == 2
+    assert calls == {"outline": 1, **{name: 1 for name, *_ in BLOG_SECTIONS if name != "深度解读"}}
+    attempts = {m["section"]: m["attempts"] for m in metrics["sections"]["sections"]}
+    assert attempts["深度解读"] == 2 and sum(attempts.values()) == len(BLOG_SECTIONS) + 1
+    # 各节按顺序拼接
+    assert [line for line in blog.splitlines() if line.startswith("## ")] == [f"## {name}" for name, *_ in BLOG_SECTIONS]
+    assert "".join(emitted) == blog
+
+
+def test_section_failing_every_attempt_fails_the_blog(make_paper):
+    agent = sectioned_agent(section_attempts=1)
+
+    async def emit(text: str):
+        pass
+
+    with pytest.raises(RuntimeError, match="stream reset"):
+        asyncio.run(agent.generate_sectioned("graph learning", graph_papers(make_paper, 1), [], emit, {}))
@@ -0,0 +1,157 @@
+import asyncio
+import operator
+import sqlite3
+import time
+from typing import Annotated, List, Optional
+
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.graph import END, START, StateGraph
+from typing_extensions import TypedDict
+
+from utils.checkpoint import SQLiteCheckpointSaver
+from utils.types import PaperInfo
+
+PAPER = PaperInfo(title="T", authors=["A"], summary="S", published="2024-01-02",
+                  arxiv_id="2401.00001v1", url="http://arxiv.org/abs/2401.00001v1")
+
+
+def config(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+
+
+def put(saver: SQLiteCheckpointSaver, thread_id: str, parent: Optional[dict] = None, **values) -> dict:
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = values
+    return saver.put(parent or config(thread_id), checkpoint, {"step": len(values)}, {})
+
+
+def test_put_and_get_round_trip_with_custom_types():
+    saver = SQLiteCheckpointSaver(":memory:")
+    saved = put(saver, "run", papers=[PAPER])
+    saver.put_writes(saved, [("blog_content", "hello")], task_id="task-1")
+
+    latest = saver.get_tuple(config("run"))
+    assert latest.config == saved
+    assert latest.checkpoint["channel_values"]["papers"] == [PAPER]
+    assert latest.metadata["step"] == 1
+    assert latest.pending_writes == [("task-1", "blog_content", "hello")]
+    assert saver.get_tuple(config("missing")) is None
+
+
+def test_list_is_newest_first_with_parents():
+    saver = SQLiteCheckpointSaver(":memory:")
+    first = put(saver, "run", step=1)
+    second = put(saver, "run", parent=first, step=2)
+
+    listed = list(saver.list(config("run")))
+    assert [item.config for item in listed] == [second, first]
+    assert listed[0].parent_config == first
+    assert listed[1].parent_config is None
+    assert [item.config for item in saver.list(config("run"), limit=1)] == [second]
+
+
+def test_prune_keeps_latest_checkpoint():
+    saver = SQLiteCheckpointSaver(":memory:")
+    first = put(saver, "run", step=1)
+    second = put(saver, "run", parent=first, step=2)
+    saver.prune(["run"])
+
+    listed = list(saver.list(config("run")))
+    assert [item.config for item in listed] == [second]
+    assert listed[0].parent_config is None
+
+
+def test_evict_caps_threads_and_runs_periodically_on_put():
+    saver = SQLiteCheckpointSaver(":memory:", max_threads=2, evict_interval=60)
+    for thread_id in ("a", "b", "c"):
+        put(saver, thread_id)
+        time.sleep(0.001)
+    assert saver.get_tuple(config("a")) is not None
+
+    saver._last_evict -= 60
+    put(saver, "d")
+    assert [saver.get_tuple(config(t)) is not None for t in "abcd"] == [False, False, True, True]
+
+
+class State(TypedDict):
+    steps: Annotated[List[str], operator.add]
+
+
+def test_resume_reruns_only_the_failed_node():
+    calls = {"fetch": 0, "write": 0}
+
+    def fetch(state: State):
+        calls["fetch"] += 1
+        return {"steps": ["fetch"]}
+
+    def write(state: State):
+        calls["write"] += 1
+        if calls["write"] == 1:
+            raise RuntimeError("boom")
+        return {"steps": ["write"]}
+
+    graph = StateGraph(State)
+    graph.add_node("fetch", fetch)
+    graph.add_node("write", write)
+    graph.add_edge(START, "fetch")
+    graph.add_edge("fetch", "write")
+    graph.add_edge("write", END)
+    app = graph.compile(checkpointer=SQLiteCheckpointSaver(":memory:"))
+
+    run = {"configurable": {"thread_id": "resume"}}
+    try:
+        app.invoke({"steps": []}, run)
+    except RuntimeError:
+        pass
+    result = app.invoke(None, run)
+
+    assert result["steps"] == ["fetch", "write"]
+    assert calls == {"fetch": 1, "write": 2}
+
+
+def test_async_resume_and_ttl_eviction():
+    calls = {"write": 0}
+
+    async def write(state: State):
+        calls["write"] += 1
+        if calls["write"] == 1:
+            raise RuntimeError("boom")
+        return {"steps": ["write"]}
+
+    graph = StateGraph(State)
+    graph.add_node("write", write)
+    graph.add_edge(START, "write")
+    graph.add_edge("write", END)
+    saver = SQLiteCheckpointSaver(":memory:", ttl_days=1)
+    app = graph.compile(checkpointer=saver)
+
+    async def main():
+        run = {"configurable": {"thread_id": "async"}}
+        try:
+            await app.ainvoke({"steps": []}, run)
+        except RuntimeError:
+            pass
+        result = await app.ainvoke(None, run)
+        await saver.aprune(["async"])
+        return result
+
+    assert asyncio.run(main())["steps"] == ["write"]
+    assert len(list(saver.list(config("async")))) == 1
+
+    saver.conn.execute("UPDATE checkpoint_threads SET updated = ?", (time.time() - 2 * 86400,))
+    assert saver.evict() == 1
+    assert saver.get_tuple(config("async")) is None
+
+
+def test_old_schema_is_replaced(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        "CREATE TABLE checkpoints (thread_id TEXT, checkpoint_ns TEXT, checkpoint_id TEXT, "
+        "metadata_type TEXT NOT NULL, created REAL NOT NULL);"
+        "CREATE TABLE checkpoint_writes (thread_id TEXT);"
+    )
+    conn.close()
+    saver = SQLiteCheckpointSaver(path)
+    saved = put(saver, "run", step=1)
+    assert saver.get_tuple(config("run")).config == saved
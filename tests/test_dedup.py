@@ -0,0 +1,109 @@
+from utils.dedup import (
+    canonical_youtube_url,
+    dedupe,
+    dedupe_papers,
+    dedupe_videos,
+    is_arxiv_id,
+    near_duplicate_groups,
+    normalize_arxiv_id,
+    youtube_video_id,
+)
+
+
+def test_normalize_arxiv_id():
+    assert normalize_arxiv_id("http://arxiv.org/abs/2401.00001v2") == "2401.00001"
+    assert normalize_arxiv_id("arXiv:2401.00001v3") == "2401.00001"
+    assert normalize_arxiv_id("hep-th/9901001v1") == "hep-th/9901001"
+
+
+def test_is_arxiv_id():
+    assert is_arxiv_id("2401.00001")
+    assert is_arxiv_id("2401.12345v2")
+    assert is_arxiv_id("math.GT/0309136")
+    assert not is_arxiv_id("not-an-id")
+    assert not is_arxiv_id("2401.1")
+
+
+def test_youtube_video_id_forms():
+    expected = "dQw4w9WgXcQ"
+    for url in (
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=10",
+        "https://youtu.be/dQw4w9WgXcQ",
+        "https://m.youtube.com/shorts/dQw4w9WgXcQ",
+        "https://youtube.com/embed/dQw4w9WgXcQ",
+    ):
+        assert youtube_video_id(url) == expected
+    assert youtube_video_id("https://example.com/watch?v=dQw4w9WgXcQ") is None
+    assert canonical_youtube_url("https://youtu.be/dQw4w9WgXcQ") == "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+def test_near_duplicate_groups():
+    texts = [
+        "Scaling laws for neural language models trained on web text",
+        "Protein structure prediction with equivariant transformers",
+        "Scaling laws for neural language models trained on web text!",
+    ]
+    assert near_duplicate_groups(texts) == [0, 1, 0]
+
+
+def test_dedupe_keeps_first_occurrence():
+    items = ["a-1", "b-1", "a-2", "c-1"]
+    unique = dedupe(items, key=lambda item: item.split("-")[0], text=lambda item: item * 20)
+    assert unique == ["a-1", "b-1", "c-1"]
+
+
+def test_dedupe_papers_keeps_latest_version(make_paper):
+    papers = [
+        make_paper("2401.00001v1", "Learned message passing schedules"),
+        make_paper("2401.00002v1", "Diffusion models for layout generation",
+                   "A diffusion model that generates document layouts conditioned on content."),
+        make_paper("2401.00001v2", "Learned message passing schedules"),
+    ]
+    unique = dedupe_papers(papers)
+    assert [paper.arxiv_id for paper in unique] == ["2401.00001v2", "2401.00002v1"]
+
+
+def test_dedupe_papers_removes_near_duplicates(make_paper):
+    papers = [
+        make_paper("2401.00001v1", "Learned message passing schedules"),
+        make_paper("2401.09999v1", "Learned Message-Passing Schedules"),
+    ]
+    assert [paper.arxiv_id for paper in dedupe_papers(papers)] == ["2401.00001v1"]
+
+
+CS229_DESCRIPTION = (
+    "For more information about Stanford's Artificial Intelligence professional and graduate programs, "
+    "visit: https://stanford.io/ai To follow along with the course schedule and syllabus, visit the course page."
+)
+
+
+def make_video(video_id: str, title: str, description: str = CS229_DESCRIPTION) -> dict:
+    return {"title": title, "url": f"https://www.youtube.com/watch?v={video_id}", "description": description}
+
+
+def test_dedupe_videos_keeps_lectures_of_a_series():
+    videos = [
+        make_video("aaaaaaaaaa5", "Stanford CS229: Machine Learning | Lecture 5"),
+        make_video("aaaaaaaaaa6", "Stanford CS229: Machine Learning | Lecture 6"),
+        make_video("aaaaaaaaaa7", "Stanford CS229: Machine Learning | Lecture 7"),
+    ]
+    assert dedupe_videos(videos) == videos
+
+
+def test_dedupe_videos_removes_reuploads():
+    original = make_video("aaaaaaaaaa5", "Stanford CS229: Machine Learning | Lecture 5")
+    videos = [
+        original,
+        make_video("bbbbbbbbbb5", "Stanford CS229 - Machine Learning - Lecture 5", "Reupload."),
+        make_video("cccccccccc5", "Stanford CS229: Machine Learning | Lecture 5 (HD)"),
+        make_video("aaaaaaaaaa5", "Same id, different link form"),
+    ]
+    assert dedupe_videos(videos) == [original]
+
+
+def test_dedupe_videos_needs_similar_descriptions_for_different_titles():
+    videos = [
+        make_video("aaaaaaaaaa1", "Graph neural networks explained", "An introduction to message passing."),
+        make_video("bbbbbbbbbb1", "Graph neural networks explained!!! (full)", "Podcast episode with guests."),
+    ]
+    assert len(dedupe_videos(videos)) == 2
@@ -0,0 +1,74 @@
+import time
+
+from utils.digest import UPDATES_HEADER, DigestStore, join_sections, merge_update, split_sections
+
+ARTICLE = """# 图学习：最新研究进展
+
+## 引言
+
+开场白。
+
+## 最新研究进展
+
+旧的进展。
+
+## 总结
+
+结束语。
+"""
+
+
+def test_split_and_join_round_trip():
+    sections = split_sections(ARTICLE)
+    assert [header for header, _ in sections] == [
+        "# 图学习：最新研究进展", "## 引言", "## 最新研究进展", "## 总结",
+    ]
+    assert sections[1] == ("## 引言", "开场白。")
+    assert join_sections(sections) == ARTICLE
+
+
+def test_split_keeps_text_before_first_header():
+    assert split_sections("前言\n\n## 标题\n正文") == [("", "前言"), ("## 标题", "正文")]
+
+
+def test_merge_update_inserts_before_progress_section():
+    merged = merge_update(split_sections(ARTICLE), "2024-01-02", progress="新论文 A", videos="新视频 B")
+    headers = [header for header, _ in merged]
+    assert headers.index(UPDATES_HEADER) == headers.index("## 最新研究进展") - 1
+    assert dict(merged)[UPDATES_HEADER] == "### 2024-01-02\n\n新论文 A\n\n新视频 B"
+    # 原文其余部分保持不变
+    assert dict(merged)["## 最新研究进展"] == "旧的进展。"
+
+
+def test_merge_update_prepends_and_caps_updates():
+    sections = split_sections(ARTICLE)
+    for day in range(1, 5):
+        sections = merge_update(sections, f"2024-01-0{day}", progress=f"更新 {day}", max_updates=3)
+    body = dict(sections)[UPDATES_HEADER]
+    assert [line for line in body.splitlines() if line.startswith("### ")] == [
+        "### 2024-01-04", "### 2024-01-03", "### 2024-01-02",
+    ]
+    assert sum(1 for header, _ in sections if header == UPDATES_HEADER) == 1
+
+
+def test_store_round_trip_and_caps_ids():
+    store = DigestStore(":memory:", max_ids=2)
+    store.put("Graph  Learning", ["b", "a", "b", "c"], ["v1"], [("## 引言", "开场白。")])
+    saved = store.get("graph learning")
+    assert saved["paper_ids"] == ["b", "a"]
+    assert saved["video_ids"] == ["v1"]
+    assert saved["sections"] == [("## 引言", "开场白。")]
+    store.delete("graph learning")
+    assert store.get("graph learning") is None
+
+
+def test_store_evicts_periodically_on_put():
+    store = DigestStore(":memory:", ttl_days=1, evict_interval=60)
+    store.put("old", [], [], [])
+    store.conn.execute("UPDATE digests SET updated = ?", (time.time() - 2 * 86400,))
+    store.put("new", [], [], [])
+    assert store.get("old") is not None
+    store._last_evict -= 60
+    store.put("newer", [], [], [])
+    assert store.get("old") is None
+    assert store.get("new") is not None
@@ -0,0 +1,25 @@
+import statistics
+
+import pytest
+
+from benchmarks.import_budget import TARGETS, forbidden_loaded, import_profile
+
+# 在新的解释器中多次导入，耗时约 10 秒；可用 -m "not import_budget" 跳过
+pytestmark = pytest.mark.import_budget
+
+REPEAT = 3
+
+
+@pytest.mark.parametrize("module", list(TARGETS))
+def test_cold_import_stays_within_budget(module):
+    budget_ms, forbidden = TARGETS[module]
+    samples = []
+    for _ in range(REPEAT):
+        elapsed, loaded = import_profile(module)
+        samples.append(elapsed)
+        assert forbidden_loaded(loaded, forbidden) == [], f"{module} 在导入时加载了重量级模块"
+    assert statistics.median(samples) <= budget_ms
+
+
+def test_forbidden_loaded_matches_submodules():
+    assert forbidden_loaded({"langgraph.graph", "mcp_servers"}, ("langgraph", "mcp")) == ["langgraph"]
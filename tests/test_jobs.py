@@ -0,0 +1,138 @@
+import asyncio
+
+from utils.jobs import ResearchJobManager, job_key
+
+
+class FakeResearch:
+    """记录每次执行；release 之前执行一直挂起"""
+
+    def __init__(self, tokens=("Hello", " world"), blog="# Blog"):
+        self.tokens = tokens
+        self.blog = blog
+        self.calls = []
+        self.running = 0
+        self.peak = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, domain, days, on_token):
+        self.calls.append((domain, days))
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            for token in self.tokens:
+                await on_token(token)
+            await self.release.wait()
+        finally:
+            self.running -= 1
+        return {"blog_content": self.blog, "messages": []}
+
+
+def test_job_key_is_normalized():
+    assert job_key("  Large  Language Models ", "7") == job_key("large language models", 7)
+
+
+def test_identical_requests_share_one_execution():
+    async def scenario():
+        research = FakeResearch()
+        manager = ResearchJobManager(research)
+        first, first_disposition = manager.submit("LLM Agents", 7)
+        second, second_disposition = manager.submit("llm  agents", 7)
+        other, _ = manager.submit("llm agents", 30)
+        await asyncio.sleep(0)
+        research.release.set()
+        await asyncio.gather(first.wait(), other.wait())
+        return research, manager, first, second, other, first_disposition, second_disposition
+
+    research, manager, first, second, other, first_disposition, second_disposition = asyncio.run(scenario())
+    assert (first_disposition, second_disposition) == ("new", "coalesced")
+    assert second is first and first.requests == 2
+    assert other is not first
+    assert sorted(research.calls) == [("LLM Agents", 7), ("llm agents", 30)]
+    assert first.status == "done" and first.result["blog_content"] == "# Blog"
+    assert manager.snapshot()["coalesced"] == 1 and manager.snapshot()["executed"] == 2
+
+
+def test_successful_results_are_reused_until_fresh():
+    async def scenario():
+        research = FakeResearch()
+        research.release.set()
+        manager = ResearchJobManager(research, result_ttl=60)
+        job, _ = manager.submit("llm", 7)
+        await job.wait()
+        cached, cached_disposition = manager.submit("LLM", 7)
+        fresh, fresh_disposition = manager.submit("llm", 7, fresh=True)
+        await fresh.wait()
+        return research, job, cached, cached_disposition, fresh, fresh_disposition
+
+    research, job, cached, cached_disposition, fresh, fresh_disposition = asyncio.run(scenario())
+    assert cached is job and cached_disposition == "cached"
+    assert fresh is not job and fresh_disposition == "new"
+    assert len(research.calls) == 2
+
+
+def test_failed_runs_are_not_cached():
+    async def scenario():
+        research = FakeResearch(blog="")
+        research.release.set()
+        manager = ResearchJobManager(research, result_ttl=60)
+        job, _ = manager.submit("llm", 7)
+        await job.wait()
+        _, disposition = manager.submit("llm", 7)
+        return job, disposition
+
+    job, disposition = asyncio.run(scenario())
+    assert job.status == "failed" and job.error == "未生成博客"
+    assert disposition == "new"
+
+
+def test_admission_limits_concurrent_runs():
+    async def scenario():
+        research = FakeResearch()
+        manager = ResearchJobManager(research, max_concurrent_runs=2)
+        jobs = [manager.submit(f"topic {i}", 7)[0] for i in range(5)]
+        await asyncio.sleep(0.01)
+        snapshot = manager.snapshot()
+        research.release.set()
+        await asyncio.gather(*(job.wait() for job in jobs))
+        return research, snapshot
+
+    research, snapshot = asyncio.run(scenario())
+    assert research.peak == 2
+    assert (snapshot["running"], snapshot["queued"]) == (2, 3)
+
+
+def test_late_subscribers_replay_tokens():
+    async def scenario():
+        research = FakeResearch()
+        manager = ResearchJobManager(research)
+        job, _ = manager.submit("llm", 7)
+        await asyncio.sleep(0.01)
+
+        async def collect():
+            return [token async for token in job.stream()]
+
+        early = asyncio.create_task(collect())
+        await asyncio.sleep(0)
+        research.release.set()
+        await job.wait()
+        late = await collect()
+        return await early, late
+
+    early, late = asyncio.run(scenario())
+    assert early == late == ["Hello", " world"]
+
+
+def test_aclose_cancels_and_wakes_subscribers():
+    async def scenario():
+        research = FakeResearch()
+        manager = ResearchJobManager(research)
+        job, _ = manager.submit("llm", 7)
+        await asyncio.sleep(0.01)
+        subscriber = asyncio.create_task(job.wait())
+        await manager.aclose()
+        await asyncio.wait_for(subscriber, 1)
+        return manager, job
+
+    manager, job = asyncio.run(scenario())
+    assert (job.status, job.error) == ("failed", "cancelled")
+    assert manager.snapshot()["running"] == 0
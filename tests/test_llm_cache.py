@@ -0,0 +1,56 @@
+import time
+
+from utils.llm_cache import SQLiteLLMCache, cache_key
+from utils.tracing import Tracer
+
+
+def test_cache_key_covers_generation_params():
+    key = cache_key("gpt-4o-mini", 0.7, "prompt")
+    assert key == cache_key("gpt-4o-mini", 0.7, "prompt", max_tokens=None)
+    assert key != cache_key("gpt-4o-mini", 0.7, "prompt", max_tokens=300)
+    assert cache_key("m", 0.7, "p", max_tokens=300) != cache_key("m", 0.7, "p", max_tokens=900)
+    assert key != cache_key("gpt-4o-mini", 0.2, "prompt")
+    assert key != cache_key("gpt-4o", 0.7, "prompt")
+
+
+def test_put_get_and_stats():
+    cache = SQLiteLLMCache(":memory:")
+    assert cache.get("k") is None
+    cache.put("k", "m", "response")
+    assert cache.get("k") == "response"
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_expired_entries_are_not_returned():
+    cache = SQLiteLLMCache(":memory:", ttl_days=1)
+    cache.put("k", "m", "response")
+    cache.conn.execute("UPDATE llm_responses SET created = ?", (time.time() - 2 * 86400,))
+    assert cache.get("k") is None
+    assert cache.evict() == 1
+
+
+def test_put_evicts_least_recently_used_on_an_interval():
+    cache = SQLiteLLMCache(":memory:", max_entries=2, evict_interval=60)
+    for key in ("a", "b", "c"):
+        cache.put(key, "m", key)
+        time.sleep(0.001)
+    # 间隔未到，写入不触发淘汰
+    assert cache.conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0] == 3
+
+    cache.get("a")
+    cache._last_evict -= 60
+    cache.put("d", "m", "d")
+    assert sorted(row[0] for row in cache.conn.execute("SELECT key FROM llm_responses")) == ["a", "d"]
+
+
+def test_hits_and_misses_are_exported_as_counters(monkeypatch):
+    traced = Tracer(enabled=True)
+    monkeypatch.setattr("utils.llm_cache.tracer", traced)
+    cache = SQLiteLLMCache(":memory:")
+    cache.get("k")
+    cache.put("k", "m", "response")
+    cache.get("k")
+    cache.get("k")
+    text = traced.prometheus_text()
+    assert 'research_llm_cache_requests_total{result="hit"} 2' in text
+    assert 'research_llm_cache_requests_total{result="miss"} 1' in text
@@ -0,0 +1,166 @@
+import asyncio
+from types import SimpleNamespace
+
+import anyio
+import pytest
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED, ErrorData, TextContent
+
+from utils.mcp_pool import MCPSessionPool, MCPToolError, _PooledSession
+
+
+def text_result(text: str, is_error: bool = False) -> SimpleNamespace:
+    return SimpleNamespace(content=[TextContent(type="text", text=text)], isError=is_error)
+
+
+class FakeSession:
+    """按脚本依次返回结果或抛出异常的 MCP 客户端会话"""
+
+    def __init__(self, script, pings):
+        self.script = script
+        self.pings = pings
+
+    async def call_tool(self, name, arguments):
+        await asyncio.sleep(0)
+        outcome = self.script.pop(0) if self.script else text_result("ok")
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    async def send_ping(self):
+        outcome = self.pings.pop(0) if self.pings else None
+        if isinstance(outcome, BaseException):
+            raise outcome
+
+
+class FakePooledSession(_PooledSession):
+    """不启动子进程的会话：start 只创建新的 FakeSession 并递增代数"""
+
+    def __init__(self, server: str):
+        super().__init__(server, None)
+        self.script = []
+        self.pings = []
+        self.starts = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None
+
+    async def start(self, timeout: float):
+        self.generation += 1
+        self.starts += 1
+        self.session = FakeSession(self.script, self.pings)
+
+    async def stop(self):
+        self.session = None
+
+
+def make_pool(sessions: int = 1, calls_per_session: int = 1):
+    pool = MCPSessionPool(servers={"fake": {"command": "unused"}}, sessions_per_server=sessions)
+    pooled = [FakePooledSession("fake") for _ in range(sessions)]
+    for session in pooled:
+        asyncio.run(session.start(1))
+    queue = asyncio.Queue()
+    for _ in range(calls_per_session):
+        for session in pooled:
+            queue.put_nowait(session)
+    pool._sessions["fake"] = pooled
+    pool._idle["fake"] = queue
+    pool._tools["fake"] = {"echo": SimpleNamespace(name="echo")}
+    pool.started = True
+    return pool, pooled
+
+
+def test_call_returns_text():
+    pool, _ = make_pool()
+    assert asyncio.run(pool.call_tool("fake", "echo", {})) == "ok"
+
+
+def test_unknown_tool_raises_key_error():
+    pool, _ = make_pool()
+    with pytest.raises(KeyError):
+        asyncio.run(pool.call_tool("fake", "missing", {}))
+
+
+def test_tool_error_result_raises_without_restart():
+    pool, (session,) = make_pool()
+    session.script.append(text_result("bad input", is_error=True))
+    with pytest.raises(MCPToolError, match="bad input"):
+        asyncio.run(pool.call_tool("fake", "echo", {}))
+    assert session.starts == 1
+
+
+def test_protocol_error_is_reraised_without_restart():
+    pool, (session,) = make_pool()
+    session.script.append(McpError(ErrorData(code=-32602, message="Invalid params")))
+    with pytest.raises(McpError, match="Invalid params"):
+        asyncio.run(pool.call_tool("fake", "echo", {}))
+    assert session.starts == 1
+    assert pool._idle["fake"].qsize() == 1
+
+
+@pytest.mark.parametrize("error", [
+    anyio.ClosedResourceError(),
+    BrokenPipeError(),
+    McpError(ErrorData(code=CONNECTION_CLOSED, message="Connection closed")),
+])
+def test_transport_error_restarts_and_retries_once(error):
+    pool, (session,) = make_pool()
+    session.script.append(error)
+    assert asyncio.run(pool.call_tool("fake", "echo", {})) == "ok"
+    assert session.starts == 2
+
+
+def test_dead_session_is_restarted_before_the_call():
+    pool, (session,) = make_pool()
+    asyncio.run(session.stop())
+    assert asyncio.run(pool.call_tool("fake", "echo", {})) == "ok"
+    assert session.starts == 2
+
+
+def test_concurrent_failures_restart_a_session_once():
+    pool, (session,) = make_pool(calls_per_session=4)
+    session.script.extend([anyio.BrokenResourceError()] * 4)
+
+    async def main():
+        return await asyncio.gather(*(pool.call_tool("fake", "echo", {}) for _ in range(4)))
+
+    assert asyncio.run(main()) == ["ok"] * 4
+    assert session.starts == 2
+
+
+def test_health_check_takes_one_token_per_session():
+    pool, sessions = make_pool(sessions=2, calls_per_session=3)
+    queue = pool._idle["fake"]
+    sizes = []
+
+    async def ping():
+        sizes.append(queue.qsize())
+
+    for session in sessions:
+        session.session.send_ping = ping
+    assert asyncio.run(pool.health_check()) == {"fake": 2}
+    # 检查期间同一会话的其余令牌仍可用于调用
+    assert min(sizes) >= 4
+    assert queue.qsize() == 6
+
+
+def test_health_check_restarts_unresponsive_sessions():
+    pool, (session,) = make_pool()
+    session.pings.append(RuntimeError("no pong"))
+    assert asyncio.run(pool.health_check()) == {"fake": 1}
+    assert session.starts == 2
+    assert pool._idle["fake"].qsize() == 1
+
+
+def test_health_check_skips_restart_done_by_a_call():
+    pool, (session,) = make_pool()
+
+    async def ping():
+        # ping 期间另一个调用已经重启了会话
+        await session.restart(1, session.generation)
+        raise RuntimeError("stale session")
+
+    session.session.send_ping = ping
+    assert asyncio.run(pool.health_check()) == {"fake": 1}
+    assert session.starts == 2
@@ -0,0 +1,45 @@
+import time
+
+from utils.note_cache import PaperNoteCache
+
+
+def test_put_and_get_many():
+    cache = PaperNoteCache(":memory:")
+    cache.put("2401.00001", "gpt-4o-mini", "笔记一")
+    cache.put("2401.00002", "gpt-4o-mini", "笔记二")
+    assert cache.get_many(["2401.00001", "2401.00002", "2401.99999"], "gpt-4o-mini") == {
+        "2401.00001": "笔记一", "2401.00002": "笔记二",
+    }
+
+
+def test_notes_are_separated_by_model():
+    cache = PaperNoteCache(":memory:")
+    cache.put("2401.00001", "gpt-4o-mini", "mini")
+    cache.put("2401.00001", "gpt-4o", "full")
+    assert cache.get_many(["2401.00001"], "gpt-4o") == {"2401.00001": "full"}
+    assert cache.get_many(["2401.00001"], "other") == {}
+
+
+def test_put_replaces_existing_note():
+    cache = PaperNoteCache(":memory:")
+    cache.put("2401.00001", "m", "old")
+    cache.put("2401.00001", "m", "new")
+    assert cache.get_many(["2401.00001"], "m") == {"2401.00001": "new"}
+
+
+def test_get_many_chunks_large_requests():
+    cache = PaperNoteCache(":memory:")
+    ids = [f"2401.{i:05d}" for i in range(1200)]
+    for arxiv_id in ids:
+        cache.put(arxiv_id, "m", arxiv_id)
+    assert len(cache.get_many(ids, "m")) == 1200
+
+
+def test_evict_removes_expired_notes():
+    cache = PaperNoteCache(":memory:", ttl_days=1)
+    cache.put("2401.00001", "m", "old")
+    cache.put("2401.00002", "m", "fresh")
+    cache.conn.execute("UPDATE paper_notes SET created = ? WHERE arxiv_id = '2401.00001'",
+                       (time.time() - 2 * 86400,))
+    assert cache.evict() == 1
+    assert cache.get_many(["2401.00001", "2401.00002"], "m") == {"2401.00002": "fresh"}
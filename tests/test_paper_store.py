@@ -0,0 +1,99 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils.paper_store import PaperStore, query_key
+
+NOW = datetime.now(timezone.utc)
+
+
+def record(arxiv_id: str, published: datetime, title: str = "Attention is all you need") -> dict:
+    return {
+        "arxiv_id": arxiv_id, "title": title, "authors": ["Ashish Vaswani"],
+        "summary": "The dominant sequence transduction models are based on recurrent networks.",
+        "published": published.strftime("%Y-%m-%d"), "published_at": published.isoformat(),
+        "updated_at": published.isoformat(), "url": f"http://arxiv.org/abs/{arxiv_id}",
+    }
+
+
+@pytest.fixture
+def store():
+    return PaperStore(":memory:", ttl_days=30, max_papers=100)
+
+
+def test_query_key_is_normalized():
+    assert query_key(" LLM ", ["cat:cs.LG", "cs.AI"]) == query_key("llm", ["cs.AI", "cs.LG"]) == "llm|cs.AI,cs.LG"
+
+
+def test_window_and_watermark(store):
+    key = query_key("transformers")
+    store.upsert(key, [record("2401.00001v1", NOW - timedelta(days=1)), record("2401.00002v1", NOW - timedelta(days=9))])
+    store.set_watermark(key, NOW - timedelta(days=10), NOW)
+
+    assert [r["arxiv_id"] for r in store.window(key, NOW - timedelta(days=7))] == ["2401.00001v1"]
+    assert [r["arxiv_id"] for r in store.window(key, NOW - timedelta(days=10))] == ["2401.00001v1", "2401.00002v1"]
+    assert store.get_watermark(key) == (NOW - timedelta(days=10), NOW)
+    assert store.get_watermark(query_key("other")) is None
+
+
+def test_get_falls_back_to_latest_version(store):
+    store.upsert(None, [record("2401.00001v1", NOW), record("2401.00001v2", NOW + timedelta(days=1))])
+    assert store.get("2401.00001")["arxiv_id"] == "2401.00001v2"
+    assert store.get("2401.00001v1")["arxiv_id"] == "2401.00001v1"
+    assert set(store.get_many(["2401.00001", "2401.99999"])) == {"2401.00001"}
+
+
+def test_evict_keeps_old_papers_in_the_index(store):
+    published = datetime(2017, 6, 12, tzinfo=timezone.utc)
+    store.upsert(None, [record("1706.03762v7", published)])
+    store.evict()
+    assert store.get("1706.03762")["arxiv_id"] == "1706.03762v7"
+    assert [r["arxiv_id"] for r in store.search("attention")] == ["1706.03762v7"]
+
+
+def test_published_ttl_only_trims_the_window_cache(store):
+    key = query_key("transformers")
+    store.upsert(key, [record("2401.00001v1", NOW - timedelta(days=40)), record("2401.00002v1", NOW)])
+    store.set_watermark(key, NOW - timedelta(days=45), NOW)
+    store.evict()
+
+    covered_from, covered_to = store.get_watermark(key)
+    assert covered_from >= NOW - timedelta(days=30, minutes=1)
+    assert [r["arxiv_id"] for r in store.window(key, NOW - timedelta(days=60))] == ["2401.00002v1"]
+    assert store.get("2401.00001v1") is not None
+
+
+def test_index_is_capped_by_fetch_time_and_watermarks_shrink():
+    store = PaperStore(":memory:", ttl_days=30, max_papers=2)
+    key = query_key("transformers")
+    store.upsert(key, [record("2401.00001v1", NOW - timedelta(days=2))])
+    store.set_watermark(key, NOW - timedelta(days=7), NOW)
+    for i in (2, 3):
+        time.sleep(0.001)
+        store.upsert(None, [record(f"2401.0000{i}v1", datetime(2017, 1, 1, tzinfo=timezone.utc))])
+
+    assert store.evict() == 1
+    assert store.get("2401.00001v1") is None
+    # 被删除论文的发布时间之前的区间不再算作已覆盖
+    assert store.get_watermark(key)[0] > NOW - timedelta(days=2)
+    assert store.window(key, NOW - timedelta(days=7)) == []
+
+
+def test_index_ttl_uses_fetch_time():
+    store = PaperStore(":memory:", index_ttl_days=1)
+    store.upsert(None, [record("2401.00001v1", NOW), record("2401.00002v1", NOW)])
+    store.conn.execute("UPDATE papers SET fetched_at = ? WHERE arxiv_id = '2401.00001v1'", (time.time() - 2 * 86400,))
+    assert store.evict() == 1
+    assert store.get("2401.00001v1") is None
+    assert store.get("2401.00002v1") is not None
+
+
+def test_search_filters(store):
+    store.upsert(None, [
+        record("2401.00001v1", datetime(2024, 1, 1, tzinfo=timezone.utc), "Sparse attention kernels"),
+        record("2402.00001v1", datetime(2024, 2, 1, tzinfo=timezone.utc), "Graph transformers"),
+    ])
+    assert [r["arxiv_id"] for r in store.search("attention")] == ["2401.00001v1"]
+    assert [r["arxiv_id"] for r in store.search(start_date="2024-01-15")] == ["2402.00001v1"]
+    assert len(store.search(author="vaswani")) == 2
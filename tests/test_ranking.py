@@ -0,0 +1,56 @@
+from utils import ranking
+from utils.ranking import bm25_scores, count_tokens, fit, load_tokenizer, pack, rank, tokenize
+
+
+def test_tokenize_mixes_words_and_cjk():
+    assert tokenize("Graph 神经网络 v2") == ["graph", "神", "经", "网", "络", "v2"]
+
+
+def test_bm25_prefers_matching_documents():
+    documents = [
+        "protein folding with transformers",
+        "graph neural networks for molecules",
+        "graph neural networks graph pooling",
+    ]
+    scores = bm25_scores("graph neural", documents)
+    assert scores[0] == 0.0
+    assert scores[2] > scores[1] > 0.0
+
+
+def test_bm25_empty_query():
+    assert bm25_scores("", ["a", "b"]) == [0.0, 0.0]
+
+
+def test_rank_is_stable_for_ties_and_applies_boost():
+    items = ["alpha", "beta", "gamma"]
+    assert rank("unrelated", items, text=str) == items
+    assert rank("unrelated", items, text=str, boost=lambda item: item == "gamma") == ["gamma", "alpha", "beta"]
+
+
+def test_pack_skips_items_over_budget_and_renumbers():
+    items = ["short", "x" * 400, "tiny"]
+    render = lambda i, item: f"{i}. {item}"
+    packed, used = pack(items, render, budget=20)
+    assert packed == ["1. short", "2. tiny"]
+    assert used == sum(count_tokens(text) for text in packed)
+    assert used <= 20
+
+
+def test_pack_empty():
+    assert pack([], lambda i, item: item, budget=10) == ([], 0)
+
+
+def test_fit_returns_the_packed_items():
+    items = ["short", "x" * 400, "tiny"]
+    assert fit(items, lambda i, item: f"{i}. {item}", budget=20) == ["short", "tiny"]
+
+
+def test_tiktoken_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("RESEARCH_TIKTOKEN", "0")
+    ranking._encoding.cache_clear()
+    try:
+        assert load_tokenizer("gpt-4o-mini") is False
+        # 估算：中日韩文字每字一个 token，其余每 4 个字符一个 token
+        assert count_tokens("abcdefgh神经", "gpt-4o-mini") == 4
+    finally:
+        ranking._encoding.cache_clear()
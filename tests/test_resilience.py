@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.resilience import CircuitBreaker, CircuitOpenError, Deadline, DeadlineExceeded, failure_reason, retry
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def flaky(failures: int, result: str = "ok"):
+    calls = {"count": 0}
+
+    async def func() -> str:
+        calls["count"] += 1
+        if calls["count"] <= failures:
+            raise RuntimeError(f"failure {calls['count']}")
+        return result
+
+    return func, calls
+
+
+def test_deadline_cap_and_expiry():
+    assert Deadline().cap(5.0) == 5.0
+    assert Deadline().remaining() is None
+    deadline = Deadline.after(10.0)
+    assert 9.0 < deadline.cap() <= 10.0
+    assert deadline.cap(1.0) == 1.0
+    # margin 最多占剩余时间的 10%
+    assert deadline.cap(margin=100.0) >= 8.9
+    assert Deadline(time.monotonic() - 1).expired
+
+
+def test_deadline_run_raises_deadline_exceeded():
+    with pytest.raises(DeadlineExceeded):
+        run(Deadline.after(0.01).run(asyncio.sleep(1)))
+
+
+def test_breaker_opens_after_threshold_and_probes_once():
+    breaker = CircuitBreaker("src", failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    breaker.opened_at -= 60
+    assert breaker.state == "half_open"
+    breaker.check()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_failed_probe_reopens_breaker():
+    breaker = CircuitBreaker("src", failure_threshold=3, reset_timeout=60)
+    for _ in range(3):
+        breaker.record_failure()
+    breaker.opened_at -= 60
+    breaker.check()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_retry_succeeds_after_failures():
+    func, calls = flaky(2)
+    breaker = CircuitBreaker("src", failure_threshold=5)
+    assert run(retry(func, attempts=3, base_delay=0, breaker=breaker)) == "ok"
+    assert calls["count"] == 3
+    assert breaker.failures == 0
+
+
+def test_retry_raises_last_error():
+    func, calls = flaky(5)
+    with pytest.raises(RuntimeError, match="failure 3"):
+        run(retry(func, attempts=3, base_delay=0))
+    assert calls["count"] == 3
+
+
+def test_retry_fails_fast_when_breaker_open():
+    func, calls = flaky(5)
+    breaker = CircuitBreaker("src", failure_threshold=2, reset_timeout=60)
+    with pytest.raises(CircuitOpenError):
+        run(retry(func, attempts=5, base_delay=0, breaker=breaker))
+    assert calls["count"] == 2
+
+
+def test_retry_does_not_count_caller_deadline_as_failure():
+    breaker = CircuitBreaker("src", failure_threshold=1)
+    with pytest.raises(DeadlineExceeded):
+        run(retry(lambda: asyncio.sleep(1), attempts=3, deadline=Deadline.after(0.02), breaker=breaker))
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_retry_counts_attempt_timeout_as_failure():
+    breaker = CircuitBreaker("src", failure_threshold=1)
+    with pytest.raises(DeadlineExceeded):
+        run(retry(lambda: asyncio.sleep(1), attempts=1, deadline=Deadline.after(5),
+                  attempt_timeout=0.02, breaker=breaker))
+    assert breaker.state == "open"
+
+
+def test_failure_reason():
+    assert failure_reason(DeadlineExceeded()) == "deadline"
+    assert failure_reason(CircuitOpenError()) == "circuit_open"
+    assert failure_reason(RuntimeError()) == "error"
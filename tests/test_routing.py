@@ -0,0 +1,38 @@
+from utils.routing import DomainRouter, parse_subscription
+
+
+def test_parse_subscription():
+    assert parse_subscription("Large Language Models: LLM, llms, LLM") == (
+        "Large Language Models", ["large language models", "llm", "llms"],
+    )
+    assert parse_subscription("  graph learning ") == ("graph learning", ["graph learning"])
+
+
+def test_match_weights_title_over_summary():
+    router = DomainRouter({"llm": ["language model"], "vision": ["image"]})
+    assert router.match("A language model", "trained on image captions") == {"llm": 2.0, "vision": 1.0}
+    assert router.match("Unrelated", "nothing here") == {}
+
+
+def test_shared_keywords_route_to_every_subscriber():
+    router = DomainRouter({"a": ["diffusion"], "b": ["diffusion", "sampling"]})
+    assert router.match("Diffusion sampling", "") == {"a": 2.0, "b": 4.0}
+
+
+def test_route_orders_by_score_then_date_and_applies_limit(make_paper):
+    router = DomainRouter({"rl": ["reinforcement learning"], "graphs": ["graph"]})
+    papers = [
+        make_paper("2401.00001", "Policy gradients", "reinforcement learning for robots", "2024-01-03"),
+        make_paper("2401.00002", "Reinforcement learning at scale", "", "2024-01-01"),
+        make_paper("2401.00003", "Offline RL", "reinforcement learning from logs", "2024-01-05"),
+        make_paper("2401.00004", "Protein folding", "no match", "2024-01-05"),
+    ]
+    routed = router.route(papers)
+    assert [paper.arxiv_id for paper in routed["rl"]] == ["2401.00002", "2401.00003", "2401.00001"]
+    assert routed["graphs"] == []
+    assert [paper.arxiv_id for paper in router.route(papers, limit=2)["rl"]] == ["2401.00002", "2401.00003"]
+
+
+def test_domain_without_keywords_matches_its_name():
+    router = DomainRouter({"graph learning": []})
+    assert router.match("Advances in graph learning", "") == {"graph learning": 2.0}
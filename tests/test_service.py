@@ -0,0 +1,69 @@
+import json
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from service import create_app, sse_event
+
+
+class FakeSystem:
+    """替代 ResearchMultiAgentSystem：不启动 MCP 服务器，直接返回固定结果"""
+
+    def __init__(self, paper):
+        self.paper = paper
+        self.calls = []
+        self.mcp_pool = SimpleNamespace(started=False)
+        breaker = SimpleNamespace(snapshot=lambda: {"state": "closed"})
+        self.paper_agent = SimpleNamespace(breaker=breaker)
+        self.video_agent = SimpleNamespace(breaker=breaker)
+        self.blog_agent = SimpleNamespace(llm_cache=None)
+
+    async def start(self):
+        self.mcp_pool.started = True
+
+    async def aclose(self):
+        self.mcp_pool.started = False
+
+    async def run_research(self, domain, days, on_token=None):
+        self.calls.append((domain, days))
+        for token in ("# 博客", "\n正文"):
+            await on_token(token)
+        return {"blog_content": "# 博客\n正文", "papers": [self.paper], "videos": [], "messages": []}
+
+
+def parse_sse(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_sse_event_format():
+    assert sse_event("token", "你好") == 'event: token\ndata: "你好"\n\n'
+
+
+def test_streamed_request_and_replay(make_paper):
+    system = FakeSystem(make_paper("2401.00001v1", "Graph transformers"))
+    with TestClient(create_app(system)) as client:
+        assert client.get("/health").json()["status"] == "ok"
+        with client.stream("POST", "/research", json={"domain": "LLM", "stream": True}) as response:
+            assert response.headers["content-type"].startswith("text/event-stream")
+            events = parse_sse(response.read().decode())
+
+        assert [name for name, _ in events] == ["job", "token", "token", "done"]
+        assert events[0][1]["disposition"] == "new"
+        assert "".join(data for name, data in events if name == "token") == "# 博客\n正文"
+        assert events[-1][1]["status"] == "done"
+
+        job_id = events[0][1]["job_id"]
+        status = client.get(f"/research/{job_id}").json()
+        assert status["result"]["papers"][0]["arxiv_id"] == "2401.00001v1"
+        replay = parse_sse(client.get(f"/research/{job_id}/stream").text)
+        assert [data for name, data in replay if name == "token"] == ["# 博客", "\n正文"]
+
+        cached = client.post("/research", json={"domain": "llm"}).json()
+        assert (cached["job_id"], cached["disposition"]) == (job_id, "cached")
+        assert "research_jobs_cached 1" in client.get("/metrics").text
+        assert client.get("/research/missing").status_code == 404
+    assert system.calls == [("LLM", 7)]
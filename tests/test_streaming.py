@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from agents.blog_agent import ContentIntegrationAgent, stream_metrics
+from benchmarks.fake_llm import FakeStreamingChatModel
+from utils.llm_cache import SQLiteLLMCache
+from utils.streaming import TokenStream
+
+
+def test_token_stream_yields_tokens_then_result():
+    async def run(stream):
+        for token in ("a", "b", "c"):
+            stream.push(token)
+            await asyncio.sleep(0)
+        return {"blog_content": "abc"}
+
+    async def scenario():
+        stream = TokenStream().start(run)
+        return [token async for token in stream], stream.result
+
+    assert asyncio.run(scenario()) == (["a", "b", "c"], {"blog_content": "abc"})
+
+
+def test_token_stream_propagates_errors():
+    async def run(stream):
+        stream.push("a")
+        raise RuntimeError("boom")
+
+    async def scenario():
+        return [token async for token in TokenStream().start(run)]
+
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(scenario())
+
+
+def test_token_stream_cancels_the_workflow_when_the_consumer_stops():
+    cancelled = asyncio.Event()
+
+    async def run(stream):
+        stream.push("a")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def scenario():
+        stream = TokenStream().start(run)
+        tokens = stream.__aiter__()
+        assert await tokens.__anext__() == "a"
+        await tokens.aclose()
+        await asyncio.wait_for(cancelled.wait(), 1)
+
+    asyncio.run(scenario())
+
+
+def test_stream_metrics():
+    metrics = stream_metrics(10.0, 10.5, 12.5, 40, {"input_tokens": 300, "output_tokens": 100})
+    assert metrics == {"ttft_s": 0.5, "total_s": 2.5, "prompt_tokens": 300, "output_tokens": 100,
+                       "tokens_per_s": 50.0}
+    # 没有用量信息时以分块数近似；没有 token 时不计算 TTFT
+    assert stream_metrics(10.0, 10.5, 11.5, 40)["output_tokens"] == 40
+    assert stream_metrics(10.0, None, 11.0, 0)["ttft_s"] is None
+
+
+def test_astream_prompt_measures_ttft_and_replays_from_the_cache():
+    llm = FakeStreamingChatModel(ttft_s=0.05, tokens_per_s=1e4, output_tokens=30)
+    agent = ContentIntegrationAgent("test-key", llm=llm, llm_cache=SQLiteLLMCache(":memory:"))
+
+    async def generate():
+        metrics = {}
+        tokens = [token async for token in agent.astream_prompt("写一篇博客", metrics)]
+        return tokens, metrics
+
+    tokens, metrics = asyncio.run(generate())
+    assert len(tokens) == metrics["output_tokens"] == 30
+    assert 0.05 <= metrics["ttft_s"] <= metrics["total_s"]
+    assert metrics["prompt_tokens"] > 0 and metrics["llm_cache"] == "miss"
+
+    replayed, metrics = asyncio.run(generate())
+    assert "".join(replayed) == "".join(tokens)
+    assert metrics["llm_cache"] == "hit" and metrics["ttft_s"] < 0.05
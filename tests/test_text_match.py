@@ -0,0 +1,42 @@
+from utils.text_match import KeywordMatcher, academic_matcher, get_matcher, parse_keywords
+
+
+def test_parse_keywords():
+    assert parse_keywords(" Deep  Learning, ,GNN ") == ["deep learning", "gnn"]
+
+
+def test_ascii_keywords_need_word_boundaries_on_both_sides():
+    matcher = KeywordMatcher({"ai": 1.0})
+    assert matcher.score([("the aims of the project", 1.0)]) == 0.0
+    assert matcher.score([("he said so", 1.0)]) == 0.0
+    assert matcher.score([("ai4science", 1.0)]) == 0.0
+    assert matcher.score([("Generative AI, explained", 1.0)]) == 1.0
+
+
+def test_plural_form_matches_the_keyword():
+    matcher = KeywordMatcher({"transformer": 1.0, "llm": 2.0})
+    assert matcher.find("Vision Transformers and LLMs") == {"transformer", "llm"}
+    assert matcher.find("transformerless") == set()
+
+
+def test_longer_keywords_match_first_and_whitespace_is_flexible():
+    matcher = KeywordMatcher({"deep learning": 2.0, "deep": 1.0})
+    assert matcher.find("Deep\n  learning for graphs") == {"deep learning"}
+
+
+def test_non_ascii_keywords_match_as_substrings():
+    matcher = KeywordMatcher({"机器学习": 1.0})
+    assert matcher.score([("面向机器学习的编译器", 2.0)]) == 2.0
+
+
+def test_each_keyword_counts_once_per_field():
+    matcher = KeywordMatcher({"graph": 1.0, "research": 0.5})
+    fields = [("graph graph graph research", 2.0), ("graph", 1.0)]
+    assert matcher.score(fields) == 1.0 * 2.0 + 0.5 * 2.0 + 1.0
+
+
+def test_academic_matcher_weights_domain_keywords():
+    matcher = academic_matcher(["GNN"])
+    assert matcher.score([("GNN lecture", 1.0)]) == 3.0
+    assert academic_matcher(["gnn"]) is matcher
+    assert get_matcher({}).score([("anything", 1.0)]) == 0.0
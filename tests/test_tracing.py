@@ -0,0 +1,107 @@
+import asyncio
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from utils import tracing
+from utils.tracing import NOOP_SPAN, Tracer, trace_node
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer()
+    assert tracer.span("node.search") is NOOP_SPAN
+    tracer.add("research_llm_tokens_total", 10, kind="prompt")
+    assert tracer.spans() == []
+    assert "research_llm_tokens_total" not in tracer.prometheus_text()
+
+
+def test_spans_nest_across_tasks():
+    tracer = Tracer(enabled=True)
+
+    async def child(i):
+        with tracer.span("mcp.call_tool", index=i):
+            await asyncio.sleep(0)
+
+    async def scenario():
+        with tracer.span("node.search") as root:
+            await asyncio.gather(child(0), child(1))
+        return root
+
+    root = asyncio.run(scenario())
+    children = [s for s in tracer.spans() if s["name"] == "mcp.call_tool"]
+    assert len(children) == 2
+    assert all(s["parent_id"] == root.span_id and s["trace_id"] == root.trace_id for s in children)
+    assert tracer.spans(trace_id="other") == []
+    assert tracer.current_trace_id() is None
+
+
+def test_exceptions_mark_the_span_as_failed():
+    tracer = Tracer(enabled=True)
+    with pytest.raises(ValueError):
+        with tracer.span("llm.generate"):
+            raise ValueError("boom")
+    (span,) = tracer.spans()
+    assert (span["status"], span["error"]) == ("error", "ValueError: boom")
+
+
+def test_prometheus_text():
+    tracer = Tracer(enabled=True)
+    with tracer.span("node.search"):
+        pass
+    tracer.add("research_llm_tokens_total", 3, kind="completion")
+    tracer.add("research_llm_tokens_total", 4, kind="completion")
+    tracer.add("research_llm_ttft_seconds_sum", 0.25)
+
+    lines = tracer.prometheus_text().splitlines()
+    labels = 'span="node.search",status="ok"'
+    assert f'research_span_duration_seconds_bucket{{{labels},le="0.005"}} 1' in lines
+    assert f'research_span_duration_seconds_bucket{{{labels},le="+Inf"}} 1' in lines
+    assert f"research_span_duration_seconds_count{{{labels}}} 1" in lines
+    assert lines.count("# TYPE research_llm_tokens_total counter") == 1
+    assert 'research_llm_tokens_total{kind="completion"} 7' in lines
+    assert "research_llm_ttft_seconds_sum 0.25" in lines
+
+    tracer.reset()
+    assert "research_llm_tokens_total" not in tracer.prometheus_text()
+
+
+def test_spans_are_appended_to_the_jsonl_file(tmp_path):
+    path = tmp_path / "traces" / "spans.jsonl"
+    tracer = Tracer()
+    tracer.configure(True, str(path))
+    with tracer.span("node.blog", domain="llm"):
+        pass
+    tracer.configure(False)
+
+    (record,) = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert record["name"] == "node.blog"
+    assert record["attributes"] == {"domain": "llm"}
+    assert tracer.export_jsonl(str(tmp_path / "export.jsonl")) == 1
+
+
+def test_trace_file_env_enables_tracing(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    code = "from utils.tracing import tracer; print(tracer.enabled, tracer.jsonl_path)"
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+        cwd=Path(tracing.__file__).resolve().parent.parent,
+        env={"RESEARCH_TRACE_FILE": str(path), "PATH": ""},
+    ).stdout.split()
+    assert output == ["True", str(path)]
+
+
+def test_trace_node_records_returned_errors(monkeypatch):
+    tracer = Tracer(enabled=True)
+    monkeypatch.setattr(tracing, "tracer", tracer)
+
+    async def search(state):
+        return {"messages": [{"error": "arXiv unavailable"}]}
+
+    result = asyncio.run(trace_node("search", search)({"domain": "llm"}))
+    assert result == {"messages": [{"error": "arXiv unavailable"}]}
+    (span,) = tracer.spans()
+    assert span["name"] == "node.search"
+    assert (span["status"], span["error"]) == ("error", "arXiv unavailable")
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+from langgraph.graph import END, StateGraph
+from pydantic import ValidationError
+
+from utils.types import PaperInfo, ResearchState, concat, paper_search_adapter, video_search_adapter
+
+
+def test_concat_does_not_copy_when_one_side_is_empty():
+    papers = [1, 2]
+    assert concat([], papers) is papers
+    assert concat(papers, []) is papers
+    assert concat(papers, [3]) == [1, 2, 3]
+    assert papers == [1, 2]
+
+
+def test_search_results_are_validated_once_from_json(make_paper):
+    paper = make_paper("2401.00001v1", "Graph transformers")
+    payload = json.dumps({"papers": [paper.model_dump()], "meta": {"count": 1}})
+    result = paper_search_adapter.validate_json(payload)
+    assert result["papers"] == [paper] and isinstance(result["papers"][0], PaperInfo)
+    assert result["meta"] == {"count": 1}
+
+    videos = video_search_adapter.validate_json(
+        '{"videos": [{"title": "t", "url": "https://youtu.be/x", "description": ""}], "meta": {}}'
+    )
+    assert videos["videos"][0].channel is None
+
+
+def test_malformed_payloads_fail_at_the_boundary():
+    with pytest.raises(ValidationError):
+        paper_search_adapter.validate_json('{"papers": [{"title": "missing fields"}], "meta": {}}')
+
+
+def test_records_are_frozen(make_paper):
+    paper = make_paper("2401.00001v1", "Graph transformers")
+    with pytest.raises(ValidationError):
+        paper.title = "changed"
+
+
+def test_graph_passes_records_through_without_copies(make_paper):
+    papers = [make_paper(f"2401.{i:05d}v1", f"Paper {i}") for i in range(3)]
+    seen = {}
+
+    def retrieve(state):
+        return {"papers": papers, "messages": [{"agent": "papers"}]}
+
+    def integrate(state):
+        seen["papers"] = state["papers"]
+        return {"blog_content": "# blog", "messages": [{"agent": "blog"}]}
+
+    graph = StateGraph(ResearchState)
+    graph.add_node("retrieve", retrieve)
+    graph.add_node("integrate", integrate)
+    graph.set_entry_point("retrieve")
+    graph.add_edge("retrieve", "integrate")
+    graph.add_edge("integrate", END)
+    result = graph.compile().invoke({"domain": "gnn", "days": 7, "papers": [], "videos": [], "messages": []})
+
+    assert all(a is b for a, b in zip(seen["papers"], papers))
+    assert all(a is b for a, b in zip(result["papers"], papers))
+    assert [m["agent"] for m in result["messages"]] == ["papers", "blog"]
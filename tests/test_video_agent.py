@@ -0,0 +1,62 @@
+import asyncio
+import json
+
+from agents.video_agent import ResearchVideoAgent
+from utils.resilience import CircuitBreaker
+
+
+class FakePool:
+    """只提供 search_research_videos 的会话池，按顺序返回预设的查询统计"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+        self.arguments = None
+
+    async def start(self):
+        pass
+
+    def has_tool(self, server, name):
+        return name == "search_research_videos"
+
+    async def call_tool(self, server, name, arguments):
+        self.calls += 1
+        self.arguments = arguments
+        queries = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        return json.dumps({"videos": [], "meta": {"queries": queries, "partial": True}})
+
+
+def query(error=None, timed_out=False):
+    return {"query": "q", "count": 0, "elapsed_s": 1.0, "error": error, "timed_out": timed_out}
+
+
+def process(pool):
+    agent = ResearchVideoAgent(pool, attempts=2, breaker=CircuitBreaker("youtube", failure_threshold=5))
+    return agent, asyncio.run(agent.process({"domain": "graph learning"}))
+
+
+def test_timed_out_queries_are_partial_results_not_failures():
+    pool = FakePool([query("deadline 5s exceeded", timed_out=True), query("deadline 5s exceeded", timed_out=True)])
+    agent, result = process(pool)
+    assert pool.calls == 1
+    assert result["messages"][0]["action"] == "retrieved_videos"
+    assert result["messages"][0]["partial"] is True
+    assert agent.breaker.failures == 0
+    # 只请求 VideoInfo 读取的字段
+    assert pool.arguments["fields"] == ["title", "url", "description", "published", "channel", "score"]
+
+
+def test_all_queries_failing_is_retried_and_counted_by_the_breaker():
+    # 错误文本里出现 "deadline" 也不影响判断，只看 timed_out 标记
+    pool = FakePool([query("HTTP 429: deadline for quota"), query("timeout after 10s")])
+    agent, result = process(pool)
+    assert pool.calls == 2
+    assert "all queries failed" in result["messages"][0]["error"]
+    assert agent.breaker.failures == 2
+
+
+def test_one_successful_query_is_enough():
+    pool = FakePool([query("HTTP 500"), query()])
+    agent, result = process(pool)
+    assert pool.calls == 1
+    assert result["messages"][0]["action"] == "retrieved_videos"
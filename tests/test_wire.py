@@ -0,0 +1,36 @@
+import json
+
+from utils.wire import dumps, parse_fields, project, tool_result
+
+PAYLOAD = {"papers": [{"arxiv_id": "2401.00001", "title": "图神经网络"}], "meta": {"count": 1}}
+
+
+def test_dumps_is_compact_and_keeps_unicode():
+    text = dumps(PAYLOAD)
+    assert " " not in text
+    assert "图神经网络" in text
+    assert json.loads(text) == PAYLOAD
+
+
+def test_parse_fields():
+    assert parse_fields(None) is None
+    assert parse_fields([]) is None
+    assert parse_fields("title, url,") == ["title", "url"]
+    assert parse_fields(["title"]) == ["title"]
+    assert parse_fields(" , ") is None
+
+
+def test_project_keeps_requested_fields_that_exist():
+    records = [{"title": "a", "url": "u", "views": 3}, {"title": "b"}]
+    assert project(records, ["title", "url"]) == [{"title": "a", "url": "u"}, {"title": "b"}]
+    assert project(iter(records), None) == records
+
+
+def test_tool_result_defaults_to_json_text():
+    assert json.loads(tool_result(PAYLOAD)) == PAYLOAD
+
+
+def test_structured_result_sends_the_payload_once():
+    result = tool_result(PAYLOAD, structured=True)
+    assert result.structuredContent == PAYLOAD
+    assert [content.text for content in result.content] == ['{"papers":1}']
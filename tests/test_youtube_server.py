@@ -0,0 +1,79 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from mcp_servers import youtube_server
+from utils.rate_limit import AsyncRateLimiter
+
+
+@pytest.fixture
+def scraper(monkeypatch):
+    """离线抓取：每个查询阻塞 delay 秒，返回一个按查询区分的视频和一个所有查询共享的视频"""
+    calls = []
+
+    def scrape_query(query, max_results):
+        calls.append(query)
+        time.sleep(0.2 if query.endswith("study") else 0.1)
+        suffix = query.split()[-1][:4].ljust(4, "x")
+        return [
+            {"title": f"Graph networks {query}", "url": f"https://youtu.be/aaaaaaa{suffix}", "description": query},
+            {"title": "Shared lecture", "url": "https://www.youtube.com/watch?v=sharedvideo", "description": ""},
+        ]
+
+    monkeypatch.setattr(youtube_server, "scrape_query", scrape_query)
+    monkeypatch.setattr(youtube_server, "_rate_limiter", AsyncRateLimiter(0))
+    return calls
+
+
+def search(**kwargs) -> dict:
+    return json.loads(asyncio.run(youtube_server.search_research_videos(**kwargs)))
+
+
+def test_sub_queries_run_concurrently(scraper):
+    started = time.perf_counter()
+    result = search(domain="gnn", num_queries=3)
+    elapsed = time.perf_counter() - started
+    # 三个子查询串行需要 0.4 秒，并发时取决于最慢的一个
+    assert elapsed < 0.35
+    assert sorted(scraper) == ["gnn paper", "gnn research", "gnn study"]
+    assert [q["query"] for q in result["meta"]["queries"]] == ["gnn research", "gnn paper", "gnn study"]
+    assert result["meta"]["partial"] is False
+
+
+def test_results_are_merged_in_query_order_and_deduplicated(scraper):
+    result = search(domain="gnn", num_queries=3, fields=["title"])
+    assert [video["title"] for video in result["videos"]] == [
+        "Graph networks gnn research", "Shared lecture", "Graph networks gnn paper", "Graph networks gnn study",
+    ]
+    assert result["meta"]["duplicates"] == 2
+    assert len(search(domain="gnn", num_queries=3, max_results=2)["videos"]) == 2
+
+
+def test_slow_queries_time_out_individually(scraper):
+    result = search(domain="gnn", num_queries=3, query_timeout=0.15)
+    queries = {q["query"]: q for q in result["meta"]["queries"]}
+    assert queries["gnn study"]["error"] == "timeout after 0.15s"
+    assert queries["gnn study"]["timed_out"] is False
+    assert queries["gnn research"]["error"] is None
+    assert result["meta"]["partial"] is True
+
+
+def test_queries_cut_by_the_deadline_are_flagged(monkeypatch):
+    async def run_query(query, max_results, timeout):
+        if query.endswith("paper"):
+            await asyncio.sleep(5)
+        error = "HTTP 500" if query.endswith("study") else None
+        videos = [] if error else [{"title": query, "url": "https://youtu.be/aaaaaaaaaaa", "description": ""}]
+        return {"query": query, "videos": videos, "error": error, "elapsed_s": 0.0}
+
+    monkeypatch.setattr(youtube_server, "run_query", run_query)
+    result = json.loads(asyncio.run(youtube_server.search_research_videos("gnn", deadline=0.05)))
+    queries = {q["query"]: q for q in result["meta"]["queries"]}
+    assert queries["gnn research"]["timed_out"] is False and queries["gnn research"]["error"] is None
+    assert queries["gnn paper"]["timed_out"] is True
+    assert queries["gnn study"] == {"query": "gnn study", "count": 0, "elapsed_s": 0.0,
+                                    "error": "HTTP 500", "timed_out": False}
+    assert result["meta"]["partial"] is True
+    assert len(result["videos"]) == 1
@@ -0,0 +1,171 @@
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CHECKPOINT_PATH = PROJECT_ROOT / ".cache" / "checkpoints.sqlite3"
+
+# 检查点本身由 SqliteSaver 的 checkpoints/writes 表保存，这里只记录每个运行的最后更新时间
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoint_threads (
+    thread_id TEXT PRIMARY KEY,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_checkpoint_threads_updated ON checkpoint_threads (updated);
+"""
+
+# 状态中会出现的自定义类型；反序列化只允许这些模块中的类
+_ALLOWED_TYPES = [("utils.types", "PaperInfo"), ("utils.types", "VideoInfo")]
+
+
+class SQLiteCheckpointSaver(SqliteSaver):
+    """带保留策略的 LangGraph SQLite 检查点存储
+
+    读写由 langgraph-checkpoint-sqlite 的 SqliteSaver 完成；本类只增加运行的淘汰与裁剪：
+    按最后更新时间淘汰超过 ttl_days 的运行，并把运行数控制在 max_threads 以内。
+    本地 SQLite 写入只需毫秒级，异步接口直接调用同步实现（SqliteSaver 本身不提供异步接口）。
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl_days: float = 7.0, max_threads: int = 1000,
+                 evict_interval: float = 3600.0):
+        self.path = str(path or os.getenv("RESEARCH_CHECKPOINT_PATH") or DEFAULT_CHECKPOINT_PATH)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        super().__init__(
+            sqlite3.connect(self.path, check_same_thread=False),
+            serde=JsonPlusSerializer(allowed_msgpack_modules=_ALLOWED_TYPES),
+        )
+        self.ttl_days = ttl_days
+        self.max_threads = max_threads
+        # 长期运行的服务在写入时按间隔（秒）淘汰，而不只在打开时淘汰一次
+        self.evict_interval = evict_interval
+        self._last_evict = time.monotonic()
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.evict()
+
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(checkpoints)")}
+        if "metadata_type" in columns:
+            # 旧版自定义表结构与 SqliteSaver 不兼容；检查点只用于恢复失败的运行，直接丢弃
+            self.conn.executescript("DROP TABLE checkpoints; DROP TABLE IF EXISTS checkpoint_writes;")
+        super().setup()
+        self.conn.executescript(_SCHEMA)
+
+    # ---- 写入 ----
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        with self.cursor() as cur:
+            cur.execute(
+                "INSERT OR REPLACE INTO checkpoint_threads (thread_id, updated) VALUES (?, ?)",
+                (str(config["configurable"]["thread_id"]), time.time()),
+            )
+        # evict 通过 cursor() 获取锁，必须在释放锁之后调用
+        if self.evict_interval and time.monotonic() - self._last_evict >= self.evict_interval:
+            self.evict()
+        return saved
+
+    # ---- 清理 ----
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        with self.cursor() as cur:
+            cur.execute("DELETE FROM checkpoint_threads WHERE thread_id = ?", (str(thread_id),))
+
+    def prune(self, thread_ids: Sequence[str], *, strategy: str = "keep_latest") -> None:
+        """keep_latest 只保留每个运行最新的检查点（已完成的运行无需中间状态）；delete 删除整个运行"""
+        for thread_id in thread_ids:
+            if strategy == "delete":
+                self.delete_thread(thread_id)
+                continue
+            with self.cursor() as cur:
+                latest = cur.execute(
+                    "SELECT checkpoint_ns, MAX(checkpoint_id) FROM checkpoints WHERE thread_id = ? "
+                    "GROUP BY checkpoint_ns",
+                    (str(thread_id),),
+                ).fetchall()
+                for checkpoint_ns, checkpoint_id in latest:
+                    for table in ("checkpoints", "writes"):
+                        cur.execute(
+                            f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+                            (str(thread_id), checkpoint_ns, checkpoint_id),
+                        )
+                    cur.execute(
+                        "UPDATE checkpoints SET parent_checkpoint_id = NULL "
+                        "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                        (str(thread_id), checkpoint_ns, checkpoint_id),
+                    )
+
+    def evict(self) -> int:
+        """删除超过 ttl_days 未更新的运行，并把运行数控制在 max_threads 以内；返回删除的运行数"""
+        self._last_evict = time.monotonic()
+        with self.cursor(transaction=False) as cur:
+            threads = cur.execute(
+                "SELECT thread_id, updated FROM checkpoint_threads ORDER BY updated DESC"
+            ).fetchall()
+        cutoff = time.time() - self.ttl_days * 86400 if self.ttl_days else None
+        expired = [
+            thread_id for i, (thread_id, updated) in enumerate(threads)
+            if (cutoff is not None and updated < cutoff) or (self.max_threads and i >= self.max_threads)
+        ]
+        for thread_id in expired:
+            self.delete_thread(thread_id)
+        return len(expired)
+
+    def close(self):
+        self.conn.close()
+
+    # ---- 异步接口 ----
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self.delete_thread(thread_id)
+
+    async def aprune(self, thread_ids: Sequence[str], *, strategy: str = "keep_latest") -> None:
+        self.prune(thread_ids, strategy=strategy)
@@ -0,0 +1,158 @@
+import json
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DIGEST_PATH = PROJECT_ROOT / ".cache" / "digests.sqlite3"
+
+# 增量更新集中放在这一节，每次更新是一个以日期为标题的小节
+UPDATES_HEADER = "## 🆕 每日更新"
+UPDATE_PREFIX = "### "
+# 新增内容插在这一节之前（找不到时插在第一节之后）
+PROGRESS_KEYWORDS = ("最新研究进展", "研究进展", "latest")
+
+_HEADER_RE = re.compile(r"^#{1,2}\s")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS digests (
+    domain TEXT PRIMARY KEY,
+    paper_ids TEXT NOT NULL,
+    video_ids TEXT NOT NULL,
+    sections TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+Section = Tuple[str, str]
+
+
+def domain_key(domain: str) -> str:
+    """规范化的领域键：小写并合并空白"""
+    return " ".join(domain.lower().split())
+
+
+def split_sections(markdown: str) -> List[Section]:
+    """按一、二级标题把 Markdown 拆成 (标题行, 正文) 列表；第一个标题之前的内容标题为空"""
+    sections: List[Section] = []
+    header, lines = "", []
+    for line in markdown.splitlines():
+        if _HEADER_RE.match(line):
+            if header or any(l.strip() for l in lines):
+                sections.append((header, "\n".join(lines).strip("\n")))
+            header, lines = line.rstrip(), []
+        else:
+            lines.append(line)
+    if header or any(l.strip() for l in lines):
+        sections.append((header, "\n".join(lines).strip("\n")))
+    return sections
+
+
+def join_sections(sections: Iterable[Section]) -> str:
+    parts = []
+    for header, body in sections:
+        parts.append("\n\n".join(part for part in (header, body) if part))
+    return "\n\n".join(parts) + "\n"
+
+
+def merge_update(sections: List[Section], label: str, progress: str = "", videos: str = "",
+                 max_updates: int = 7) -> List[Section]:
+    """把一次增量更新合并进已有文章
+
+    更新以 `### {label}` 小节放在“每日更新”一节的最前面，只保留最近 max_updates 次；
+    原文其余部分保持不变。
+    """
+    block = "\n\n".join(part for part in (f"{UPDATE_PREFIX}{label}", progress.strip(), videos.strip()) if part)
+    sections = list(sections)
+    index = next((i for i, (header, _) in enumerate(sections) if header == UPDATES_HEADER), None)
+    if index is None:
+        # 只匹配二级标题：文章标题（如“# 领域：最新研究进展”）本身也可能包含关键词
+        index = next(
+            (i for i, (header, _) in enumerate(sections)
+             if header.startswith("## ") and any(keyword in header.lower() for keyword in PROGRESS_KEYWORDS)),
+            min(1, len(sections)),
+        )
+        sections.insert(index, (UPDATES_HEADER, ""))
+    blocks = [block] + _update_blocks(sections[index][1])
+    sections[index] = (UPDATES_HEADER, "\n\n".join(blocks[:max_updates]))
+    return sections
+
+
+def _update_blocks(body: str) -> List[str]:
+    blocks: List[List[str]] = []
+    for line in body.splitlines():
+        if line.startswith(UPDATE_PREFIX) or not blocks:
+            blocks.append([])
+        blocks[-1].append(line)
+    return ["\n".join(lines).strip() for lines in blocks if any(l.strip() for l in lines)]
+
+
+class DigestStore:
+    """每日摘要存储（SQLite）
+
+    按领域保存上次运行见过的论文/视频 id 和生成的文章（按节拆分），
+    下次运行只需为新增内容调用 LLM。id 集合最多保留 max_ids 个（最近的优先）。
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl_days: float = 30.0, max_ids: int = 5000,
+                 evict_interval: float = 3600.0):
+        self.path = str(path or os.getenv("DIGEST_CACHE_PATH") or DEFAULT_DIGEST_PATH)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.ttl_days = ttl_days
+        self.max_ids = max_ids
+        # 长期运行的服务在写入时按间隔（秒）淘汰，而不只在打开时淘汰一次
+        self.evict_interval = evict_interval
+        self._last_evict = time.monotonic()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self.evict()
+
+    def get(self, domain: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            "SELECT paper_ids, video_ids, sections, updated FROM digests WHERE domain = ?", (domain_key(domain),)
+        ).fetchone()
+        if row is None:
+            return None
+        paper_ids, video_ids, sections, updated = row
+        return {
+            "paper_ids": json.loads(paper_ids),
+            "video_ids": json.loads(video_ids),
+            "sections": [tuple(section) for section in json.loads(sections)],
+            "updated": updated,
+        }
+
+    def put(self, domain: str, paper_ids: List[str], video_ids: List[str], sections: List[Section]):
+        """保存文章和 id 列表（新 id 在前）"""
+        paper_ids = list(dict.fromkeys(paper_ids))[:self.max_ids]
+        video_ids = list(dict.fromkeys(video_ids))[:self.max_ids]
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO digests (domain, paper_ids, video_ids, sections, updated) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (domain_key(domain), json.dumps(paper_ids), json.dumps(video_ids),
+                 json.dumps(sections, ensure_ascii=False), time.time()),
+            )
+        if self.evict_interval and time.monotonic() - self._last_evict >= self.evict_interval:
+            self.evict()
+
+    def delete(self, domain: str):
+        with self.conn:
+            self.conn.execute("DELETE FROM digests WHERE domain = ?", (domain_key(domain),))
+
+    def evict(self) -> int:
+        """删除超过 ttl_days 未更新的领域"""
+        self._last_evict = time.monotonic()
+        if not self.ttl_days:
+            return 0
+        with self.conn:
+            return self.conn.execute(
+                "DELETE FROM digests WHERE updated < ?", (time.time() - self.ttl_days * 86400,)
+            ).rowcount
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,193 @@
+import asyncio
+import itertools
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# 研究函数：(domain, days, on_token) -> 最终状态
+ResearchFn = Callable[[str, int, Callable[[str], Any]], Awaitable[Dict[str, Any]]]
+
+
+def job_key(domain: str, days: int) -> Tuple[str, int]:
+    """规范化的请求键：领域小写并合并空白"""
+    return " ".join(domain.lower().split()), int(days)
+
+
+class ResearchJob:
+    """一次研究工作流的执行；多个相同请求共享同一个 job
+
+    已生成的 token 全部保留，后加入的订阅者先回放已有 token 再接收新 token。
+    """
+
+    def __init__(self, domain: str, days: int):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = job_key(domain, days)
+        self.domain = domain
+        self.days = days
+        self.status = "queued"
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        # 共享此次执行的请求数（含第一个）
+        self.requests = 1
+        self.tokens: List[str] = []
+        self._changed = asyncio.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed")
+
+    async def push(self, token: str):
+        self.tokens.append(token)
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def finish(self, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        self.status = status
+        self.result = result
+        self.error = error
+        self.finished = time.time()
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def stream(self) -> AsyncIterator[str]:
+        """从头回放并跟随 token，直到执行结束"""
+        sent = 0
+        while True:
+            while sent < len(self.tokens):
+                yield self.tokens[sent]
+                sent += 1
+            if self.done:
+                return
+            async with self._changed:
+                if sent == len(self.tokens) and not self.done:
+                    await self._changed.wait()
+
+    async def wait(self):
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.done)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "domain": self.domain,
+            "days": self.days,
+            "status": self.status,
+            "requests": self.requests,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "tokens": len(self.tokens),
+            "error": self.error,
+        }
+
+
+class ResearchJobManager:
+    """研究任务调度
+
+    - 单飞合并：相同（规范化领域, days）的进行中请求共享一次工作流执行；
+    - 结果缓存：成功的结果在 result_ttl 秒内直接复用；
+    - 准入控制：同时运行的工作流不超过 max_concurrent_runs，其余排队。
+    """
+
+    def __init__(self, research: ResearchFn, max_concurrent_runs: int = 4,
+                 result_ttl: float = 600.0, max_jobs: int = 1000):
+        self.research = research
+        self.result_ttl = result_ttl
+        self.max_jobs = max_jobs
+        self._admission = asyncio.Semaphore(max_concurrent_runs)
+        self._inflight: Dict[Tuple[str, int], ResearchJob] = {}
+        self._results: Dict[Tuple[str, int], Tuple[float, ResearchJob]] = {}
+        self._jobs: "OrderedDict[str, ResearchJob]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.stats = {"submitted": 0, "executed": 0, "coalesced": 0, "cached": 0}
+        self._running = 0
+
+    def submit(self, domain: str, days: int = 7, fresh: bool = False) -> Tuple[ResearchJob, str]:
+        """提交请求，返回 (job, 处理方式)；处理方式为 new、coalesced 或 cached"""
+        key = job_key(domain, days)
+        self.stats["submitted"] += 1
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            inflight.requests += 1
+            self.stats["coalesced"] += 1
+            return inflight, "coalesced"
+
+        cached = self._results.get(key)
+        if cached is not None:
+            expires, job = cached
+            if not fresh and expires > time.time():
+                job.requests += 1
+                self.stats["cached"] += 1
+                return job, "cached"
+            del self._results[key]
+
+        job = ResearchJob(domain, days)
+        self._inflight[key] = job
+        self._remember(job)
+        self.stats["executed"] += 1
+        self._tasks[job.id] = asyncio.create_task(self._run(job))
+        return job, "new"
+
+    def get(self, job_id: str) -> Optional[ResearchJob]:
+        return self._jobs.get(job_id)
+
+    def _remember(self, job: ResearchJob):
+        self._jobs[job.id] = job
+        # 只保留最近的 max_jobs 个任务，不淘汰仍在进行的任务
+        for old_id in list(itertools.islice(self._jobs, max(0, len(self._jobs) - self.max_jobs))):
+            if self._jobs[old_id].done:
+                del self._jobs[old_id]
+
+    async def _run(self, job: ResearchJob):
+        try:
+            async with self._admission:
+                job.status = "running"
+                job.started = time.time()
+                self._running += 1
+                try:
+                    result = await self.research(job.domain, job.days, job.push)
+                finally:
+                    self._running -= 1
+            errors = [m["error"] for m in result.get("messages", []) if "error" in m]
+            if "error" in result:
+                errors.insert(0, result["error"])
+            if result.get("blog_content"):
+                await job.finish("done", result, "; ".join(errors) or None)
+                if self.result_ttl:
+                    self._results[job.key] = (time.time() + self.result_ttl, job)
+            else:
+                await job.finish("failed", result, "; ".join(errors) or "未生成博客")
+        except asyncio.CancelledError:
+            # 服务关闭时取消：先结束任务，唤醒仍在等待的订阅者
+            await job.finish("failed", error="cancelled")
+            raise
+        except Exception as e:
+            await job.finish("failed", error=str(e))
+        finally:
+            self._inflight.pop(job.key, None)
+            self._tasks.pop(job.id, None)
+            self._evict_results()
+
+    def _evict_results(self):
+        now = time.time()
+        for key in [k for k, (expires, _) in self._results.items() if expires <= now]:
+            del self._results[key]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "running": self._running,
+            "queued": sum(1 for job in self._inflight.values() if job.status == "queued"),
+            "cached_results": len(self._results),
+        }
+
+    async def aclose(self):
+        """取消尚未结束的任务"""
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
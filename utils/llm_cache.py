@@ -0,0 +1,135 @@
+import abc
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from utils.tracing import tracer
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_LLM_CACHE_PATH = PROJECT_ROOT / ".cache" / "llm_responses.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses (last_used);
+"""
+
+
+def cache_key(model: str, temperature: Optional[float], prompt: str, **params: Any) -> str:
+    """模型、温度、其他生成参数（如 max_tokens，值为 None 的忽略）和完整渲染提示的稳定哈希"""
+    params = {name: value for name, value in params.items() if value is not None}
+    payload = json.dumps([model, temperature, prompt, sorted(params.items())], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache(abc.ABC):
+    """LLM 响应缓存接口：子类实现 _get/_put，命中统计由基类维护（同时计入追踪计数器）"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        response = self._get(key)
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        tracer.add("research_llm_cache_requests_total", 1, result="miss" if response is None else "hit")
+        return response
+
+    def put(self, key: str, model: str, response: str):
+        self._put(key, model, response)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+        }
+
+    @abc.abstractmethod
+    def _get(self, key: str) -> Optional[str]:
+        """返回缓存的响应，未命中时返回 None"""
+
+    @abc.abstractmethod
+    def _put(self, key: str, model: str, response: str):
+        """保存响应"""
+
+
+class SQLiteLLMCache(LLMResponseCache):
+    """基于 SQLite 的 LLM 响应缓存，按存活时间和条目数淘汰（最久未使用优先）"""
+
+    def __init__(self, path: Optional[str] = None, ttl_days: float = 7.0, max_entries: int = 5000,
+                 evict_interval: float = 3600.0):
+        super().__init__()
+        self.path = str(path or os.getenv("LLM_CACHE_PATH") or DEFAULT_LLM_CACHE_PATH)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.ttl_days = ttl_days
+        self.max_entries = max_entries
+        # 写入时按间隔（秒）淘汰，而不是每次写入都扫描整个表
+        self.evict_interval = evict_interval
+        self._last_evict = time.monotonic()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self.evict()
+
+    def _get(self, key: str) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT response, created FROM llm_responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        response, created = row
+        if self.ttl_days and created < time.time() - self.ttl_days * 86400:
+            return None
+        with self.conn:
+            self.conn.execute("UPDATE llm_responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        return response
+
+    def _put(self, key: str, model: str, response: str):
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, model, response, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, now),
+            )
+        if self.evict_interval and time.monotonic() - self._last_evict >= self.evict_interval:
+            self.evict()
+
+    def evict(self) -> int:
+        """删除过期条目，并把条目数控制在 max_entries 以内"""
+        self._last_evict = time.monotonic()
+        removed = 0
+        with self.conn:
+            if self.ttl_days:
+                removed += self.conn.execute(
+                    "DELETE FROM llm_responses WHERE created < ?", (time.time() - self.ttl_days * 86400,)
+                ).rowcount
+            if self.max_entries:
+                removed += self.conn.execute(
+                    "DELETE FROM llm_responses WHERE key IN (SELECT key FROM llm_responses "
+                    "ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                ).rowcount
+        return removed
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM llm_responses")
+
+    def close(self):
+        self.conn.close()
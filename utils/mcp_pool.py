@@ -0,0 +1,307 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from utils.tracing import tracer
+
+if TYPE_CHECKING:
+    # mcp 客户端在启动会话时才导入，导入本模块不再加载 mcp/pydantic 模型（冷启动约 0.5 秒以上）
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.types import CallToolResult, Tool
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 默认的 MCP 服务器配置（stdio 子进程，以模块方式启动以便导入 utils）
+# calls_per_session：单个会话允许的并发调用数（异步工具的服务器可以并发处理）
+ARXIV_SERVER = {
+    "command": sys.executable,
+    "args": ["-m", "mcp_servers.arxiv_server"],
+    "calls_per_session": 8,
+}
+YOUTUBE_SERVER = {
+    "command": sys.executable,
+    "args": ["-m", "mcp_servers.youtube_server"],
+    "calls_per_session": 4,
+}
+DEFAULT_SERVERS = {"arxiv": ARXIV_SERVER, "youtube": YOUTUBE_SERVER}
+
+
+class MCPToolError(RuntimeError):
+    """MCP 工具调用返回错误"""
+
+
+class _PooledSession:
+    """单个长连接 MCP 会话，由后台任务持有 stdio 子进程的生命周期"""
+
+    def __init__(self, server: str, params: "StdioServerParameters"):
+        self.server = server
+        self.params = params
+        self.session: Optional["ClientSession"] = None
+        self.error: Optional[BaseException] = None
+        # 每次重启递增，避免多个并发调用重复重启同一会话
+        self.generation = 0
+        self.restart_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def start(self, timeout: float):
+        """启动子进程并完成 MCP 握手"""
+        self._ready.clear()
+        self._stop.clear()
+        self.error = None
+        self.generation += 1
+        with tracer.span("mcp.spawn", server=self.server, generation=self.generation):
+            # stdio_client 的取消作用域必须在同一个任务中进入和退出，所以由后台任务持有
+            self._task = asyncio.create_task(self._run())
+            await asyncio.wait_for(self._ready.wait(), timeout)
+            if self.session is None:
+                raise RuntimeError(f"MCP 服务器 {self.server} 启动失败：{self.error}")
+
+    async def _run(self):
+        from mcp import ClientSession
+        from mcp.client.stdio import stdio_client
+        try:
+            async with stdio_client(self.params) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set()
+                    await self._stop.wait()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def stop(self):
+        """关闭会话并等待子进程退出"""
+        if self._task is None:
+            return
+        self._stop.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=5)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self._task.cancel()
+        self._task = None
+        self.session = None
+
+    async def restart(self, timeout: float, generation: Optional[int] = None):
+        """重启会话；若指定的代数已被其他调用重启过则跳过"""
+        async with self.restart_lock:
+            if generation is not None and generation != self.generation and self.alive:
+                return
+            await self.stop()
+            await self.start(timeout)
+
+
+def _is_transport_error(error: BaseException) -> bool:
+    """是否为传输层错误（子进程退出、管道断开），只有这类错误需要重启会话"""
+    import anyio
+    from mcp.shared.exceptions import McpError
+    from mcp.types import CONNECTION_CLOSED
+    if isinstance(error, McpError):
+        return error.error.code == CONNECTION_CLOSED
+    return isinstance(error, (anyio.ClosedResourceError, anyio.BrokenResourceError,
+                              anyio.EndOfStream, OSError))
+
+
+def _result_text(result: "CallToolResult") -> str:
+    return "".join(
+        getattr(content, "text", "") for content in result.content
+        if getattr(content, "type", None) == "text"
+    )
+
+
+class MCPSessionPool:
+    """MCP 会话池
+
+    每个服务器启动一次并保持 N 个并发会话，工具元数据按名称缓存，
+    每次调用只有一次工具调用往返。会话崩溃时自动重启。
+    服务器配置中的 calls_per_session 允许在同一会话上并发多个调用（默认 1）。
+    """
+
+    def __init__(
+        self,
+        servers: Optional[Dict[str, Dict[str, Any]]] = None,
+        sessions_per_server: int = 1,
+        startup_timeout: float = 30.0,
+        health_check_interval: Optional[float] = None,
+    ):
+        self.servers = servers if servers is not None else DEFAULT_SERVERS
+        self.sessions_per_server = max(1, sessions_per_server)
+        self.startup_timeout = startup_timeout
+        self.health_check_interval = health_check_interval
+
+        self._sessions: Dict[str, List[_PooledSession]] = {}
+        self._idle: Dict[str, asyncio.Queue] = {}
+        self._tools: Dict[str, Dict[str, "Tool"]] = {}
+        self._start_lock = asyncio.Lock()
+        self._health_task: Optional[asyncio.Task] = None
+        self.started = False
+
+    def _params(self, config: Dict[str, Any]) -> "StdioServerParameters":
+        from mcp import StdioServerParameters
+        return StdioServerParameters(
+            command=config["command"],
+            args=config.get("args", []),
+            env=config.get("env"),
+            cwd=config.get("cwd", str(PROJECT_ROOT)),
+        )
+
+    async def start(self):
+        """预热：启动所有服务器会话并缓存工具列表（幂等）"""
+        async with self._start_lock:
+            if self.started:
+                return
+            try:
+                await asyncio.gather(*(self._start_server(name) for name in self.servers))
+            except BaseException:
+                await self._stop_sessions()
+                raise
+            self.started = True
+            if self.health_check_interval:
+                self._health_task = asyncio.create_task(self._health_loop())
+
+    async def _start_server(self, name: str):
+        params = self._params(self.servers[name])
+        sessions = [_PooledSession(name, params) for _ in range(self.sessions_per_server)]
+        self._sessions[name] = sessions
+        await asyncio.gather(*(s.start(self.startup_timeout) for s in sessions))
+
+        # 每个会话按 calls_per_session 放入多个调用令牌
+        queue: asyncio.Queue = asyncio.Queue()
+        for _ in range(max(1, self.servers[name].get("calls_per_session", 1))):
+            for session in sessions:
+                queue.put_nowait(session)
+        self._idle[name] = queue
+
+        # 工具句柄只解析一次
+        with tracer.span("mcp.list_tools", server=name) as span:
+            listed = await sessions[0].session.list_tools()
+            span.set_attribute("tools", len(listed.tools))
+        self._tools[name] = {tool.name: tool for tool in listed.tools}
+
+    def list_tools(self, server: str) -> List[str]:
+        """返回服务器已缓存的工具名称"""
+        return list(self._tools.get(server, {}))
+
+    def get_tool(self, server: str, name: str) -> "Tool":
+        """按名称获取缓存的工具元数据"""
+        try:
+            return self._tools[server][name]
+        except KeyError:
+            raise KeyError(f"MCP 服务器 {server} 未提供工具 {name}") from None
+
+    def has_tool(self, server: str, name: str) -> bool:
+        return name in self._tools.get(server, {})
+
+    async def call_tool(self, server: str, name: str, arguments: Dict[str, Any]) -> str:
+        """调用工具并返回文本结果"""
+        with tracer.span("mcp.call_tool", server=server, tool=name) as span:
+            result = await self._call(server, name, arguments, span)
+            text = _result_text(result)
+            self._record_bytes(span, server, name, len(text.encode("utf-8")))
+            if result.isError:
+                raise MCPToolError(text or f"工具 {name} 调用失败")
+            return text
+
+    async def _call(self, server: str, name: str, arguments: Dict[str, Any], span: Any) -> "CallToolResult":
+        if not self.started:
+            await self.start()
+        self.get_tool(server, name)
+
+        queue = self._idle[server]
+        waited = time.perf_counter()
+        pooled: _PooledSession = await queue.get()
+        # 等待空闲会话的时间单独记录，区分排队和服务器处理耗时
+        span.set_attribute("queue_wait_s", round(time.perf_counter() - waited, 6))
+        try:
+            generation = pooled.generation
+            if not pooled.alive:
+                await pooled.restart(self.startup_timeout, generation)
+                generation = pooled.generation
+            try:
+                return await pooled.session.call_tool(name, arguments)
+            except Exception as e:
+                # 工具或协议错误原样抛出；会话崩溃时重启后重试一次
+                if pooled.alive and not _is_transport_error(e):
+                    raise
+                span.set_attribute("restarted", True)
+                await pooled.restart(self.startup_timeout, generation)
+                return await pooled.session.call_tool(name, arguments)
+        finally:
+            queue.put_nowait(pooled)
+
+    @staticmethod
+    def _record_bytes(span: Any, server: str, name: str, size: int):
+        """记录每次工具调用的响应字节数（span 属性和累计计数器）"""
+        span.set_attribute("response_bytes", size)
+        tracer.add("research_mcp_response_bytes_total", size, server=server, tool=name)
+        tracer.add("research_mcp_calls_total", 1, server=server, tool=name)
+
+    async def health_check(self, timeout: float = 5.0) -> Dict[str, int]:
+        """对空闲会话发送 ping，重启无响应的会话；返回每个服务器的健康会话数"""
+        healthy: Dict[str, int] = {}
+        for server, queue in self._idle.items():
+            healthy[server] = 0
+            # 每个空闲会话只取出一个调用令牌，其余令牌立即放回，不阻塞正在进行的调用
+            idle = []
+            while not queue.empty():
+                idle.append(queue.get_nowait())
+            checked: Dict[int, _PooledSession] = {}
+            for pooled in idle:
+                if id(pooled) in checked:
+                    queue.put_nowait(pooled)
+                else:
+                    checked[id(pooled)] = pooled
+            for pooled in checked.values():
+                generation = pooled.generation
+                try:
+                    if not pooled.alive:
+                        raise RuntimeError("session closed")
+                    await asyncio.wait_for(pooled.session.send_ping(), timeout)
+                    healthy[server] += 1
+                except Exception:
+                    try:
+                        # 其他令牌上的调用可能已经重启过该会话
+                        await pooled.restart(self.startup_timeout, generation)
+                        healthy[server] += 1
+                    except Exception as e:
+                        print(f"⚠️ MCP 会话重启失败（{server}）：{str(e)}", file=sys.stderr)
+                finally:
+                    queue.put_nowait(pooled)
+        return healthy
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await self.health_check()
+
+    async def _stop_sessions(self):
+        sessions = [s for group in self._sessions.values() for s in group]
+        await asyncio.gather(*(s.stop() for s in sessions), return_exceptions=True)
+        self._sessions.clear()
+        self._idle.clear()
+
+    async def close(self):
+        """关闭所有会话"""
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        await self._stop_sessions()
+        self._tools.clear()
+        self.started = False
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -0,0 +1,68 @@
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_NOTES_PATH = PROJECT_ROOT / ".cache" / "paper_notes.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS paper_notes (
+    arxiv_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    note TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (arxiv_id, model)
+);
+"""
+
+
+class PaperNoteCache:
+    """论文浓缩笔记缓存（SQLite）
+
+    map 阶段的结果按 (arxiv_id, 模型) 缓存，同一篇论文跨领域、跨运行只浓缩一次。
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl_days: float = 90.0):
+        self.path = str(path or os.getenv("PAPER_NOTES_CACHE_PATH") or DEFAULT_NOTES_PATH)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.ttl_days = ttl_days
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self.evict()
+
+    def get_many(self, arxiv_ids: Iterable[str], model: str) -> Dict[str, str]:
+        ids = list(arxiv_ids)
+        notes: Dict[str, str] = {}
+        # SQLite 变量个数有上限，分块查询
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT arxiv_id, note FROM paper_notes WHERE model = ? "
+                f"AND arxiv_id IN ({','.join('?' * len(chunk))})",
+                [model, *chunk],
+            )
+            notes.update(rows)
+        return notes
+
+    def put(self, arxiv_id: str, model: str, note: str):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO paper_notes (arxiv_id, model, note, created) VALUES (?, ?, ?, ?)",
+                (arxiv_id, model, note, time.time()),
+            )
+
+    def evict(self) -> int:
+        """删除超过 ttl_days 的笔记"""
+        if not self.ttl_days:
+            return 0
+        with self.conn:
+            return self.conn.execute(
+                "DELETE FROM paper_notes WHERE created < ?", (time.time() - self.ttl_days * 86400,)
+            ).rowcount
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,309 @@
+import json
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CACHE_PATH = PROJECT_ROOT / ".cache" / "arxiv_papers.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    arxiv_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    authors TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    published TEXT NOT NULL,
+    published_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    url TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_papers_published_at ON papers (published_at);
+CREATE INDEX IF NOT EXISTS idx_papers_fetched_at ON papers (fetched_at);
+CREATE TABLE IF NOT EXISTS query_papers (
+    query_key TEXT NOT NULL,
+    arxiv_id TEXT NOT NULL,
+    PRIMARY KEY (query_key, arxiv_id)
+);
+CREATE INDEX IF NOT EXISTS idx_query_papers_arxiv_id ON query_papers (arxiv_id);
+CREATE TABLE IF NOT EXISTS watermarks (
+    query_key TEXT PRIMARY KEY,
+    covered_from TEXT NOT NULL,
+    covered_to TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+# 全文索引（外部内容表），通过触发器与 papers 表保持同步
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+    title, summary, authors, content='papers', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS papers_ai AFTER INSERT ON papers BEGIN
+    INSERT INTO papers_fts (rowid, title, summary, authors)
+    VALUES (new.rowid, new.title, new.summary, new.authors);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_ad AFTER DELETE ON papers BEGIN
+    INSERT INTO papers_fts (papers_fts, rowid, title, summary, authors)
+    VALUES ('delete', old.rowid, old.title, old.summary, old.authors);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_au AFTER UPDATE ON papers BEGIN
+    INSERT INTO papers_fts (papers_fts, rowid, title, summary, authors)
+    VALUES ('delete', old.rowid, old.title, old.summary, old.authors);
+    INSERT INTO papers_fts (rowid, title, summary, authors)
+    VALUES (new.rowid, new.title, new.summary, new.authors);
+END;
+"""
+
+
+def query_key(domain: str, categories: Optional[Iterable[str]] = None) -> str:
+    """查询的规范化键（领域 + 排序后的分类）"""
+    cats = ",".join(sorted(c.removeprefix("cat:") for c in categories or []))
+    return f"{domain.strip().lower()}|{cats}"
+
+
+class PaperStore:
+    """本地 arXiv 论文缓存（SQLite）
+
+    论文按 arxiv_id 存储；每个查询记录已完整覆盖的提交时间区间（水位线），
+    后续运行只需获取水位线之后的新论文，再从缓存中返回整个时间窗口。
+    所有见过的论文同时写入 FTS5 全文索引，支持按关键词、日期和作者离线检索。
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_days: float = 30.0,
+        max_papers: int = 50000,
+        evict_interval: float = 3600.0,
+        index_ttl_days: float = 180.0,
+    ):
+        self.path = str(path or os.getenv("ARXIV_CACHE_PATH") or DEFAULT_CACHE_PATH)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # ttl_days 限制窗口缓存（按发布日期）；index_ttl_days 和 max_papers 限制论文索引（按获取时间）
+        self.ttl_days = ttl_days
+        self.index_ttl_days = index_ttl_days
+        self.max_papers = max_papers
+        # 长期运行的服务器在写入时按间隔（秒）淘汰，而不只在打开时淘汰一次
+        self.evict_interval = evict_interval
+        self._last_evict = time.monotonic()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        has_fts = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'papers_fts'"
+        ).fetchone()
+        self.conn.executescript(_FTS_SCHEMA)
+        if not has_fts:
+            # 旧版本缓存库：为已有论文建立索引
+            with self.conn:
+                self.conn.execute("INSERT INTO papers_fts (papers_fts) VALUES ('rebuild')")
+
+    def get_watermark(self, key: str) -> Optional[Tuple[datetime, datetime]]:
+        """返回查询已覆盖的 (起始, 结束) 时间区间"""
+        row = self.conn.execute(
+            "SELECT covered_from, covered_to FROM watermarks WHERE query_key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return datetime.fromisoformat(row["covered_from"]), datetime.fromisoformat(row["covered_to"])
+
+    def set_watermark(self, key: str, covered_from: datetime, covered_to: datetime):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO watermarks (query_key, covered_from, covered_to, updated) "
+                "VALUES (?, ?, ?, ?)",
+                (key, covered_from.isoformat(), covered_to.isoformat(), time.time()),
+            )
+
+    def upsert(self, key: Optional[str], records: List[Dict[str, Any]]):
+        """写入论文并记录其属于哪个查询（key 为 None 时只写入论文）"""
+        now = time.time()
+        with self.conn:
+            # 使用 UPSERT 而不是 REPLACE，保证全文索引的更新触发器生效
+            self.conn.executemany(
+                "INSERT INTO papers (arxiv_id, title, authors, summary, published, "
+                "published_at, updated_at, url, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (arxiv_id) DO UPDATE SET title = excluded.title, "
+                "authors = excluded.authors, summary = excluded.summary, "
+                "published = excluded.published, published_at = excluded.published_at, "
+                "updated_at = excluded.updated_at, url = excluded.url, fetched_at = excluded.fetched_at",
+                [
+                    (
+                        r["arxiv_id"], r["title"], json.dumps(r["authors"], ensure_ascii=False),
+                        r["summary"], r["published"], r["published_at"], r["updated_at"],
+                        r["url"], now,
+                    )
+                    for r in records
+                ],
+            )
+            if key is not None:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO query_papers (query_key, arxiv_id) VALUES (?, ?)",
+                    [(key, r["arxiv_id"]) for r in records],
+                )
+        if self.evict_interval and time.monotonic() - self._last_evict >= self.evict_interval:
+            self.evict()
+
+    def window(self, key: str, start: datetime, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """返回查询在 start 之后首次发布的缓存论文（最新在前）"""
+        sql = (
+            "SELECT p.* FROM papers p JOIN query_papers q ON q.arxiv_id = p.arxiv_id "
+            "WHERE q.query_key = ? AND p.published_at >= ? ORDER BY p.published_at DESC"
+        )
+        params: List[Any] = [key, start.isoformat()]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [self._row_to_record(row) for row in self.conn.execute(sql, params)]
+
+    def get(self, arxiv_id: str) -> Optional[Dict[str, Any]]:
+        """按 arxiv_id 查找论文；不带版本号时返回最新版本"""
+        row = self.conn.execute("SELECT * FROM papers WHERE arxiv_id = ?", (arxiv_id,)).fetchone()
+        if row is None and not re.search(r"v\d+$", arxiv_id):
+            row = self.conn.execute(
+                "SELECT * FROM papers WHERE arxiv_id GLOB ? ORDER BY updated_at DESC LIMIT 1",
+                (f"{arxiv_id}v[0-9]*",),
+            ).fetchone()
+        return self._row_to_record(row) if row else None
+
+    def get_many(self, arxiv_ids: List[str], chunk_size: int = 500) -> Dict[str, Dict[str, Any]]:
+        """批量查找论文，返回 {请求的 id: 论文}；未命中的 id 不出现在结果中"""
+        found: Dict[str, Dict[str, Any]] = {}
+        ids = list(dict.fromkeys(arxiv_ids))
+        for i in range(0, len(ids), chunk_size):
+            chunk = ids[i:i + chunk_size]
+            placeholders = ",".join("?" * len(chunk))
+            for row in self.conn.execute(f"SELECT * FROM papers WHERE arxiv_id IN ({placeholders})", chunk):
+                found[row["arxiv_id"]] = self._row_to_record(row)
+        # 不带版本号的 id 逐个回退到最新版本（主键前缀查询，走索引）
+        for arxiv_id in ids:
+            if arxiv_id not in found and not re.search(r"v\d+$", arxiv_id):
+                record = self.get(arxiv_id)
+                if record is not None:
+                    found[arxiv_id] = record
+        return found
+
+    def search(
+        self,
+        query: str = "",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        author: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """在全文索引中检索论文
+
+        query 中的每个词都必须出现（标题权重最高），按 BM25 排序；
+        没有关键词时按发布时间倒序。日期为 YYYY-MM-DD，作者按子串匹配（不区分大小写）。
+        """
+        conditions: List[str] = []
+        params: List[Any] = []
+        terms = [t.replace('"', '""') for t in query.split()]
+        if terms:
+            sql = (
+                "SELECT p.*, bm25(papers_fts, 10.0, 1.0, 3.0) AS score "
+                "FROM papers_fts JOIN papers p ON p.rowid = papers_fts.rowid"
+            )
+            conditions.append("papers_fts MATCH ?")
+            params.append(" ".join(f'"{t}"' for t in terms))
+            order = "score"
+        else:
+            sql = "SELECT p.*, NULL AS score FROM papers p"
+            order = "p.published_at DESC"
+        if start_date:
+            conditions.append("p.published >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("p.published <= ?")
+            params.append(end_date)
+        if author:
+            conditions.append("p.authors LIKE ?")
+            params.append(f"%{author}%")
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {order} LIMIT ?"
+        params.append(limit)
+
+        results = []
+        for row in self.conn.execute(sql, params):
+            record = self._row_to_record(row)
+            # bm25() 越小越相关，取负数作为得分
+            record["score"] = -record["score"] if record["score"] is not None else None
+            results.append(record)
+        return results
+
+    @staticmethod
+    def _row_to_record(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        record["authors"] = json.loads(record["authors"])
+        record.pop("fetched_at", None)
+        return record
+
+    def evict(self) -> int:
+        """淘汰缓存，返回删除的论文数
+
+        - 论文（全文索引）按最后获取时间淘汰：超过 index_ttl_days 未再获取，或总数超过
+          max_papers 时最早获取的论文被删除；刚被详情查询写入的旧论文不受发布日期影响；
+        - 窗口缓存（查询的论文归属和水位线）只保留 ttl_days 内发布的论文。
+        受影响查询的水位线收缩到被删除的论文之后，下次会重新获取这段区间。
+        """
+        self._last_evict = time.monotonic()
+        with self.conn:
+            doomed: List[str] = []
+            if self.index_ttl_days:
+                doomed += [row[0] for row in self.conn.execute(
+                    "SELECT arxiv_id FROM papers WHERE fetched_at < ?",
+                    (time.time() - self.index_ttl_days * 86400,),
+                )]
+            if self.max_papers:
+                doomed += [row[0] for row in self.conn.execute(
+                    "SELECT arxiv_id FROM papers ORDER BY fetched_at DESC, rowid DESC LIMIT -1 OFFSET ?",
+                    (self.max_papers,),
+                )]
+            doomed = list(dict.fromkeys(doomed))
+            for i in range(0, len(doomed), 500):
+                chunk = doomed[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                self._shrink_watermarks(
+                    "SELECT q.query_key, MAX(p.published_at) FROM query_papers q "
+                    "JOIN papers p ON p.arxiv_id = q.arxiv_id "
+                    f"WHERE q.arxiv_id IN ({placeholders}) GROUP BY q.query_key",
+                    chunk,
+                )
+                self.conn.execute(f"DELETE FROM query_papers WHERE arxiv_id IN ({placeholders})", chunk)
+                self.conn.execute(f"DELETE FROM papers WHERE arxiv_id IN ({placeholders})", chunk)
+            if self.ttl_days:
+                cutoff = (datetime.now(timezone.utc) - timedelta(days=self.ttl_days)).isoformat()
+                self.conn.execute(
+                    "DELETE FROM query_papers WHERE arxiv_id IN (SELECT arxiv_id FROM papers WHERE published_at < ?)",
+                    (cutoff,),
+                )
+                self.conn.execute(
+                    "UPDATE watermarks SET covered_from = ? WHERE covered_from < ?", (cutoff, cutoff)
+                )
+            self.conn.execute("DELETE FROM watermarks WHERE covered_to <= covered_from")
+        return len(doomed)
+
+    def _shrink_watermarks(self, sql: str, params: List[Any]):
+        """把查询的覆盖区间起点移到 (query_key, 被删除论文的最晚发布时间) 之后"""
+        for key, published_at in self.conn.execute(sql, params).fetchall():
+            after = (datetime.fromisoformat(published_at) + timedelta(microseconds=1)).isoformat()
+            self.conn.execute(
+                "UPDATE watermarks SET covered_from = ? WHERE query_key = ? AND covered_from < ?",
+                (after, key, after),
+            )
+
+    def clear(self):
+        with self.conn:
+            for table in ("papers", "query_papers", "watermarks"):
+                self.conn.execute(f"DELETE FROM {table}")
+
+    def close(self):
+        self.conn.close()
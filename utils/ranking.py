@@ -0,0 +1,119 @@
+import math
+import os
+import re
+import sys
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# 英文按单词切分，中日韩文字按单字切分
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[぀-ヿ㐀-䶿一-鿿]")
+_CJK_RE = re.compile(r"[぀-ヿ㐀-䶿一-鿿]")
+
+# tiktoken 词表下载一次后保存在项目缓存目录（而不是系统临时目录），之后离线可用
+DEFAULT_TIKTOKEN_CACHE = Path(__file__).resolve().parent.parent / ".cache" / "tiktoken"
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def bm25_scores(query: str, documents: Sequence[str], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """用 BM25 计算每个文档与查询的相关度"""
+    query_terms = set(tokenize(query))
+    if not documents or not query_terms:
+        return [0.0] * len(documents)
+
+    doc_terms = [Counter(tokenize(doc)) for doc in documents]
+    lengths = [sum(terms.values()) for terms in doc_terms]
+    avg_length = sum(lengths) / len(lengths) or 1.0
+    n = len(documents)
+    # 只为查询词计算文档频率
+    idf = {}
+    for term in query_terms:
+        df = sum(1 for terms in doc_terms if term in terms)
+        idf[term] = math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    scores = []
+    for terms, length in zip(doc_terms, lengths):
+        norm = k1 * (1 - b + b * length / avg_length)
+        score = 0.0
+        for term in query_terms:
+            tf = terms.get(term)
+            if tf:
+                score += idf[term] * tf * (k1 + 1) / (tf + norm)
+        scores.append(score)
+    return scores
+
+
+def rank(query: str, items: Sequence[T], text: Callable[[T], str],
+         boost: Optional[Callable[[T], float]] = None) -> List[T]:
+    """按 BM25 得分（加可选的额外得分）降序排列，同分保持原顺序"""
+    scores = bm25_scores(query, [text(item) for item in items])
+    if boost is not None:
+        scores = [score + boost(item) for score, item in zip(scores, items)]
+    order = sorted(range(len(items)), key=lambda i: -scores[i])
+    return [items[i] for i in order]
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    # RESEARCH_TIKTOKEN=0 时直接估算，不尝试下载词表（如离线基准测试）
+    if os.getenv("RESEARCH_TIKTOKEN", "1").lower() in ("0", "false", "no"):
+        return None
+    os.environ.setdefault("TIKTOKEN_CACHE_DIR", str(DEFAULT_TIKTOKEN_CACHE))
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # tiktoken 不可用或词表无法下载时退回估算
+        print(f"⚠️ 无法加载 tiktoken 词表，改用估算：{str(e)}", file=sys.stderr)
+        return None
+
+
+def load_tokenizer(model: str = "gpt-4o-mini") -> bool:
+    """预先加载 tiktoken 词表（首次可能需要下载，应在线程中调用）；返回是否可用"""
+    return _encoding(model) is not None
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """计算文本的 token 数（优先使用 tiktoken）"""
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def _greedy(items: Sequence[T], render: Callable[[int, T], str], budget: int,
+            model: str) -> Iterator[Tuple[T, str, int]]:
+    """按顺序贪心装箱，依次产出 (条目, 渲染结果, 累计 token 数)"""
+    used = 0
+    count = 0
+    for item in items:
+        rendered = render(count + 1, item)
+        tokens = count_tokens(rendered, model)
+        if used + tokens > budget:
+            continue
+        count += 1
+        used += tokens
+        yield item, rendered, used
+
+
+def pack(items: Sequence[T], render: Callable[[int, T], str], budget: int,
+         model: str = "gpt-4o-mini") -> Tuple[List[str], int]:
+    """按顺序贪心地把渲染后的条目装入 token 预算，返回 (渲染结果, 已用 token 数)"""
+    packed = list(_greedy(items, render, budget, model))
+    return [rendered for _, rendered, _ in packed], packed[-1][2] if packed else 0
+
+
+def fit(items: Sequence[T], render: Callable[[int, T], str], budget: int,
+        model: str = "gpt-4o-mini") -> List[T]:
+    """与 pack 相同的装箱，返回能装入预算的条目本身"""
+    return [item for item, _, _ in _greedy(items, render, budget, model)]
@@ -0,0 +1,33 @@
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """全局礼貌限速器
+
+    保证相邻两次请求至少间隔 min_interval 秒。asyncio.Lock 按先来先得唤醒等待者，
+    因此并发调用会被公平排队，而不是互相抢占。
+    """
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = asyncio.Lock()
+        self._next_slot = 0.0
+
+    async def acquire(self):
+        """等待直到允许发出下一次请求"""
+        if self.min_interval <= 0:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_slot = max(now, self._next_slot) + self.min_interval
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
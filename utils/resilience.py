@@ -0,0 +1,171 @@
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """截止时间已到"""
+
+
+class CircuitOpenError(RuntimeError):
+    """熔断器打开，调用被直接拒绝"""
+
+
+class Deadline:
+    """绝对截止时间（time.monotonic），沿调用链传递；expires 为 None 表示不限时"""
+
+    def __init__(self, expires: Optional[float] = None):
+        self.expires = expires
+
+    @classmethod
+    def after(cls, timeout: Optional[float]) -> "Deadline":
+        return cls(None if timeout is None else time.monotonic() + timeout)
+
+    def remaining(self) -> Optional[float]:
+        if self.expires is None:
+            return None
+        return max(0.0, self.expires - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.expires is not None and time.monotonic() >= self.expires
+
+    def cap(self, timeout: Optional[float] = None, margin: float = 0.0) -> Optional[float]:
+        """timeout 与剩余时间（减去 margin）中较小的一个；都没有时为 None
+
+        margin 为留给下游返回结果的余量，最多占剩余时间的 10%。
+        """
+        remaining = self.remaining()
+        if remaining is not None:
+            remaining -= min(margin, remaining * 0.1)
+        if timeout is None:
+            return remaining
+        return timeout if remaining is None else min(timeout, remaining)
+
+    async def run(self, awaitable: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """在截止时间（和可选的单次超时）内等待，超时抛出 DeadlineExceeded"""
+        limit = self.cap(timeout)
+        if limit is None:
+            return await awaitable
+        try:
+            return await asyncio.wait_for(awaitable, limit)
+        except asyncio.TimeoutError as e:
+            raise DeadlineExceeded(f"超过截止时间（{limit:.1f} 秒）") from e
+
+
+class CircuitBreaker:
+    """按数据源的熔断器
+
+    连续失败 failure_threshold 次后打开，reset_timeout 秒内直接拒绝调用（快速失败）；
+    之后进入半开状态，只放行一个试探调用，成功则关闭，失败则重新打开。
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def check(self):
+        """放行调用，或在熔断期间抛出 CircuitOpenError"""
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return
+        retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+        raise CircuitOpenError(f"{self.name} 暂时不可用（熔断中，约 {retry_in:.0f} 秒后重试）")
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self):
+        """试探调用被取消（既非成功也非失败）时释放试探名额"""
+        self._probing = False
+
+    def snapshot(self) -> dict:
+        return {"name": self.name, "state": self.state, "failures": self.failures}
+
+
+async def retry(
+    func: Callable[[], Awaitable[T]],
+    attempts: int = 3,
+    base_delay: float = 0.5,
+    max_delay: float = 4.0,
+    deadline: Optional[Deadline] = None,
+    attempt_timeout: Optional[float] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+) -> T:
+    """有界重试：指数退避加完全抖动，所有尝试和等待都不超过截止时间
+
+    每次尝试前检查熔断器，成功/失败都会记录到熔断器（截止时间用完不算失败）；
+    截止时间已到或剩余时间不足以等待下一次退避时直接抛出最后一次的异常。
+    """
+    deadline = deadline or Deadline()
+    for attempt in range(1, attempts + 1):
+        if breaker is not None:
+            breaker.check()
+        try:
+            result = await deadline.run(func(), attempt_timeout)
+        except CircuitOpenError:
+            raise
+        except asyncio.CancelledError:
+            if breaker is not None:
+                breaker.release()
+            raise
+        except retry_on as e:
+            if breaker is not None:
+                # 调用方的截止时间用完不是数据源的错误，只释放试探名额；单次尝试超时仍记为失败
+                if isinstance(e, DeadlineExceeded) and deadline.expired:
+                    breaker.release()
+                else:
+                    breaker.record_failure()
+            if attempt == attempts or deadline.expired:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+            remaining = deadline.remaining()
+            if remaining is not None and remaining <= delay:
+                raise
+            await asyncio.sleep(delay)
+        else:
+            if breaker is not None:
+                breaker.record_success()
+            return result
+    raise AssertionError("unreachable")
+
+
+def failure_reason(error: BaseException) -> str:
+    """部分结果的原因：deadline、circuit_open 或 error"""
+    if isinstance(error, asyncio.TimeoutError):
+        return "deadline"
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    return "error"
+
+
+def deadline_from_config(config: Optional[Any], key: str = "retrieval_deadline") -> Deadline:
+    """从 LangGraph config 中取出截止时间（monotonic 时间戳）"""
+    return Deadline(((config or {}).get("configurable") or {}).get(key))
@@ -0,0 +1,51 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from utils.text_match import KeywordMatcher, normalize_keyword, parse_keywords
+
+
+def parse_subscription(line: str) -> Tuple[str, List[str]]:
+    """解析一行订阅：`领域` 或 `领域: 关键词1, 关键词2`；领域名本身总是关键词之一"""
+    domain, _, keywords = line.partition(":")
+    domain = domain.strip()
+    return domain, list(dict.fromkeys([normalize_keyword(domain)] + parse_keywords(keywords)))
+
+
+class DomainRouter:
+    """把一批论文按关键词路由到订阅的领域
+
+    所有领域的关键词编译为一个 KeywordMatcher，每篇论文的标题和摘要各扫描一次，
+    命中的关键词再经倒排索引（关键词 -> 订阅它的领域）找到领域，开销与领域数量基本无关。
+    """
+
+    def __init__(self, subscriptions: Dict[str, Iterable[str]],
+                 title_weight: float = 2.0, summary_weight: float = 1.0):
+        self.domains = list(subscriptions)
+        self.index: Dict[str, Set[str]] = {}
+        for domain, keywords in subscriptions.items():
+            for keyword in list(keywords) or [domain]:
+                keyword = normalize_keyword(keyword)
+                if keyword:
+                    self.index.setdefault(keyword, set()).add(domain)
+        self.matcher = KeywordMatcher({keyword: 1.0 for keyword in self.index})
+        self.title_weight = title_weight
+        self.summary_weight = summary_weight
+
+    def match(self, title: str, summary: str) -> Dict[str, float]:
+        """一篇论文命中的 {领域: 得分}；每个关键词在每个字段中最多计一次"""
+        scores: Dict[str, float] = {}
+        for text, weight in ((title, self.title_weight), (summary, self.summary_weight)):
+            for keyword in self.matcher.find(text):
+                for domain in self.index.get(keyword, ()):
+                    scores[domain] = scores.get(domain, 0.0) + weight
+        return scores
+
+    def route(self, papers: Iterable[Any], limit: Optional[int] = None) -> Dict[str, List[Any]]:
+        """返回 {领域: 论文列表}，按得分、发布时间倒序，每个领域最多 limit 篇"""
+        matched: Dict[str, List[Tuple[float, str, int, Any]]] = {domain: [] for domain in self.domains}
+        for position, paper in enumerate(papers):
+            for domain, score in self.match(paper.title, paper.summary).items():
+                # position 保证排序稳定，不比较论文对象本身
+                matched[domain].append((score, paper.published, -position, paper))
+        return {
+            domain: [paper for *_, paper in sorted(items, key=lambda item: item[:3], reverse=True)[:limit]]
+            for domain, items in matched.items()
+        }
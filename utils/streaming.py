@@ -0,0 +1,45 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+
+class TokenStream:
+    """把回调式的 token 输出转换为异步迭代器
+
+    迭代得到博客 token；迭代结束后 result 为工作流的最终状态。
+    """
+
+    _DONE = object()
+
+    def __init__(self):
+        self.result: Optional[Dict[str, Any]] = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def push(self, token: str):
+        """token 回调"""
+        self._queue.put_nowait(token)
+
+    def start(self, run: Callable[["TokenStream"], Awaitable[Dict[str, Any]]]) -> "TokenStream":
+        """在后台任务中运行工作流，run 接收本对象并返回最终状态"""
+        async def runner():
+            try:
+                self.result = await run(self)
+            finally:
+                self._queue.put_nowait(self._DONE)
+
+        self._task = asyncio.create_task(runner())
+        return self
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        try:
+            while True:
+                token = await self._queue.get()
+                if token is self._DONE:
+                    break
+                yield token
+            # 传播后台任务中的异常
+            if self._task is not None:
+                await self._task
+        finally:
+            if self._task is not None and not self._task.done():
+                self._task.cancel()
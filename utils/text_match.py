@@ -0,0 +1,77 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 学术相关的通用关键词
+ACADEMIC_KEYWORDS = (
+    "research", "paper", "study", "academic", "conference", "lecture", "university", "phd", "science"
+)
+
+
+def normalize_keyword(keyword: str) -> str:
+    """小写并压缩空白"""
+    return " ".join(keyword.lower().split())
+
+
+def parse_keywords(text: str) -> List[str]:
+    """按逗号拆分关键词并去除首尾空白"""
+    return [kw for kw in (normalize_keyword(part) for part in text.split(",")) if kw]
+
+
+class KeywordMatcher:
+    """预编译的关键词匹配器
+
+    所有关键词编译为一个交替正则，单次扫描即可找出文本中出现的全部关键词。
+    ASCII 字母数字开头/结尾的关键词要求该侧为词边界（"ai" 不会匹配 "said" 或 "aims"），
+    右侧允许一个复数 "s"（"transformer" 匹配 "transformers"）；中文等关键词按子串匹配。
+    """
+
+    def __init__(self, weights: Dict[str, float]):
+        self.weights = {normalize_keyword(k): w for k, w in weights.items() if normalize_keyword(k)}
+        # 长关键词优先，保证 "deep learning" 先于 "deep" 匹配
+        alternatives = []
+        for keyword in sorted(self.weights, key=len, reverse=True):
+            escaped = re.escape(keyword).replace(r"\ ", r"\s+")
+            if keyword[0].isascii() and keyword[0].isalnum():
+                escaped = r"(?<![a-z0-9])" + escaped
+            if keyword[-1].isascii() and keyword[-1].isalnum():
+                escaped += r"s?(?![a-z0-9])"
+            alternatives.append(escaped)
+        self.pattern = re.compile("|".join(alternatives)) if alternatives else None
+
+    def find(self, text: str) -> set:
+        """返回文本中出现的（规范化）关键词集合"""
+        if not self.pattern or not text:
+            return set()
+        found = set()
+        for match in self.pattern.finditer(text.lower()):
+            keyword = normalize_keyword(match.group(0))
+            # 复数形式归一到原关键词
+            found.add(keyword if keyword in self.weights else keyword[:-1])
+        return found
+
+    def score(self, fields: Iterable[Tuple[str, float]]) -> float:
+        """对多个 (文本, 字段权重) 计算匹配得分：每个关键词在每个字段中最多计一次"""
+        total = 0.0
+        for text, field_weight in fields:
+            for keyword in self.find(text):
+                total += self.weights.get(keyword, 0.0) * field_weight
+        return total
+
+
+@lru_cache(maxsize=256)
+def _cached_matcher(items: Tuple[Tuple[str, float], ...]) -> KeywordMatcher:
+    return KeywordMatcher(dict(items))
+
+
+def get_matcher(weights: Dict[str, float]) -> KeywordMatcher:
+    """按关键词与权重缓存编译好的匹配器"""
+    return _cached_matcher(tuple(sorted(weights.items())))
+
+
+def academic_matcher(domain_keywords: Optional[Iterable[str]] = None, domain_weight: float = 2.0) -> KeywordMatcher:
+    """通用学术关键词 + 领域关键词（权重更高）的匹配器"""
+    weights = {kw: 1.0 for kw in ACADEMIC_KEYWORDS}
+    for keyword in domain_keywords or []:
+        weights[normalize_keyword(keyword)] = domain_weight
+    return get_matcher(weights)
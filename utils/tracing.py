@@ -0,0 +1,239 @@
+import contextvars
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# 直方图桶上限（秒），覆盖从毫秒级工具调用到分钟级的 LLM 生成
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# 当前活动的 span，沿 asyncio 任务自动传播（LangGraph 节点、并发工具调用都能拿到父 span）
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """一次计时区间；结束时交给 Tracer 记录"""
+
+    __slots__ = ("tracer", "name", "attributes", "span_id", "parent_id", "trace_id",
+                 "start_time", "started", "duration", "status", "error", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span_id = f"{os.getpid():x}-{next(_span_ids):x}"
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else self.span_id
+        self.start_time = 0.0
+        self.started = 0.0
+        self.duration = 0.0
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_error(self, error: Any):
+        self.status = "error"
+        self.error = str(error)
+
+    def __enter__(self) -> "Span":
+        self.start_time = time.time()
+        self.started = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.started
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # 异步生成器在其他上下文中被关闭时无法还原，忽略即可
+            pass
+        if exc is not None and self.status == "ok":
+            self.set_error(f"{exc_type.__name__}: {exc}")
+        self.tracer._finish(self)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": round(self.start_time, 6),
+            "duration_s": round(self.duration, 6),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """关闭追踪时使用的空 span：不计时、不分配对象"""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_error(self, error: Any):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """轻量级追踪器
+
+    记录节点、MCP 工具调用、MCP 服务器启动和 LLM 调用的 span；
+    结束的 span 追加写入 JSON Lines 文件（如配置），并按名称汇总为直方图，
+    可导出为 Prometheus 文本格式。关闭时 span() 直接返回共享的空 span。
+    """
+
+    def __init__(self, enabled: bool = False, jsonl_path: Optional[str] = None, max_spans: int = 10000):
+        self.enabled = enabled
+        self.jsonl_path = jsonl_path
+        self._spans: Deque[Dict[str, Any]] = deque(maxlen=max_spans)
+        # (名称, 状态) -> [各桶计数..., 总数, 总耗时]
+        self._histograms: Dict[Tuple[str, str], List[float]] = {}
+        # 计数器，如 LLM token 数：(名称, 标签) -> 值
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+    def configure(self, enabled: bool = True, jsonl_path: Optional[str] = None):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.enabled = enabled
+            self.jsonl_path = jsonl_path
+
+    def span(self, name: str, **attributes: Any):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def current_trace_id(self) -> Optional[str]:
+        span = _current_span.get()
+        return span.trace_id if span else None
+
+    def add(self, name: str, value: float, **labels: str):
+        """累加计数器（关闭追踪时忽略）"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def _finish(self, span: Span):
+        record = span.to_dict()
+        with self._lock:
+            self._spans.append(record)
+            histogram = self._histograms.setdefault(
+                (span.name, span.status), [0] * (len(DURATION_BUCKETS) + 2)
+            )
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if span.duration <= bound:
+                    histogram[i] += 1
+            histogram[-2] += 1
+            histogram[-1] += span.duration
+            if self.jsonl_path:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.jsonl_path)), exist_ok=True)
+                    self._file = open(self.jsonl_path, "a", encoding="utf-8")
+                self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                self._file.flush()
+
+    def spans(self, trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """返回最近结束的 span（可按 trace_id 过滤）"""
+        with self._lock:
+            spans = list(self._spans)
+        return [s for s in spans if trace_id is None or s["trace_id"] == trace_id]
+
+    def export_jsonl(self, path: str, trace_id: Optional[str] = None) -> int:
+        spans = self.spans(trace_id)
+        with open(path, "w", encoding="utf-8") as f:
+            for record in spans:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        return len(spans)
+
+    def prometheus_text(self) -> str:
+        """Prometheus 文本格式：span 耗时直方图和计数器"""
+        lines = [
+            "# HELP research_span_duration_seconds Duration of traced spans.",
+            "# TYPE research_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        for (name, status), histogram in histograms:
+            labels = f'span="{name}",status="{status}"'
+            for bound, count in zip(DURATION_BUCKETS, histogram):
+                lines.append(f'research_span_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'research_span_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram[-2]}')
+            lines.append(f"research_span_duration_seconds_count{{{labels}}} {histogram[-2]}")
+            lines.append(f"research_span_duration_seconds_sum{{{labels}}} {histogram[-1]:.6f}")
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} counter")
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            value_text = str(int(value)) if float(value).is_integer() else repr(value)
+            lines.append(f"{name}{{{label_text}}} {value_text}" if label_text else f"{name} {value_text}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._histograms.clear()
+            self._counters.clear()
+
+
+# 进程级追踪器；通过环境变量 RESEARCH_TRACE=1 / RESEARCH_TRACE_FILE 或 configure_tracing() 开启
+tracer = Tracer(
+    # 只设置 RESEARCH_TRACE_FILE 也会开启追踪
+    enabled=os.getenv("RESEARCH_TRACE", "").lower() in ("1", "true", "yes") or bool(os.getenv("RESEARCH_TRACE_FILE")),
+    jsonl_path=os.getenv("RESEARCH_TRACE_FILE") or None,
+)
+
+
+def configure_tracing(enabled: bool = True, jsonl_path: Optional[str] = None) -> Tracer:
+    tracer.configure(enabled, jsonl_path)
+    return tracer
+
+
+def trace_node(name: str, func: Callable) -> Callable:
+    """包装 LangGraph 节点：记录节点耗时，节点返回的错误消息记为 span 错误"""
+    # 构建工作流时 langchain_core 已经加载，这里延迟导入以免拖慢不使用工作流的进程
+    from langchain_core.runnables import RunnableConfig
+
+    takes_config = "config" in inspect.signature(func).parameters
+
+    async def node(state: Dict[str, Any], config: Optional[RunnableConfig] = None):
+        if not tracer.enabled:
+            return await (func(state, config) if takes_config else func(state))
+        with tracer.span(f"node.{name}", node=name, domain=state.get("domain")) as span:
+            result = await (func(state, config) if takes_config else func(state))
+            errors = [m["error"] for m in (result or {}).get("messages", []) if "error" in m]
+            if errors:
+                span.set_error("; ".join(errors))
+            return result
+
+    return node
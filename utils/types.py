@@ -1,10 +1,12 @@
 from typing import List, Dict, Any, Optional, Annotated
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from datetime import datetime
-import operator
 
+# 记录在 MCP 边界校验一次后只读地在图中传递，冻结以便安全共享、无需复制
 class PaperInfo(BaseModel):
     """论文信息数据模型"""
+    model_config = ConfigDict(frozen=True)
+    
     title: str
     authors: List[str]
     summary: str
@@ -14,20 +16,49 @@ class PaperInfo(BaseModel):
 
 class VideoInfo(BaseModel):
     """视频信息数据模型"""
+    model_config = ConfigDict(frozen=True)
+    
     title: str
     url: str
     description: str
     published: Optional[str] = None
     channel: Optional[str] = None
+    score: Optional[float] = None  # 学术关键词匹配得分
+
+# 检索智能体请求的字段：只传输模型实际读取的字段
+PAPER_FIELDS = list(PaperInfo.model_fields)
+VIDEO_FIELDS = list(VideoInfo.model_fields)
 
 # 使用 TypedDict 而不是 BaseModel 来避免下标访问问题
 from typing_extensions import TypedDict
 
+class PaperSearchResult(TypedDict):
+    """search_recent_papers 工具的返回结构"""
+    papers: List[PaperInfo]
+    meta: Dict[str, Any]
+
+class VideoSearchResult(TypedDict):
+    """search_research_videos 工具的返回结构"""
+    videos: List[VideoInfo]
+    meta: Dict[str, Any]
+
+# 直接从 JSON 文本校验（pydantic-core 一次完成解析和校验，不经过 json.loads 和逐条构造）
+paper_search_adapter = TypeAdapter(PaperSearchResult)
+video_search_adapter = TypeAdapter(VideoSearchResult)
+
+def concat(left: List[Any], right: List[Any]) -> List[Any]:
+    """列表合并 reducer：一侧为空时直接返回另一侧，不复制列表"""
+    if not left:
+        return right
+    if not right:
+        return left
+    return left + right
+
 class ResearchState(TypedDict):
     """研究状态数据模型"""
     domain: str
     days: int
-    papers: Annotated[List[PaperInfo], operator.add]
-    videos: Annotated[List[VideoInfo], operator.add]
+    papers: Annotated[List[PaperInfo], concat]
+    videos: Annotated[List[VideoInfo], concat]
     blog_content: str
-    messages: Annotated[List[Dict[str, Any]], operator.add]
+    messages: Annotated[List[Dict[str, Any]], concat]
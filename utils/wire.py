@@ -0,0 +1,46 @@
+import json
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Union
+
+if TYPE_CHECKING:
+    from mcp.types import CallToolResult
+
+try:
+    import orjson
+except ImportError:  # orjson 是可选依赖，缺失时退回标准库
+    orjson = None
+
+
+def dumps(obj: Any) -> str:
+    """紧凑的 JSON 序列化（无缩进、无多余空格），优先使用 orjson"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def parse_fields(fields: Optional[Union[str, Sequence[str]]]) -> Optional[List[str]]:
+    """字段列表：接受列表或逗号分隔的字符串；为空表示返回全部字段"""
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    return [field.strip() for field in fields if field.strip()] or None
+
+
+def project(records: Iterable[Dict[str, Any]], fields: Optional[Sequence[str]]) -> List[Dict[str, Any]]:
+    """只保留请求的字段"""
+    if not fields:
+        return list(records)
+    return [{field: record[field] for field in fields if field in record} for record in records]
+
+
+def tool_result(payload: Dict[str, Any], structured: bool = False) -> Union[str, "CallToolResult"]:
+    """工具返回值
+
+    默认返回紧凑 JSON 文本；structured=True 时载荷只通过 MCP structuredContent 返回一次，
+    文本块只是各列表条数的简短说明（如 {"papers":20}），不再重复整个载荷。
+    """
+    if structured:
+        from mcp.types import CallToolResult, TextContent
+        stub = dumps({key: len(value) for key, value in payload.items() if isinstance(value, list)})
+        return CallToolResult(content=[TextContent(type="text", text=stub)], structuredContent=payload)
+    return dumps(payload)
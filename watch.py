@@ -0,0 +1,221 @@
+"""订阅监控模式
+
+长期运行：每个周期按 arXiv 分类各获取一次最近提交的论文（每个分类一次调用，走本地缓存的
+增量获取），在本地按关键词把论文路由到订阅的领域，只有收到新论文的领域才重新生成博客。
+上游请求数随分类数量增长，而不是随领域数量增长。
+
+    uv run python watch.py --domains-file domains.txt --categories cs.LG cs.AI cs.CL --interval 3600
+
+订阅文件每行一个领域，可在冒号后追加额外的匹配关键词：
+    large language models: llm, llms, language model
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from main import ResearchMultiAgentSystem, write_metrics
+from utils.dedup import dedupe_papers
+from utils.resilience import Deadline
+from utils.routing import DomainRouter, parse_subscription
+from utils.tracing import configure_tracing, tracer
+from utils.types import PaperInfo
+
+DEFAULT_CATEGORIES = ["cs.AI", "cs.LG", "cs.CL", "cs.CV"]
+
+
+class ResearchWatcher:
+    """按分类共享上游获取、按订阅路由论文的调度器
+
+    每个领域已处理过的论文 id 保存在 output_dir/watch_state.json 中，重启后不会重复生成；
+    博客生成失败的领域不记录，下个周期重试。
+    """
+
+    def __init__(
+        self,
+        system: ResearchMultiAgentSystem,
+        subscriptions: Dict[str, List[str]],
+        categories: Optional[List[str]] = None,
+        days: int = 7,
+        output_dir: str = ".",
+        max_concurrency: int = 4,
+        max_papers: int = 50,
+        fetch_timeout: Optional[float] = None,
+        max_seen: int = 5000,
+    ):
+        self.system = system
+        self.router = DomainRouter(subscriptions)
+        self.categories = categories or DEFAULT_CATEGORIES
+        self.days = days
+        self.output_dir = output_dir
+        self.max_concurrency = max_concurrency
+        # 每个领域用于生成博客的论文上限（与单独检索时的 max_papers 一致）
+        self.max_papers = max_papers
+        self.fetch_timeout = fetch_timeout
+        self.max_seen = max_seen
+        self.state_path = os.path.join(output_dir, "watch_state.json")
+        self.seen: Dict[str, List[str]] = self._load_state()
+        self.cycles = 0
+
+    def _load_state(self) -> Dict[str, List[str]]:
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, encoding="utf-8") as f:
+            return json.load(f).get("seen", {})
+
+    def _save_state(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"seen": self.seen, "updated": time.time()}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    async def fetch(self) -> Dict[str, Any]:
+        """每个分类调用一次 search_recent_papers（不带领域关键词），合并去重"""
+        deadline = Deadline.after(self.fetch_timeout)
+
+        async def fetch_category(category: str) -> Dict[str, Any]:
+            arguments = {"domain": "", "categories": [category], "days": self.days}
+            try:
+                return await self.system.paper_agent.search(arguments, deadline)
+            except Exception as e:
+                print(f"⚠️ 获取分类 {category} 失败：{str(e) or type(e).__name__}")
+                return {"papers": [], "meta": {"error": str(e) or type(e).__name__}}
+
+        with tracer.span("watch.fetch", categories=len(self.categories)):
+            results = await asyncio.gather(*(fetch_category(category) for category in self.categories))
+        papers: List[PaperInfo] = []
+        for result in results:
+            papers.extend(result["papers"])
+        # 交叉列出的论文会出现在多个分类中
+        papers = dedupe_papers(papers)
+        return {
+            "papers": papers,
+            "requests": sum(result["meta"].get("requests", 0) for result in results),
+            "failed": [category for category, result in zip(self.categories, results) if "error" in result["meta"]],
+        }
+
+    async def run_once(self) -> Dict[str, Any]:
+        """执行一个周期：获取、路由，只为收到新论文的领域生成博客"""
+        self.cycles += 1
+        started = time.perf_counter()
+        await self.system.start()
+        upstream = await self.fetch()
+        with tracer.span("watch.route", papers=len(upstream["papers"]), domains=len(self.router.domains)):
+            routed = self.router.route(upstream["papers"], self.max_papers)
+
+        new_counts: Dict[str, int] = {}
+        for domain, papers in routed.items():
+            seen: Set[str] = set(self.seen.get(domain, []))
+            new = sum(1 for paper in papers if paper.arxiv_id not in seen)
+            if new:
+                new_counts[domain] = new
+        due = list(new_counts)
+        print(f"🛰️ 周期 {self.cycles}：{len(self.categories)} 个分类，{upstream['requests']} 次 arXiv 请求，"
+              f"{len(upstream['papers'])} 篇论文，{len(due)}/{len(self.router.domains)} 个领域有新论文")
+
+        statuses = []
+        if due:
+            statuses = await self.system.run_research_batch(
+                due, self.days, max_concurrency=self.max_concurrency, output_dir=self.output_dir,
+                papers={domain: routed[domain] for domain in due},
+            )
+            for status in statuses:
+                if status["status"] == "ok":
+                    domain = status["domain"]
+                    ids = [paper.arxiv_id for paper in routed[domain]] + self.seen.get(domain, [])
+                    self.seen[domain] = list(dict.fromkeys(ids))[:self.max_seen]
+            self._save_state()
+
+        return {
+            "cycle": self.cycles,
+            "categories": len(self.categories),
+            "requests": upstream["requests"],
+            "failed_categories": upstream["failed"],
+            "papers": len(upstream["papers"]),
+            "new_papers": new_counts,
+            "statuses": statuses,
+            "elapsed_s": round(time.perf_counter() - started, 2),
+        }
+
+    async def run(self, interval: float = 3600.0, cycles: Optional[int] = None):
+        """每 interval 秒执行一个周期（从周期开始计时）；cycles 为 None 时一直运行"""
+        while cycles is None or self.cycles < cycles:
+            started = time.monotonic()
+            try:
+                await self.run_once()
+            except Exception as e:
+                # 单个周期失败不影响后续周期
+                print(f"❌ 周期 {self.cycles} 失败：{str(e)}")
+            if cycles is not None and self.cycles >= cycles:
+                break
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+def load_subscriptions(args: argparse.Namespace) -> Dict[str, List[str]]:
+    """从参数和订阅文件中收集 {领域: 关键词}（同名领域合并关键词）"""
+    lines = list(args.domains)
+    if args.domains_file:
+        with open(args.domains_file, encoding="utf-8") as f:
+            lines.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    subscriptions: Dict[str, List[str]] = {}
+    for line in lines:
+        domain, keywords = parse_subscription(line)
+        if domain:
+            subscriptions[domain] = list(dict.fromkeys(subscriptions.get(domain, []) + keywords))
+    return subscriptions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Research watch scheduler")
+    parser.add_argument("--domains", nargs="+", default=[], help="订阅的领域（可写成 领域:关键词1,关键词2）")
+    parser.add_argument("--domains-file", help="每行一个订阅的文本文件")
+    parser.add_argument("--categories", nargs="+", default=DEFAULT_CATEGORIES, help="共享获取的 arXiv 分类")
+    parser.add_argument("--interval", type=float, default=3600.0, help="周期间隔（秒）")
+    parser.add_argument("--cycles", type=int, help="运行的周期数（默认一直运行）")
+    parser.add_argument("--days", type=int, default=7, help="时间范围（天数）")
+    parser.add_argument("--max-papers", type=int, default=50, help="每个领域用于生成博客的论文上限")
+    parser.add_argument("--max-concurrency", type=int, default=4, help="同时运行的工作流数量")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="同时进行的 LLM 调用数量")
+    parser.add_argument("--output-dir", default=".", help="博客和状态文件的输出目录")
+    parser.add_argument("--fetch-timeout", type=float, help="每个周期获取分类论文的截止时间（秒）")
+    parser.add_argument("--no-llm-cache", action="store_true", help="关闭 LLM 响应缓存")
+    parser.add_argument("--digest", action="store_true", help="每日摘要模式：只为新增论文生成内容并合并进上次的文章")
+    parser.add_argument("--sectioned", action="store_true", help="分节模式：先规划大纲，再并发生成各节")
+    parser.add_argument("--metrics-file", help="开启追踪，结束时把指标以 Prometheus 文本格式写入该文件")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    subscriptions = load_subscriptions(args)
+    if not subscriptions:
+        raise SystemExit("请通过 --domains 或 --domains-file 提供订阅的领域")
+    if args.metrics_file:
+        configure_tracing(True)
+    system = ResearchMultiAgentSystem(
+        sessions_per_server=max(1, min(args.max_concurrency, 4)),
+        llm_concurrency=args.llm_concurrency,
+        llm_cache=not args.no_llm_cache,
+        digest=args.digest,
+        sectioned=args.sectioned,
+    )
+    watcher = ResearchWatcher(
+        system, subscriptions, args.categories, days=args.days, output_dir=args.output_dir,
+        max_concurrency=args.max_concurrency, max_papers=args.max_papers, fetch_timeout=args.fetch_timeout,
+    )
+    print(f"👀 监控 {len(subscriptions)} 个领域，{len(watcher.categories)} 个分类，每 {args.interval:.0f} 秒一次")
+    try:
+        async with system:
+            await watcher.run(args.interval, args.cycles)
+    except KeyboardInterrupt:
+        print("\n👋 用户中断，程序退出")
+    finally:
+        if args.metrics_file:
+            write_metrics(args.metrics_file)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())